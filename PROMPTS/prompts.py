@@ -7,6 +7,7 @@ class Prompt(BaseModel):
     application: str = Field(description="The application this prompt is for")
     date_created: datetime = Field(description="The date the prompt was created")
     creator: str = Field(description="The creator of the prompt")
+    version: str = Field(default="1", description="Bump when the prompt text changes; part of cached answer keys")
     
 
 ANSWER_WITH_CONTEXT = Prompt(
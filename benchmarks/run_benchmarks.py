@@ -0,0 +1,291 @@
+"""
+Benchmarks for the serialization, rendering and retrieval hot paths.
+
+Times each function on the parsed documents and PDFs in app_storage and on
+synthetic documents scaled up from them, then writes the results (plus the
+commit, Python version and platform) to a JSON file. Comparing that file
+with one from an earlier commit shows regressions.
+
+The utils package creates a Pinecone client on import, so PINECONE_API_KEY
+must be set; any value works, no requests are made.
+
+Example:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scale 20 --filter serialization
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import json
+import pickle
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from utils.bm25 import BM25Index, reciprocal_rank_fusion  # noqa: E402
+from utils.mmr import mmr_select  # noqa: E402
+from utils.page_render import PageRenderer  # noqa: E402
+from utils.search_backends import LocalIndex  # noqa: E402
+from utils.serialization import (extract_json_from_parsed_doc,  # noqa: E402
+                                 parsed_doc_to_records, save_json, save_pickle)
+from utils.vector_db import retrieval_augmented_prompt  # noqa: E402
+from utils.visualization import (annotate_hits, draw_box_on_page,  # noqa: E402
+                                 pdf_to_images, viz_chunk_in_pdf,
+                                 viz_chunk_with_box, viz_grounding_box)
+
+PICKLE_DIR = REPO_ROOT / "app_storage/parsed_docs_pkl"
+PDF_DIR = REPO_ROOT / "app_storage/original_files"
+RESULTS_DIR = REPO_ROOT / "benchmarks/results"
+EMBEDDING_DIM = 1024  # llama-text-embed-v2, the model of the integrated index
+
+
+def bench(fn, repeat=5):
+    """
+    Time `fn()` like timeit: pick a loop count that runs for at least 0.2 s,
+    then time `repeat` rounds of it.
+
+    Returns:
+        dict: Seconds per call (min, median, mean, stdev) and the counts used
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    rounds = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def scale_parsed_doc(parsed_doc, factor):
+    """
+    A document with `factor` times the chunks of `parsed_doc` (fresh chunk
+    IDs, same pages and boxes), to time the per-chunk paths at larger sizes.
+    """
+    doc = parsed_doc[0]
+    chunks = [chunk.model_copy(update={"chunk_id": str(uuid.uuid4())})
+              for _ in range(factor) for chunk in doc.chunks]
+    return [doc.model_copy(update={"chunks": chunks,
+                                   "markdown": "\n\n".join([doc.markdown] * factor)})]
+
+
+def load_inputs(scale):
+    """
+    Pair each saved pickle with its PDF and add a scaled-up copy of the first.
+    """
+    documents = []
+    for pickle_path in sorted(PICKLE_DIR.glob("*.pkl")):
+        pdf_path = PDF_DIR / (pickle_path.stem + ".pdf")
+        with open(pickle_path, "rb") as f:
+            parsed_doc = pickle.load(f)
+        documents.append((pickle_path.stem, parsed_doc, pdf_path if pdf_path.exists() else None))
+    if not documents:
+        raise SystemExit(f"No parsed documents in {PICKLE_DIR}")
+    name, parsed_doc, pdf_path = documents[0]
+    documents.append((f"{name} x{scale}", scale_parsed_doc(parsed_doc, scale), pdf_path))
+    return documents
+
+
+def define_benchmarks(documents, scale, tmp_dir):
+    """
+    Return (name, callable) pairs. Names are stable across commits so result
+    files can be compared by name.
+    """
+    cases = []
+    for name, parsed_doc, pdf_path in documents:
+        n_chunks = len(parsed_doc[0].chunks)
+        label = f"{name} ({n_chunks} chunks)"
+        parsed_json = extract_json_from_parsed_doc(parsed_doc)
+        cases += [
+            (f"serialization/extract_json_from_parsed_doc[{label}]",
+             lambda d=parsed_doc: extract_json_from_parsed_doc(d)),
+            (f"serialization/save_json[{label}]",
+             lambda d=parsed_doc: save_json(d, "bench.pdf", tmp_dir)),
+            (f"serialization/save_pickle[{label}]",
+             lambda d=parsed_doc: save_pickle(d, tmp_dir, "bench.pdf")),
+            (f"serialization/parsed_doc_to_records[{label}]",
+             lambda j=parsed_json: parsed_doc_to_records(j, "bench.pdf")),
+        ]
+
+    # Rendering runs on the real documents only; the scaled one has the same pages
+    for name, parsed_doc, pdf_path in documents[:-1]:
+        if pdf_path is None:
+            continue
+        chunks = parsed_doc[0].chunks
+        chunk = chunks[len(chunks) // 2]
+        page = chunk.grounding[0].page
+        boxes = [{"l": g.box.l, "t": g.box.t, "r": g.box.r, "b": g.box.b}
+                 for c in chunks for g in c.grounding if g.page == page]
+        hits = [{"pdf_page": c.grounding[0].page,
+                 "box": {"l": c.grounding[0].box.l, "t": c.grounding[0].box.t,
+                         "r": c.grounding[0].box.r, "b": c.grounding[0].box.b}}
+                for c in chunks]
+        page_img = pdf_to_images(pdf_path)[page]
+        cases += [
+            (f"rendering/pdf_to_images[{name}]", lambda p=pdf_path: pdf_to_images(p)),
+            (f"rendering/render_page_cold[{name}]",
+             lambda p=pdf_path, n=page: PageRenderer().render_page(p, n)),
+            (f"rendering/viz_chunk_in_pdf[{name}]",
+             lambda d=parsed_doc, p=pdf_path, c=chunk.chunk_id: viz_chunk_in_pdf(d, p, c)),
+            (f"rendering/viz_grounding_box[{name}]",
+             lambda img=page_img, c=chunk: viz_grounding_box(img, c)),
+            (f"rendering/viz_chunk_with_box[{name}, {len(boxes)} boxes]",
+             lambda b=boxes, p=pdf_path, n=page: viz_chunk_with_box(b, p, n)),
+            (f"rendering/annotate_hits[{name}, {len(hits)} hits]",
+             lambda h=hits, p=pdf_path: annotate_hits(p, h)),
+            (f"rendering/draw_box_on_page[{name}]",
+             lambda img=page_img, b=boxes[0]: draw_box_on_page(b, img.copy())),
+        ]
+
+    texts = [chunk.text for _, parsed_doc, _ in documents[:-1] for chunk in parsed_doc[0].chunks]
+    question = "How is the Schottky barrier height measured?"
+    for n_contexts in sorted({10, 100, 50 * scale}):
+        contexts = [texts[i % len(texts)] + f" ({i})" for i in range(n_contexts)]
+        chunk_ids = [str(i) for i in range(n_contexts)]
+        scores = [1 - i / n_contexts for i in range(n_contexts)]
+        cases.append((f"retrieval/retrieval_augmented_prompt[{n_contexts} contexts]",
+                      lambda c=contexts, i=chunk_ids, s=scores:
+                      retrieval_augmented_prompt(c, question, chunk_ids=i, scores=s)))
+
+    # Keyword search over every document, one namespace per document as in the app
+    bm25 = BM25Index()
+    for name, parsed_doc, _ in documents:
+        bm25.add_records(name, parsed_doc_to_records(extract_json_from_parsed_doc(parsed_doc),
+                                                     "bench.pdf"))
+    first_namespace = documents[0][0]
+    cases += [
+        (f"retrieval/bm25_search[{len(bm25)} chunks, all namespaces]",
+         lambda: bm25.search(question, top_k=10)),
+        (f"retrieval/bm25_search[{len(bm25)} chunks, one namespace]",
+         lambda: bm25.search(question, first_namespace, top_k=10)),
+    ]
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((8, EMBEDDING_DIM), dtype=np.float32)
+    local_index = LocalIndex(Path(tmp_dir) / "local_index")
+    for n_rows in sorted({10_000, 10_000 * scale}):
+        namespace = f"bench-{n_rows}"
+        local_index.build(namespace, [f"id-{i}" for i in range(n_rows)],
+                          rng.standard_normal((n_rows, EMBEDDING_DIM), dtype=np.float32),
+                          [{"pdf_page": i % 30} for i in range(n_rows)])
+        label = f"{n_rows} x {EMBEDDING_DIM}"
+        cases += [
+            (f"retrieval/local_index_top_k[{label}, 1 query]",
+             lambda ns=namespace: local_index.search_vectors(queries[0], ns, top_k=10)),
+            (f"retrieval/local_index_top_k[{label}, batch of {len(queries)}]",
+             lambda ns=namespace: local_index.search_vectors(queries, ns, top_k=10)),
+            (f"retrieval/local_index_top_k[{label}, 1 query, filtered]",
+             lambda ns=namespace: local_index.search_vectors(queries[0], ns, top_k=10,
+                                                             filter={"pdf_page": {"$lt": 10}})),
+        ]
+
+    for n_candidates in sorted({20, 100, 10 * scale}):
+        candidates = rng.standard_normal((n_candidates, EMBEDDING_DIM), dtype=np.float32)
+        cases.append((f"retrieval/mmr_select[{n_candidates} candidates, k=10]",
+                      lambda c=candidates: mmr_select(queries[0], c, 10, lambda_mult=0.5)))
+
+    for n_hits in sorted({10, 100, 50 * scale}):
+        # Two rankings of the same pool in different orders, half of them shared
+        vector_hits = [{"_id": f"c{i}", "_score": 1.0, "fields": {}} for i in range(n_hits)]
+        keyword_hits = [{"_id": f"c{i}", "_score": 1.0, "fields": {}}
+                        for i in range(n_hits // 2, n_hits + n_hits // 2)][::-1]
+        cases.append((f"retrieval/reciprocal_rank_fusion[2 x {n_hits} hits]",
+                      lambda v=vector_hits, k=keyword_hits:
+                      reciprocal_rank_fusion([v, k], top_k=10)))
+    return cases
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Print the median time of every benchmark against a baseline results
+    file. Returns the names that got slower by more than `threshold`.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'benchmark':<90} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median"], result["median"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<90} {before * 1000:>9.3f}ms {after * 1000:>9.3f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths and save JSON results.")
+    parser.add_argument("--scale", type=int, default=10,
+                        help="Size factor of the synthetic document and context list")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--output", default=None,
+                        help="Results file, defaults to benchmarks/results/<time>-<commit>.json")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = define_benchmarks(load_inputs(args.scale), args.scale, tmp_dir)
+        for name, fn in cases:
+            if args.filter and args.filter not in name:
+                continue
+            start = time.perf_counter()
+            results[name] = bench(fn, repeat=args.repeat)
+            print(f"{name:<90} {results[name]['median'] * 1000:>10.3f} ms"
+                  f"  ({time.perf_counter() - start:.1f} s)")
+
+    now = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{now.strftime('%Y%m%dT%H%M%S')}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": now.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "scale": args.scale,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmarks slower than {args.threshold}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,78 @@
-from agentic_doc.parse import parse_and_save_documents
+"""
+Batch ingestion of a directory of PDFs.
 
-# URLs to the document
-documents = [
-    "https://satsuite.collegeboard.org/media/pdf/sample-sat-score-report.pdf", 
-    "https://www.rbcroyalbank.com/banking-services/_assets-custom/pdf/eStatement.pdf"
-    ]
+Parses every PDF under a directory with bounded concurrency, saves the parsed
+JSON, pickle and Pinecone records under app_storage, and optionally upserts
+the records into a Pinecone index (one namespace per file). Progress is kept
+in a manifest so an interrupted run picks up where it stopped.
 
-# Directory where the parsed results will be saved
-result_save_dir = "./parsed_results"
-grounding_save_dir = "./grounding"
+Example:
+    python parse_save_docs.py app_storage/original_files --concurrency 8
+    python parse_save_docs.py app_storage/original_files --index paper-chunks
+"""
+import argparse
 
-# Parse the documents and save the results
-result_paths = parse_and_save_documents(documents=documents, 
-                                        result_save_dir=result_save_dir,
-                                        grounding_save_dir=grounding_save_dir)
+from utils.bm25 import get_bm25_index
+from utils.clients import get_index
+from utils.ingestion import (JSON_DIR, MANIFEST_PATH, ORIGINAL_FILES_DIR,
+                             PICKLE_DIR, RECORDS_DIR, ingest_directory)
+from utils.metadata_store import get_metadata_store
+from utils.upsert import UpsertEngine
+from utils.vector_db import invalidate_cached_results
 
-print(f"Result saved to: {result_paths}")
 
+def make_upsert_fn(index_name, max_workers=8):
+    engine = UpsertEngine(get_index(index_name), max_workers=max_workers,
+                          metadata_store=get_metadata_store(),
+                          on_upsert=invalidate_cached_results)
 
+    def upsert_fn(namespace, records):
+        report = engine.upsert(namespace, records)
+        if report.failed_batches:
+            raise RuntimeError(f"{report.failed_batches} batches failed: {report.errors[0]}")
+
+    return upsert_fn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse and save a directory of PDFs.")
+    parser.add_argument("input_dir", nargs="?", default=str(ORIGINAL_FILES_DIR),
+                        help="Directory containing the PDFs to ingest")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Number of documents parsed at once")
+    parser.add_argument("--pattern", default="*.pdf", help="Glob pattern for input files")
+    parser.add_argument("--no-recursive", action="store_true",
+                        help="Do not walk subdirectories")
+    parser.add_argument("--shard-pages", type=int, default=None,
+                        help="Parse large PDFs in shards of this many pages")
+    parser.add_argument("--json-dir", default=str(JSON_DIR))
+    parser.add_argument("--pickle-dir", default=str(PICKLE_DIR))
+    parser.add_argument("--records-dir", default=str(RECORDS_DIR))
+    parser.add_argument("--manifest", default=str(MANIFEST_PATH),
+                        help="Manifest of completed files used to resume runs")
+    parser.add_argument("--index", default=None,
+                        help="Pinecone index to upsert records into (optional)")
+    parser.add_argument("--upsert-workers", type=int, default=8,
+                        help="Number of upsert batches in flight per file")
+    args = parser.parse_args()
+
+    upsert_fn = make_upsert_fn(args.index, args.upsert_workers) if args.index else None
+    summary = ingest_directory(
+        input_dir=args.input_dir,
+        concurrency=args.concurrency,
+        manifest_path=args.manifest,
+        pattern=args.pattern,
+        recursive=not args.no_recursive,
+        upsert_fn=upsert_fn,
+        json_dir=args.json_dir,
+        pickle_dir=args.pickle_dir,
+        records_dir=args.records_dir,
+        pages_per_shard=args.shard_pages,
+        bm25_index=get_bm25_index(),
+    )
+    print(f"Done: {summary['done']}, skipped: {summary['skipped']}, "
+          f"failed: {summary['failed']}")
+
+
+if __name__ == "__main__":
+    main()
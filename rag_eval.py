@@ -0,0 +1,61 @@
+"""
+Batch RAG evaluation.
+
+Runs retrieval and generation for every question of a JSON Lines file with
+bounded concurrency, writes one result line per question (answer, chunk IDs,
+per-stage timings, recall) and prints latency percentiles, throughput and
+recall@k against the labeled chunk IDs.
+
+Question file, one JSON object per line:
+    {"id": "q1", "question": "How is Schottky barrier height measured?",
+     "namespace": "Rejhon_2017_Semicond_Sci_Technol_32_085007",
+     "relevant_chunk_ids": ["..."]}
+
+Example:
+    python rag_eval.py questions.jsonl --index paper-chunks --concurrency 8
+    python rag_eval.py questions.jsonl --index paper-chunks --retrieval-only --top-k 10
+"""
+import argparse
+import json
+
+from utils.rag_eval import EVAL_OUTPUT_PATH, load_questions, run_eval
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate RAG over a file of questions.")
+    parser.add_argument("questions", help="JSON Lines file of questions")
+    parser.add_argument("--index", default="paper-chunks", help="Pinecone index")
+    parser.add_argument("--namespace", default=None,
+                        help="Namespace for questions that do not name one")
+    parser.add_argument("--top-k", type=int, default=5, help="Chunks retrieved per question")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions in flight at once")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--temperature", type=float, default=0.1)
+    parser.add_argument("--mmr-lambda", type=float, default=None,
+                        help="Diversify retrieved chunks with MMR")
+    parser.add_argument("--retrieval-only", action="store_true",
+                        help="Skip answer generation")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the query and answer caches")
+    parser.add_argument("--output", default=str(EVAL_OUTPUT_PATH),
+                        help="JSON Lines file for the per-question results")
+    args = parser.parse_args()
+
+    _, summary = run_eval(
+        load_questions(args.questions),
+        args.index,
+        namespace=args.namespace,
+        top_k=args.top_k,
+        concurrency=args.concurrency,
+        model_name=args.model,
+        temperature=args.temperature,
+        retrieval_only=args.retrieval_only,
+        use_cache=not args.no_cache,
+        mmr_lambda=args.mmr_lambda,
+        output_path=args.output,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,11 @@ from pathlib import Path
 import streamlit as st
 from streamlit_pdf_viewer import pdf_viewer
 
-from agentic_doc.parse import parse
-from agentic_doc.utils import viz_parsed_document
-from agentic_doc.config import VisualizationConfig
-from agentic_doc.common import ChunkType
+from utils.parse_cache import cached_parse, get_parse_cache
+from utils.chunk_store import save_chunk_store, load_parsed_doc
+from utils.visualization import create_visualizations
+from utils.doc_index import get_doc_index
+from utils.bm25 import get_bm25_index
 
 
 def remove_extension(file_name):
@@ -70,48 +71,14 @@ def save_json(parsed_results, doc_path, save_dir):
     return json_data, json_file_path
 
 
-def create_visualizations(parsed_documents,
-                          doc_path,
-                          output_dir,
-                          text_color=(0, 0, 255),
-                          table_color=(0, 255, 0),
-                          figure_color=(255, 0, 0),
-                          marginalia_color=(0, 255, 255)):
-
-    # Check if output directory exists, if not create it
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    viz_config = VisualizationConfig(
-        thickness=1,  # Thicker bounding boxes
-        text_bg_opacity=0.5,  # More opaque text background
-        font_scale=0.7,  # Larger text
-        # Custom colors for different chunk types
-        color_map={
-            ChunkType.text: text_color,  # Red for tables
-            ChunkType.table: table_color,  # Green for tables
-            ChunkType.figure: figure_color,  # Blue for text
-            ChunkType.marginalia: marginalia_color
-        }
-    )
-
-    for parsed_doc in parsed_documents:
-        images = viz_parsed_document(
-            doc_path,
-            parsed_doc,
-            output_dir=output_dir,
-            viz_config=viz_config
-        )
-
-    return output_dir
-
-
 if "parsed_documents" not in st.session_state:
     st.session_state["parsed_documents"] = None
 
 PICKLE_DIR = Path("app_storage/parsed_docs_pkl")
 JSON_DIR = Path("app_storage/parsed_docs_json")
+CHUNK_STORE_DIR = Path("app_storage/parsed_docs_parquet")
 VISUALIZATION_DIR = Path("app_storage/visualizations")
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
 
 
 st.title("Agentic Document Parser")
@@ -134,8 +101,11 @@ if uploaded_file is not None:
     if st.button("Parse PDF"):
         st.write("Parsing PDF...")
         try:
-            st.session_state["parsed_documents"] = parse(tmp_file_path)
+            st.session_state["parsed_documents"] = cached_parse(tmp_file_path)
             st.success("PDF parsed successfully")
+            cache_stats = get_parse_cache().stats()
+            st.caption(f"Parse cache: {cache_stats['hits']} hits, "
+                       f"{cache_stats['misses']} misses")
         except Exception as e:
             st.error(f"Error parsing PDF: {str(e)}")
 
@@ -150,30 +120,45 @@ if uploaded_file is not None:
                             save_dir=PICKLE_DIR,
                             file_name=uploaded_file.name)
                 st.success("Pickle file saved successfully")
-                save_json(st.session_state["parsed_documents"],
-                          doc_path=uploaded_file.name,
-                          save_dir=JSON_DIR)
+                _, json_path = save_json(st.session_state["parsed_documents"],
+                                         doc_path=uploaded_file.name,
+                                         save_dir=JSON_DIR)
                 st.success("JSON file saved successfully")
+                bm25_index = get_bm25_index()
+                bm25_index.add_json_file(json_path)
+                bm25_index.save()
+                save_chunk_store(st.session_state["parsed_documents"],
+                                 save_dir=CHUNK_STORE_DIR,
+                                 file_name=uploaded_file.name)
+                st.success("Chunk store saved successfully")
             except Exception as e:
                 st.error(f"Error saving parsed documents: {str(e)}")
 
 st.divider() #-----------------------------------------------------
 st.subheader("Load Parsed Documents")
 
-if any(PICKLE_DIR.iterdir()):
+saved_files = {file.name: file for file in PICKLE_DIR.glob("*.pkl")}
+if CHUNK_STORE_DIR.exists():
+    saved_files.update({file.name: file for file in CHUNK_STORE_DIR.glob("*.parquet")})
+
+if saved_files:
     # st.info(f"Saved documents found in storage: {PICKLE_DIR.iterdir()}")
     # Create a dropdown for saved documents
     selected_file = st.selectbox(
         "Select a saved document to load",
-        [file.name for file in PICKLE_DIR.iterdir()],
+        sorted(saved_files),
         key=f"selectbox_load_pickle"
     )
 
     if st.button("Load Parsed Documents"):
         st.write("Loading parsed documents...")
         try:
-            with open(PICKLE_DIR / selected_file, "rb") as f:
-                st.session_state["parsed_documents"] = pickle.load(f)
+            saved_path = saved_files[selected_file]
+            if saved_path.suffix == ".parquet":
+                st.session_state["parsed_documents"] = load_parsed_doc(saved_path)
+            else:
+                with open(saved_path, "rb") as f:
+                    st.session_state["parsed_documents"] = pickle.load(f)
             with st.expander("Loaded Parsed Documents"):
                 st.write(st.session_state["parsed_documents"])
 
@@ -194,6 +179,22 @@ if st.session_state["parsed_documents"] is not None:
         except Exception as e:
             st.error(f"Error creating visualizations: {str(e)}")
 
+    with st.expander("Find chunks by position"):
+        doc_index = get_doc_index(st.session_state["parsed_documents"])
+        page = st.selectbox("Page", doc_index.pages(), key="position_page")
+        col1, col2 = st.columns(2)
+        with col1:
+            x = st.slider("x (fraction of page width)", 0.0, 1.0, 0.5, 0.01)
+        with col2:
+            y = st.slider("y (fraction of page height)", 0.0, 1.0, 0.5, 0.01)
+        for chunk in doc_index.chunks_at(page, x, y):
+            st.write(f"**{chunk.chunk_type}** `{chunk.chunk_id}`")
+            st.markdown(chunk.text)
+        if st.checkbox("Show overlapping chunks on this page"):
+            page_index = doc_index.spatial_index(page)
+            pairs = page_index.overlapping_pairs() if page_index is not None else []
+            st.write(pairs or "No overlapping boxes")
+
 st.divider()
 st.subheader("Visualize Parsed Documents")
 
@@ -207,7 +208,8 @@ if any(VISUALIZATION_DIR.iterdir()):
 
     selected_visualization = st.selectbox(
         "Select a visualization to view",
-        [file.name for file in (VISUALIZATION_DIR / selected_folder).iterdir()],
+        sorted(file.name for file in (VISUALIZATION_DIR / selected_folder).iterdir()
+               if file.suffix.lower() in IMAGE_SUFFIXES),
         key=f"selectbox_{selected_folder}"
     )
     st.image(VISUALIZATION_DIR / selected_folder / selected_visualization)
@@ -4,6 +4,7 @@ from streamlit_pdf_viewer import pdf_viewer
 import os
 import tempfile
 from pathlib import Path
+from utils.pdf_utils import write_page_range
 
 st.title("PDF Splitter")
 
@@ -29,18 +30,12 @@ if uploaded_file is not None:
         end_page = st.number_input("End Page", min_value=start_page, max_value=num_pages, value=num_pages)
 
     if st.button("Split PDF"):
-        writer = PdfWriter()
-
-        # Add selected pages to writer
-        for page_num in range(start_page-1, end_page):
-            writer.add_page(reader.pages[page_num])
-
         # Create output filename
         output_filename = f"{Path(uploaded_file.name).stem}_pages_{start_page}_to_{end_page}.pdf"
         
-        # Save split PDF to temporary file
+        # Save selected pages to temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_output:
-            writer.write(tmp_output)
+            write_page_range(reader, start_page - 1, end_page - 1, tmp_output)
             tmp_output_path = tmp_output.name
         
         with st.expander("Preview Split PDF"):
@@ -1,18 +1,26 @@
-import os
 import json
 import numpy as np
 import pandas as pd
 import streamlit as st
-from pinecone import Pinecone
 from pathlib import Path
 from utils.vector_db import get_vector_db_as_df
 from utils.visualization import (viz_chunk_in_pdf, 
                                  draw_box_on_page, 
-                                 pdf_to_images)
+                                 annotate_hits)
+from utils.page_render import render_page
 from utils.vector_db import (query_to_embedding, 
-                             rag_response, 
-                             retrieval_augmented_prompt,
-                             retrieve_contexts)
+                             rag_response_stream,
+                             retrieve_contexts,
+                             retrieve_contexts_multi,
+                             retrieve_contexts_hybrid,
+                             get_chunk_metadata)
+from utils.metadata_store import get_metadata_store
+from utils.query_cache import get_query_cache
+from utils.answer_cache import get_answer_cache
+from utils.metrics import get_metrics
+from utils.clients import connection_stats, get_index, get_pinecone_client
+from utils.search_backends import LocalIndex, pinecone_query_embedder
+from utils.vector_export import export_namespace_to_parquet
 
 @st.cache_data
 def get_vector_db_as_df_cached(index_name: str, namespace: str) -> pd.DataFrame:
@@ -25,19 +33,43 @@ def viz_chunk_in_pdf_cached(index_name: str,
                             pdf_filepath: str,
                             color: tuple[int, int, int] = (0, 255, 0), 
                             thickness: int = 2) -> np.ndarray:
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index(index_name)
-    fetched_results = index.fetch(ids=[chunk_id], namespace=namespace)
-    box_json = fetched_results.vectors[chunk_id].metadata['box']
-    box_json = json.loads(box_json)
-    page_number = fetched_results.vectors[chunk_id].metadata['pdf_page']
-    page_number = int(page_number)  
-    images = pdf_to_images(pdf_filepath)
-    img = images[page_number]
+    # Box and page come from the local metadata store, no fetch round trip
+    metadata = get_chunk_metadata([chunk_id], namespace, index_name)[0]
+    box_json = json.loads(metadata['box'])
+    page_number = int(metadata['pdf_page'])
+    img = render_page(pdf_filepath, page_number)
     img = draw_box_on_page(box_json, img, color, thickness)
     return img
 
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+@st.cache_resource
+def get_local_index() -> LocalIndex:
+    return LocalIndex(embed_fn=pinecone_query_embedder(pc))
+
+def show_answer_captions(timings: dict, context_caption=None):
+    """
+    Context, latency and cache captions under an answer, from the
+    `timings` filled by `rag_response_stream`.
+    """
+    packed = timings.get("packed")
+    if packed is not None:
+        (context_caption or st).caption(
+            f"Context: {len(packed.chunk_ids)} chunks, {packed.tokens} tokens"
+            + (f", dropped {packed.dropped}" if packed.dropped else ""))
+    if timings.get("ttft") is not None:
+        st.caption(f"First token after {timings['ttft']:.2f} s, "
+                   f"full answer after {timings['total']:.2f} s"
+                   + (" (stopped)" if timings.get("cancelled") else "")
+                   + (" (cached)" if timings.get("cached") else ""))
+    elif timings.get("cancelled"):
+        st.caption("Stopped before the first token")
+    answer_stats = get_answer_cache().stats()
+    st.caption(f"Answer cache: {answer_stats['hit_rate']:.0%} hit rate, "
+               f"{answer_stats['saved_seconds']:.1f} s of LLM time saved")
+    openai_stats = connection_stats()["openai"]
+    st.caption(f"OpenAI: {openai_stats['requests']} requests over "
+               f"{openai_stats['connections']} connections")
+
+pc = get_pinecone_client()
 
 if "selected_namespace" not in st.session_state:
     st.session_state["selected_namespace"] = None
@@ -48,7 +80,7 @@ st.title("RAG with Pinecone")
 col1, col2 = st.columns(2)
 with col1:
     index_name = st.text_input("Enter index name", value="paper-chunks")
-    index = pc.Index(index_name)
+    index = get_index(index_name)
 
     if st.button("Describe Index"):
         st.write(index.describe_index_stats())
@@ -69,18 +101,6 @@ with col2:
     else:
         st.info("No namespaces found in this index")
 
-with st.sidebar:
-    st.subheader("Session State Variables")
-    session_vars = {key: value for key, value in st.session_state.items()}
-    
-    if session_vars:
-        st.write("Current session state variables:")
-        for key, value in session_vars.items():
-            with st.expander(f"{key}"):
-                st.write(f"- **{key}**: {value}")
-    else:
-        st.info("No session state variables found")
-
 # Button to fetch all data from the index and namespace
 # get_df = st.checkbox("Extract Vector DB as DataFrame", value = True)
 if st.session_state["selected_namespace"] is not None:
@@ -88,17 +108,27 @@ if st.session_state["selected_namespace"] is not None:
     with col2:
         st.caption(f"Total records: {len(df)}")
         st.caption(f"Memory usage: {df.memory_usage(deep=True).sum()/1024/1024:.2f} MB")
+    metadata_store = get_metadata_store()
+    if metadata_store.count(st.session_state["selected_namespace"]) < len(df):
+        # Backfill namespaces upserted before the metadata store existed
+        metadata_store.put_records(st.session_state["selected_namespace"],
+                                   df.drop(columns=["embedding", "dimensions"]).to_dict(orient="records"))
     with st.expander(f"Dataframe for Vector DB: {st.session_state['selected_namespace']}"): 
         st.dataframe(df)
+    if st.button("Export namespace to Parquet"):
+        with st.spinner("Exporting..."):
+            export_path, num_rows = export_namespace_to_parquet(
+                index, st.session_state["selected_namespace"])
+        st.success(f"Exported {num_rows} vectors to {export_path}")
         
 if namespace_names:
     col1, col2 = st.columns(2)
     with col1:
         chunk_id = st.selectbox("Select a chunk id", df['id'])
     with col2:
-        fetched_results = index.fetch(ids=[chunk_id], namespace=st.session_state["selected_namespace"])
+        chunk_metadata = get_chunk_metadata([chunk_id], st.session_state["selected_namespace"], index_name)[0]
         with st.expander("View Metadata"):  
-            st.write(fetched_results.vectors[chunk_id].metadata)
+            st.write(chunk_metadata)
     
 if st.button("Visualize chunk in PDF"):
     pdf_folder = Path(r"C:\Users\johnk\Projects-code\LEARN\landing-ai\app_storage\original_files")
@@ -125,37 +155,136 @@ with col1:
 with col2:
     top_k = st.number_input("Enter top k", value=3, min_value=1, max_value=10)
 
+local_index = get_local_index()
+col1, col2 = st.columns(2)
+with col1:
+    use_local_index = st.toggle(
+        "Search local index",
+        value=False,
+        disabled=st.session_state["selected_namespace"] not in local_index.namespaces(),
+        help="Exact search over a local copy of the namespace instead of Pinecone")
+with col2:
+    if st.session_state["selected_namespace"] is not None and st.button("Build local index"):
+        local_index.build_from_dataframe(st.session_state["selected_namespace"], df)
+        st.rerun()
+
+search_all_namespaces = st.toggle(
+    "Search all namespaces", value=False,
+    help="Search every namespace (one per PDF) concurrently and merge the best hits")
+col1, col2 = st.columns(2)
+with col1:
+    hybrid_search = st.toggle(
+        "Hybrid search (BM25 + vector)", value=False,
+        help="Fuse keyword and vector rankings; finds exact terms like formulas and part numbers")
+with col2:
+    keyword_weight = st.slider("Keyword weight", 0.0, 2.0, 1.0, 0.1, disabled=not hybrid_search)
+col1, col2 = st.columns(2)
+with col1:
+    diversify = st.toggle(
+        "Diversify results (MMR)", value=False,
+        help="Over-fetch candidates and drop near-identical chunks with maximal marginal relevance")
+with col2:
+    mmr_lambda = st.slider("Relevance vs. diversity", 0.0, 1.0, 0.5, 0.05, disabled=not diversify)
 retrieve_chunks = st.toggle("Retrieve Chunks", value=False)
 
 if retrieve_chunks:
     if query_text:
-        chunk_ids, metadata_list = retrieve_contexts(
-            query_text, index_name, st.session_state["selected_namespace"], top_k)
-        
+        if hybrid_search:
+            chunk_ids, metadata_list = retrieve_contexts_hybrid(
+                query_text, index_name,
+                None if search_all_namespaces else st.session_state["selected_namespace"], top_k,
+                backend=local_index if use_local_index else None,
+                keyword_weight=keyword_weight)
+            for metadata in metadata_list:
+                metadata.setdefault('namespace', st.session_state["selected_namespace"])
+        elif search_all_namespaces:
+            chunk_ids, metadata_list = retrieve_contexts_multi(
+                query_text, index_name, None if use_local_index else namespace_names, top_k,
+                backend=local_index if use_local_index else None)
+        else:
+            chunk_ids, metadata_list = retrieve_contexts(
+                query_text, index_name, st.session_state["selected_namespace"], top_k,
+                backend=local_index if use_local_index else None,
+                mmr_lambda=mmr_lambda if diversify else None)
+            for metadata in metadata_list:
+                metadata['namespace'] = st.session_state["selected_namespace"]
+        cache_stats = get_query_cache().stats()
+        st.caption(f"Query cache: {cache_stats['hit_rate']:.0%} hit rate "
+                   f"({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+
     retrieved_df = pd.DataFrame(metadata_list, index=chunk_ids)
     with st.expander("Retrieved Chunks"):
         st.dataframe(retrieved_df)
     context_list = [metadata_list[i]['chunk_text'] for i in range(len(chunk_ids))]
     pdf_folder = Path(r"C:\Users\johnk\Projects-code\LEARN\landing-ai\app_storage\original_files")
-    pdf_filepath = pdf_folder / f"{st.session_state['selected_namespace']}.pdf"
-    for chunk_id in chunk_ids:
-        with st.expander(f"Visualize {chunk_id}"):
-            st.image(viz_chunk_in_pdf_cached(
-                                index_name=index_name, 
-                                chunk_id=chunk_id, 
-                                namespace=st.session_state["selected_namespace"], 
-                                pdf_filepath=pdf_filepath,
-                                color=(0, 255, 0), 
-                                thickness=2))
+    for hit_namespace in dict.fromkeys(metadata['namespace'] for metadata in metadata_list):
+        pdf_filepath = pdf_folder / f"{hit_namespace}.pdf"
+        # Hits from other PDFs are blanked out so the drawn labels keep their global rank
+        namespace_hits = [metadata if metadata['namespace'] == hit_namespace else {}
+                          for metadata in metadata_list]
+        # One render per distinct page, with every hit on that page drawn and numbered by rank
+        annotated_pages = annotate_hits(pdf_filepath, namespace_hits, color=(0, 255, 0), thickness=2)
+        for page_number, page_img in annotated_pages.items():
+            ranks = [str(rank) for rank, metadata in enumerate(namespace_hits, start=1)
+                     if metadata.get('pdf_page') is not None and int(metadata['pdf_page']) == page_number]
+            with st.expander(f"{hit_namespace}, page {page_number + 1}: hits {', '.join(ranks)}"):
+                st.image(page_img)
             
     model_name = st.selectbox("Select a model", ["gpt-4o", "gpt-4o-mini"], index=0)
     if st.button("RAG Response", key="rag_response"):
+        # Clicking Stop reruns the script, which closes the response stream;
+        # the answer is collected in session state so the rerun can show it
+        answer = st.session_state["rag_answer"] = {"query": query_text, "text": "", "timings": {}}
+        st.button("Stop", key="stop_rag_response")
         try:
-            rag_response_text = rag_response(query_text, context_list, model_name=model_name)
-            st.markdown(rag_response_text)
+            scores = [metadata.get('_score') for metadata in metadata_list]
+            context_caption = st.empty()  # filled once the prompt has been packed
+
+            def collect(stream):
+                for delta in stream:
+                    answer["text"] += delta
+                    yield delta
+
+            st.write_stream(collect(rag_response_stream(
+                query_text, context_list, model_name=model_name, timings=answer["timings"],
+                chunk_ids=chunk_ids, scores=scores)))
+            show_answer_captions(answer["timings"], context_caption)
         except Exception as e:
             st.error(f"Error: {e}")
-            
-        
+    elif st.session_state.get("stop_rag_response") and \
+            st.session_state.get("rag_answer", {}).get("query") == query_text:
+        answer = st.session_state["rag_answer"]
+        st.markdown(answer["text"])
+        show_answer_captions(answer["timings"])
 
-    
+
+def metrics_panel():
+    """
+    Per-stage timings, payloads and cache hit rates of this process, shared
+    by all sessions. Drawn last so it includes the work of the current run.
+    """
+    metrics = get_metrics()
+    summary = metrics.summary()
+    st.subheader("Pipeline Metrics")
+    if not summary["stages"]:
+        st.info("No stages have run yet")
+        return
+    stage_df = pd.DataFrame.from_dict(summary["stages"], orient="index")
+    st.dataframe(stage_df[["count", "p50_ms", "p95_ms", "max_ms", "total_s", "errors", "items", "bytes"]])
+    if summary["caches"]:
+        st.caption("Cache hit rates")
+        st.dataframe(pd.DataFrame.from_dict(summary["caches"], orient="index")
+                     .style.format({"hit_rate": "{:.0%}"}))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Prometheus", metrics.to_prometheus(), file_name="metrics.prom",
+                           mime="text/plain")
+    with col2:
+        st.download_button("JSON", metrics.to_json(), file_name="metrics.json",
+                           mime="application/json")
+    with col3:
+        st.button("Reset", key="reset_metrics", on_click=metrics.reset)
+
+
+with st.sidebar:
+    metrics_panel()
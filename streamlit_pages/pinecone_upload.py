@@ -6,10 +6,16 @@ from typing import List, Dict, Any
 
 import streamlit as st
 import pandas as pd
-from pinecone import Pinecone
-from agentic_doc.parse import parse
 from utils.serialization import (extract_json_from_parsed_doc,
                                  parsed_doc_to_records)
+from utils.parse_cache import cached_parse, get_parse_cache
+from utils.sharded_parse import (DEFAULT_MAX_WORKERS,
+                                 DEFAULT_PAGES_PER_SHARD, sharded_parse)
+from utils.upsert import UpsertEngine
+from utils.clients import get_index, get_pinecone_client as get_shared_pinecone_client
+from utils.metadata_store import get_metadata_store
+from utils.bm25 import get_bm25_index
+from utils.vector_db import invalidate_cached_results
 
 # Initialize Pinecone client
 
@@ -20,7 +26,7 @@ def get_pinecone_client():
     if not api_key:
         st.error("PINECONE_API_KEY not found in environment variables")
         st.stop()
-    return Pinecone(api_key=api_key)
+    return get_shared_pinecone_client()
 
 
 pc = get_pinecone_client()
@@ -57,10 +63,26 @@ if uploaded_file is not None:
     col1, col2 = st.columns([2, 1])
 
     with col1:
+        use_sharding = st.checkbox(
+            "Sharded parse (large PDFs)",
+            value=False,
+            help="Split the PDF into page ranges and parse them concurrently")
+        if use_sharding:
+            pages_per_shard = st.number_input(
+                "Pages per shard", value=min(DEFAULT_PAGES_PER_SHARD, 50),
+                min_value=1, max_value=50)
+            max_workers = st.number_input(
+                "Parallel shards", value=min(DEFAULT_MAX_WORKERS, 16), min_value=1, max_value=16)
+
         if st.button("Parse PDF with agentic_doc", type="primary"):
             with st.spinner("Parsing document... This may take a few minutes."):
                 try:
-                    parsed_doc = parse(temp_file_path)
+                    if use_sharding:
+                        parsed_doc = sharded_parse(temp_file_path,
+                                                   pages_per_shard=pages_per_shard,
+                                                   max_workers=max_workers)
+                    else:
+                        parsed_doc = cached_parse(temp_file_path)
                     st.session_state.parsed_data = extract_json_from_parsed_doc(
                         parsed_doc)
                     st.write(st.session_state.parsed_data)
@@ -73,6 +95,10 @@ if uploaded_file is not None:
             st.info(f"📊 Parsing Results:")
             st.write(
                 f"- **Total chunks:** {len(st.session_state.parsed_data.get('chunks', []))}")
+        cache_stats = get_parse_cache().stats()
+        st.caption(f"Parse cache: {cache_stats['hits']} hits / "
+                   f"{cache_stats['misses']} misses "
+                   f"({cache_stats['size_bytes'] / 1024 / 1024:.1f} MB)")
 
     # Step 3: Prepare Records for Pinecone
     if st.session_state.parsed_data:
@@ -124,7 +150,7 @@ with col1:
 
                 # Show index stats
                 if st.button("Show Index Stats"):
-                    index = pc.Index(selected_index)
+                    index = get_index(selected_index)
                     stats = index.describe_index_stats()
                     st.write(stats)
         else:
@@ -190,7 +216,7 @@ if st.session_state.selected_index and st.session_state.parsed_records:
     with col2:
         # Show existing namespaces
         try:
-            index = pc.Index(st.session_state.selected_index)
+            index = get_index(st.session_state.selected_index)
             stats = index.describe_index_stats()
             existing_namespaces = list(stats.get('namespaces', {}).keys())
 
@@ -219,28 +245,33 @@ if st.session_state.selected_index and st.session_state.parsed_records:
         if st.button("🚀 Upload to Pinecone", type="primary"):
             try:
                 with st.spinner("Uploading to Pinecone..."):
-                    index = pc.Index(st.session_state.selected_index)
-
-                    # Upload records in batches (Pinecone limit is 96)
-                    batch_size = 10  # Stay under the 96 limit
+                    index = get_index(st.session_state.selected_index)
                     records = st.session_state.parsed_records
 
                     progress_bar = st.progress(0)
 
-                    for i in range(0, len(records), batch_size):
-                        batch = records[i:i + batch_size]
-
-                        # Upload batch
-                        index.upsert_records(namespace, batch)
-
-                        # Update progress
-                        progress = min((i + batch_size) / len(records), 1.0)
-                        progress_bar.progress(progress)
+                    # Batches of up to 96 records (Pinecone limit), several in flight
+                    engine = UpsertEngine(index, max_workers=8,
+                                          metadata_store=get_metadata_store(),
+                                          on_upsert=invalidate_cached_results)
+                    report = engine.upsert(
+                        namespace, records,
+                        progress_fn=lambda done, total: progress_bar.progress(
+                            done / total if total else 1.0))
 
                     progress_bar.progress(1.0)
-                    st.success(
-                        f"✅ Successfully uploaded {len(records)} records to Pinecone!")
-                    st.balloons()
+                    if report.failed_batches:
+                        st.error(
+                            f"❌ {report.failed_batches} batches failed: {report.errors[0]}")
+                    else:
+                        # Keep the keyword index of hybrid search in step with Pinecone
+                        bm25_index = get_bm25_index()
+                        bm25_index.add_records(namespace, records)
+                        bm25_index.save()
+                        st.success(
+                            f"✅ Successfully uploaded {report.records} records to Pinecone!")
+                        st.balloons()
+                    st.write(report.summary())
 
             except Exception as e:
                 st.error(f"❌ Error uploading to Pinecone: {str(e)}")
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+# The utils package creates a Pinecone client on import; any key works, no
+# requests are made.
+os.environ.setdefault("PINECONE_API_KEY", "test")
+
+
+def make_chunk(chunk_id, text, page=0, box=(0.1, 0.1, 0.5, 0.2), chunk_type="text", extra=()):
+    """
+    A Chunk with one grounding box, plus one more per (page, box) in `extra`.
+    """
+    from agentic_doc.common import Chunk, ChunkGrounding, ChunkGroundingBox
+
+    groundings = [ChunkGrounding(page=p, box=ChunkGroundingBox(l=b[0], t=b[1], r=b[2], b=b[3]))
+                  for p, b in [(page, box), *extra]]
+    return Chunk(text=text, grounding=groundings, chunk_type=chunk_type, chunk_id=chunk_id)
+
+
+@pytest.fixture
+def parsed_doc():
+    """
+    A small parsed document in the shape `parse()` returns: three pages,
+    text, table and figure chunks, one chunk spanning two pages.
+    """
+    from agentic_doc.common import ParsedDocument
+
+    chunks = [
+        make_chunk("title", "Schottky barrier height of CdZnTe", 0, (0.1, 0.05, 0.9, 0.1)),
+        make_chunk("intro", "We measure the barrier with I-V curves.", 0, (0.1, 0.2, 0.9, 0.4)),
+        make_chunk("table", "| sample | height |", 1, (0.1, 0.1, 0.9, 0.5), "table"),
+        make_chunk("figure", "Band diagram", 1, (0.2, 0.45, 0.6, 0.8), "figure"),
+        make_chunk("spans", "Results continue on the next page.", 1, (0.1, 0.85, 0.9, 0.95),
+                   extra=[(2, (0.1, 0.05, 0.9, 0.2))]),
+    ]
+    return [ParsedDocument(markdown="# Paper", chunks=chunks, start_page_idx=0, end_page_idx=2,
+                           doc_type="pdf", result_path=None, errors=[])]
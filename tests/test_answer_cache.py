@@ -0,0 +1,80 @@
+import threading
+import time
+
+from utils.answer_cache import AnswerCache, make_answer_key
+
+
+def test_key_covers_everything_that_shapes_the_answer():
+    key = make_answer_key("v1", ["a", "b"], "What is TeO2?", "gpt-4o-mini", 0.1)
+    assert key == make_answer_key("v1", ["a", "b"], "  what is teo2? ", "gpt-4o-mini", 0.1)
+    assert key != make_answer_key("v2", ["a", "b"], "What is TeO2?", "gpt-4o-mini", 0.1)
+    assert key != make_answer_key("v1", ["b", "a"], "What is TeO2?", "gpt-4o-mini", 0.1)
+    assert key != make_answer_key("v1", ["a", "b"], "What is TeO2?", "gpt-4o", 0.1)
+    assert key != make_answer_key("v1", ["a", "b"], "What is TeO2?", "gpt-4o-mini", 0.2)
+
+
+def test_put_get_and_saved_latency(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+    assert cache.get("k") is None
+    cache.put("k", "answer", ["a", "b"], latency=1.5)
+    assert cache.get("k") == "answer"
+    assert cache.get("k") == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["saved_seconds"] == 3.0
+
+
+def test_survives_reopening(tmp_path):
+    AnswerCache(tmp_path / "answers.sqlite").put("k", "answer", ["a"], latency=1.0)
+    assert AnswerCache(tmp_path / "answers.sqlite").get("k") == "answer"
+
+
+def test_invalidate_chunks(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+    cache.put("ab", "1", ["a", "b"], 1.0)
+    cache.put("bc", "2", ["b", "c"], 1.0)
+    cache.put("d", "3", ["d"], 1.0)
+    assert cache.invalidate_chunks(["b"]) == 2
+    assert cache.get("ab") is None
+    assert cache.get("bc") is None
+    assert cache.get("d") == "3"
+    assert cache.invalidate_chunks([f"x{i}" for i in range(2000)]) == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", max_entries=2)
+    cache.put("old", "1", ["a"], 1.0)
+    cache.put("used", "2", ["a"], 1.0)
+    time.sleep(0.01)
+    cache.get("old")
+    cache.put("new", "3", ["a"], 1.0)
+    assert cache.get("used") is None
+    assert cache.get("old") == "1"
+    assert cache.get("new") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", ttl=0.05)
+    cache.put("k", "answer", ["a"], 1.0)
+    assert cache.get("k") == "answer"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_concurrent_use(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+
+    def work(worker):
+        for i in range(50):
+            cache.put(f"{worker}-{i}", "answer", [f"chunk-{i}"], 0.1)
+            cache.get(f"{worker}-{i}")
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 200
+    assert cache.stats()["hits"] == 200
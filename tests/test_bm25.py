@@ -0,0 +1,81 @@
+import pytest
+
+from utils.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def records(*texts, prefix="c", **fields):
+    return [{"_id": f"{prefix}{i}", "chunk_text": text, **fields} for i, text in enumerate(texts)]
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.add_records("a", records("Schottky barrier of Cd-Zn-Te detectors",
+                                   "Leakage current and barrier height",
+                                   "Crystal growth by the Bridgman method", prefix="a", pdf_page=1))
+    index.add_records("b", records("TeO2 passivation lowers leakage current",
+                                   "Unrelated acknowledgements", prefix="b", pdf_page=2))
+    return index
+
+
+def test_tokenize_keeps_compound_terms():
+    assert tokenize("Cd-Zn-Te, 1.5 eV") == ["cd-zn-te", "cd", "zn", "te", "1.5", "1", "5", "ev"]
+
+
+def test_search_ranks_and_filters(index):
+    hits = index.search("barrier height", top_k=3)
+    assert [hit["_id"] for hit in hits] == ["a1", "a0"]
+    assert hits[0]["_score"] > hits[1]["_score"]
+    assert hits[0]["fields"]["namespace"] == "a"
+
+    assert [hit["_id"] for hit in index.search("zn")] == ["a0"]
+    assert [hit["_id"] for hit in index.search("leakage", namespace="b")] == ["b0"]
+    assert {hit["_id"] for hit in index.search("leakage", namespace=["a", "b"], top_k=5)} == {"a1", "b0"}
+    assert [hit["_id"] for hit in index.search("leakage", filter={"pdf_page": 2})] == ["b0"]
+    assert index.search("nothing matches") == []
+
+
+def test_reindexing_a_namespace_replaces_it(index):
+    index.add_records("a", records("Only new text", prefix="a"))
+    assert index.namespaces() == ["a", "b"]
+    assert len(index) == 3
+    assert index.search("barrier") == []
+    assert [hit["_id"] for hit in index.search("new")] == ["a0"]
+    index.remove_namespace("b")
+    assert index.namespaces() == ["a"]
+    assert index.search("leakage") == []
+
+
+def test_compaction_matches_a_fresh_index(index):
+    filler = records("filler text about leakage", "more filler", prefix="c")
+    for _ in range(3):
+        index.add_records("c", filler)
+    assert len(index.ids) == len(index)  # the replaced rows were compacted away
+
+    fresh = BM25Index()
+    for namespace in ("a", "b", "c"):
+        fresh.add_records(namespace, [{"_id": chunk_id, **fields} for chunk_id, fields, ns
+                                      in zip(index.ids, index.fields, index.namespaces_of)
+                                      if ns == namespace])
+    assert index.search("leakage current", top_k=5) == fresh.search("leakage current", top_k=5)
+
+
+def test_save_and_load(tmp_path, index):
+    path = index.save(tmp_path / "bm25.pkl")
+    loaded = BM25Index.load(path)
+    assert loaded.namespaces() == index.namespaces()
+    assert loaded.search("barrier", top_k=5) == index.search("barrier", top_k=5)
+
+
+def test_reciprocal_rank_fusion():
+    dense = [{"_id": "x", "_score": 0.9, "fields": {"source": "dense"}},
+             {"_id": "y", "_score": 0.8, "fields": {"source": "dense"}}]
+    sparse = [{"_id": "y", "_score": 12.0, "fields": {"source": "sparse"}},
+              {"_id": "z", "_score": 3.0, "fields": {"source": "sparse"}}]
+    fused = reciprocal_rank_fusion([dense, sparse], k=60)
+    assert [hit["_id"] for hit in fused] == ["y", "x", "z"]
+    assert fused[0]["_score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[0]["fields"] == {"source": "dense"}
+
+    weighted = reciprocal_rank_fusion([dense, sparse], weights=[1.0, 0.0], top_k=2)
+    assert [hit["_id"] for hit in weighted] == ["x", "y"]
@@ -0,0 +1,39 @@
+import pytest
+
+from utils.chunk_store import (load_chunks, load_doc_metadata, load_parsed_doc,
+                               save_chunk_store)
+
+
+def test_round_trip(tmp_path, parsed_doc):
+    path = save_chunk_store(parsed_doc, tmp_path, "paper.pdf")
+    assert path.name == "paper.parquet"
+    loaded = load_parsed_doc(path)
+    for chunk, original in zip(loaded[0].chunks, parsed_doc[0].chunks, strict=True):
+        assert (chunk.chunk_id, chunk.chunk_type, chunk.text) == \
+            (original.chunk_id, original.chunk_type, original.text)
+        assert [g.page for g in chunk.grounding] == [g.page for g in original.grounding]
+        # Boxes are stored as float32
+        assert [v for g in chunk.grounding for v in (g.box.l, g.box.t, g.box.r, g.box.b)] == \
+            pytest.approx([v for g in original.grounding for v in (g.box.l, g.box.t, g.box.r, g.box.b)])
+    assert loaded[0].markdown == parsed_doc[0].markdown
+    assert load_doc_metadata(path)["num_chunks"] == len(parsed_doc[0].chunks)
+
+
+def test_one_row_per_grounding_box(tmp_path, parsed_doc):
+    path = save_chunk_store(parsed_doc, tmp_path, "paper.pdf")
+    table = load_chunks(path)
+    assert table.num_rows == sum(len(chunk.grounding) for chunk in parsed_doc[0].chunks)
+    assert table["page"].to_pylist() == sorted(table["page"].to_pylist())
+
+
+def test_filters_and_columns(tmp_path, parsed_doc):
+    path = save_chunk_store(parsed_doc, tmp_path, "paper.pdf", row_group_size=2)
+    page_two = load_chunks(path, pages=[2], columns=["chunk_id", "grounding_idx"])
+    assert page_two.column_names == ["chunk_id", "grounding_idx"]
+    assert page_two.to_pylist() == [{"chunk_id": "spans", "grounding_idx": 1}]
+
+    tables = load_chunks(path, chunk_types=["table", "figure"], columns=["chunk_id"])
+    assert sorted(tables["chunk_id"].to_pylist()) == ["figure", "table"]
+
+    by_id = load_chunks(path, pages=[1], chunk_ids=["spans", "title"], columns=["chunk_id"])
+    assert by_id["chunk_id"].to_pylist() == ["spans"]
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import clients
+from utils.clients import ConnectionStats
+
+
+@pytest.fixture
+def fresh_clients(monkeypatch):
+    for name in ("_http_client", "_openai_client", "_pinecone_client"):
+        monkeypatch.setattr(clients, name, None)
+    monkeypatch.setattr(clients, "_indexes", {})
+    yield
+    if clients._http_client is not None:
+        clients._http_client.close()
+
+
+class Stream:
+    pass
+
+
+def test_connection_stats_counts_new_streams():
+    stats = ConnectionStats()
+    first, second = Stream(), Stream()
+    for stream in (first, first, second, None):
+        stats.record(SimpleNamespace(extensions={"network_stream": stream}))
+    assert stats.stats() == {"requests": 4, "connections": 2, "reuse_rate": 0.5}
+    assert ConnectionStats().stats()["reuse_rate"] == 0.0
+
+
+def test_sync_clients_are_shared(fresh_clients, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(clients.get_openai_client()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in results}) == 1
+    assert clients.get_http_client() is clients.get_http_client()
+    assert clients.get_pinecone_client() is clients.get_pinecone_client()
+
+
+def test_async_client_per_event_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    async def two_lookups():
+        return clients.get_async_openai_client(), clients.get_async_openai_client()
+
+    first, again = asyncio.run(two_lookups())
+    other, _ = asyncio.run(two_lookups())
+    assert first is again
+    assert first is not other
+
+
+def fake_index(pools):
+    pool_manager = SimpleNamespace(pools=pools)
+    return SimpleNamespace(_vector_api=SimpleNamespace(
+        api_client=SimpleNamespace(rest_client=SimpleNamespace(pool_manager=pool_manager))))
+
+
+def test_get_index_caches_handles(fresh_clients, monkeypatch):
+    created = []
+    pc = SimpleNamespace(Index=lambda name: created.append(name) or fake_index({}))
+    monkeypatch.setattr(clients, "_pinecone_client", pc)
+    assert clients.get_index("a") is clients.get_index("a")
+    assert clients.get_index("b") is not clients.get_index("a")
+    assert created == ["a", "b"]
+
+
+def test_pinecone_connection_stats(fresh_clients, monkeypatch):
+    pool = SimpleNamespace(num_requests=10, num_connections=2)
+    monkeypatch.setattr(clients, "_indexes", {"a": fake_index({"host": pool}),
+                                              "b": fake_index({"host": None})})
+    assert clients.pinecone_connection_stats() == {
+        "requests": 10, "connections": 2, "reuse_rate": pytest.approx(0.8)}
+
+
+def test_pinecone_connection_stats_without_pools(fresh_clients, monkeypatch):
+    assert clients.pinecone_connection_stats()["requests"] == 0
+    monkeypatch.setattr(clients, "_indexes", {"a": SimpleNamespace(_vector_api=None)})
+    assert clients.pinecone_connection_stats() == {}
+    assert clients.connection_stats()["pinecone"] == {}
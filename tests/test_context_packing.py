@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+from utils import context_packing
+from utils.context_packing import count_tokens, pack_contexts
+
+
+def test_drops_exact_and_near_duplicates():
+    base = "the schottky barrier height was measured with current voltage curves at room temperature"
+    contexts = [base, base.upper() + "  ", base + " again", "an unrelated chunk about detector geometry"]
+    packed = pack_contexts(contexts, chunk_ids=["a", "b", "c", "d"], scores=[0.9, 0.8, 0.7, 0.6])
+    assert packed.chunk_ids == ["a", "d"]
+    assert packed.dropped == {"b": "duplicate", "c": "near duplicate"}
+
+
+def test_keeps_everything_that_fits_in_score_order():
+    packed = pack_contexts(["one", "two", "three"], chunk_ids=["1", "2", "3"], scores=[0.2, 0.9, 0.5])
+    assert packed.chunk_ids == ["2", "3", "1"]
+    assert packed.scores == [0.9, 0.5, 0.2]
+    assert packed.tokens == sum(count_tokens(text) for text in ["one", "two", "three"])
+    assert packed.text() == "[1] two\n\n---\n\n[2] three\n\n---\n\n[3] one"
+
+
+def test_budget_prefers_score_per_token():
+    long_context = " ".join(f"word{i}" for i in range(200))
+    short_contexts = [f"short relevant fact number {i}" for i in range(3)]
+    budget = sum(count_tokens(text) for text in short_contexts)
+    packed = pack_contexts([long_context, *short_contexts], chunk_ids=["long", "s0", "s1", "s2"],
+                           scores=[1.0, 0.9, 0.8, 0.7], token_budget=budget)
+    assert packed.chunk_ids == ["s0", "s1", "s2"]
+    assert packed.dropped == {"long": "over budget"}
+    assert packed.tokens <= budget
+
+
+def test_default_ids_and_scores():
+    packed = pack_contexts(["first context", "second context"], scores=[None, None])
+    assert packed.chunk_ids == ["0", "1"]
+    assert packed.scores == [1.0, 0.5]
+
+
+@pytest.fixture
+def fresh_encoding_cache():
+    context_packing._encoding.cache_clear()
+    yield
+    context_packing._encoding.cache_clear()
+
+
+def test_counts_with_the_tokenizer(monkeypatch, fresh_encoding_cache):
+    class Encoding:
+        def encode(self, text):
+            return text.split()
+
+    monkeypatch.setattr(context_packing.tiktoken, "encoding_for_model", lambda model: Encoding())
+    assert count_tokens("one two three four", "gpt-4o-mini") == 4
+
+
+def test_fallback_warns_once(monkeypatch, caplog, fresh_encoding_cache):
+    def unavailable(name):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(context_packing.tiktoken, "encoding_for_model", unavailable)
+    with caplog.at_level(logging.WARNING, logger="utils.context_packing"):
+        assert count_tokens("Schottky barrier, 1.5 eV", "gpt-4o-mini") == 9
+        count_tokens("again", "gpt-4o-mini")
+    assert len(caplog.records) == 1
+    assert "approximate count" in caplog.messages[0]
@@ -0,0 +1,47 @@
+import gc
+
+from conftest import make_chunk
+from utils.doc_index import ParsedDocIndex, get_doc_index
+
+
+def test_views(parsed_doc):
+    doc_index = ParsedDocIndex(parsed_doc)
+    assert len(doc_index) == 5
+    assert "table" in doc_index
+    assert doc_index.get("missing") is None
+    assert doc_index.pages() == [0, 1, 2]
+    assert [chunk.chunk_id for chunk in doc_index.chunks_on_page(1)] == ["table", "figure", "spans"]
+    assert [chunk.chunk_id for chunk in doc_index.chunks_on_page(2)] == ["spans"]
+    assert doc_index.chunks_on_page(7) == []
+    assert doc_index.ids_of_type("text").tolist() == ["title", "intro", "spans"]
+    assert doc_index.ids_of_type("marginalia").tolist() == []
+
+
+def test_spatial_lookups(parsed_doc):
+    doc_index = ParsedDocIndex(parsed_doc)
+    assert [chunk.chunk_id for chunk in doc_index.chunks_at(1, 0.3, 0.47)] == ["table", "figure"]
+    assert doc_index.chunks_at(0, 0.05, 0.05) == []
+    assert doc_index.chunks_at(5, 0.5, 0.5) == []
+    hits = doc_index.chunks_in_rect(1, 0.0, 0.6, 1.0, 1.0)
+    assert sorted(chunk.chunk_id for chunk in hits) == ["figure", "spans"]
+
+
+def test_get_doc_index_is_cached_per_document(parsed_doc):
+    doc_index = get_doc_index(parsed_doc)
+    assert get_doc_index(parsed_doc[0]) is doc_index
+
+    parsed_doc[0].chunks.append(make_chunk("new", "Added later", 2))
+    rebuilt = get_doc_index(parsed_doc)
+    assert rebuilt is not doc_index
+    assert "new" in rebuilt
+
+
+def test_index_is_dropped_with_the_document(parsed_doc):
+    from utils import doc_index as doc_index_module
+
+    get_doc_index(parsed_doc)
+    doc_id = id(parsed_doc[0])
+    assert doc_id in doc_index_module._indexes
+    parsed_doc.clear()
+    gc.collect()
+    assert doc_id not in doc_index_module._indexes
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from utils import ingestion
+from utils.ingestion import IngestManifest, document_name, ingest_directory
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    root = tmp_path / "pdfs"
+    for relative in ("report.pdf", "a/report.pdf", "b/report.pdf"):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF-1.4 " + relative.encode())
+    return root
+
+
+@pytest.fixture
+def output_dirs(tmp_path):
+    return {"json_dir": tmp_path / "json", "pickle_dir": tmp_path / "pkl",
+            "records_dir": tmp_path / "records"}
+
+
+def failed_parse():
+    from agentic_doc.common import PageError, ParsedDocument
+
+    return [ParsedDocument(markdown="", chunks=[], start_page_idx=0, end_page_idx=0,
+                           doc_type="pdf", result_path=None,
+                           errors=[PageError(page_num=0, error="timeout", error_code=-1)])]
+
+
+def test_document_name(tmp_path):
+    assert document_name(tmp_path / "report.pdf") == "report"
+    assert document_name(tmp_path / "report.pdf", tmp_path) == "report"
+    nested = {document_name(tmp_path / d / "report.pdf", tmp_path) for d in ("a", "b", "a/b")}
+    assert len(nested) == 3
+    assert all(name.startswith("report-") for name in nested)
+    assert document_name(tmp_path / "a" / "report.pdf", tmp_path) == \
+        document_name(tmp_path / "a" / "report.pdf", str(tmp_path))
+
+
+def test_manifest_resume(tmp_path, input_dir):
+    path = tmp_path / "manifest.jsonl"
+    pdf = input_dir / "report.pdf"
+    manifest = IngestManifest(path)
+    manifest.record(pdf, "done", upserted=False)
+    manifest.record(input_dir / "a" / "report.pdf", "failed", error="boom")
+    with open(path, "a") as f:
+        f.write('{"file": "torn')  # crash in the middle of a line
+
+    reloaded = IngestManifest(path)
+    assert reloaded.is_done(pdf)
+    assert not reloaded.is_done(pdf, require_upsert=True)
+    assert not reloaded.is_done(input_dir / "a" / "report.pdf")
+    assert not reloaded.is_done(input_dir / "b" / "report.pdf")
+
+    stat = os.stat(pdf)
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not reloaded.is_done(pdf)
+
+
+def test_ingest_directory_skips_done_and_retries_failed(monkeypatch, tmp_path, input_dir,
+                                                        output_dirs, parsed_doc):
+    failing = {str(input_dir / "a" / "report.pdf")}
+    parsed = []
+
+    def fake_parse(file_path):
+        parsed.append(file_path)
+        return failed_parse() if file_path in failing else parsed_doc
+
+    monkeypatch.setattr(ingestion, "cached_parse", fake_parse)
+    upserts = {}
+    manifest_path = tmp_path / "manifest.jsonl"
+    run = dict(manifest_path=manifest_path, progress_fn=lambda message: None,
+               upsert_fn=lambda namespace, records: upserts.update({namespace: records}),
+               **output_dirs)
+
+    summary = ingest_directory(input_dir, concurrency=2, **run)
+    assert summary == {"done": 2, "failed": 1, "skipped": 0}
+    assert len(upserts) == 2 and "report" in upserts
+    assert len(list(output_dirs["json_dir"].glob("*.json"))) == 2
+    entry = IngestManifest(manifest_path).entries[str(input_dir / "a" / "report.pdf")]
+    assert entry["status"] == "failed"
+    assert "timeout" in entry["error"]
+
+    failing.clear()
+    parsed.clear()
+    summary = ingest_directory(input_dir, concurrency=2, **run)
+    assert summary == {"done": 1, "failed": 0, "skipped": 2}
+    assert parsed == [str(input_dir / "a" / "report.pdf")]
+    assert len(upserts) == 3
+
+
+def test_empty_parse_is_a_failure(monkeypatch, tmp_path, input_dir, output_dirs, parsed_doc):
+    empty = [parsed_doc[0].model_copy(update={"chunks": []})]
+    monkeypatch.setattr(ingestion, "cached_parse", lambda file_path: empty)
+    with pytest.raises(RuntimeError, match="no chunks"):
+        ingestion.ingest_file(input_dir / "report.pdf", **output_dirs)
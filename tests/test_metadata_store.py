@@ -0,0 +1,59 @@
+import threading
+
+from utils.metadata_store import MetadataStore
+
+
+def make_records(n, namespace="paper"):
+    return [{"_id": f"{namespace}-{i}", "pdf_filename": f"{namespace}.pdf", "pdf_page": i % 4,
+             "chunk_type": "text", "box": {"l": 0.1, "t": 0.2, "r": 0.3, "b": 0.4},
+             "chunk_text": f"chunk {i}"} for i in range(n)]
+
+
+def test_put_and_get(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    assert store.put_records("paper", make_records(3)) == 3
+    assert store.get("paper", "paper-1") == {
+        "pdf_filename": "paper.pdf", "pdf_page": 1, "chunk_type": "text",
+        "box": '{"l": 0.1, "t": 0.2, "r": 0.3, "b": 0.4}', "chunk_text": "chunk 1"}
+    assert store.get("other", "paper-1") is None
+    assert store.count("paper") == 3
+
+
+def test_get_many_in_batches(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    store.put_records("paper", make_records(2000))
+    ids = [f"paper-{i}" for i in range(0, 2000, 2)] + ["missing"]
+    found = store.get_many("paper", ids)
+    assert len(found) == 1000
+    assert found["paper-1998"]["chunk_text"] == "chunk 1998"
+
+
+def test_upsert_replaces_rows(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    store.put_records("paper", make_records(2))
+    store.put_records("paper", [{"_id": "paper-0", "chunk_text": "new text", "box": '{"l": 0}'}])
+    assert store.count("paper") == 2
+    assert store.get("paper", "paper-0")["chunk_text"] == "new text"
+    assert store.get("paper", "paper-0")["box"] == '{"l": 0}'
+
+
+def test_delete(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    store.put_records("a", make_records(5, "a"))
+    store.put_records("b", make_records(5, "b"))
+    store.delete("a", ["a-0", "a-1"])
+    assert store.count("a") == 3
+    store.delete("a")
+    assert store.count("a") == 0
+    assert store.count("b") == 5
+
+
+def test_concurrent_writers(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    threads = [threading.Thread(target=store.put_records, args=(f"ns{i}", make_records(200, f"ns{i}")))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [store.count(f"ns{i}") for i in range(8)] == [200] * 8
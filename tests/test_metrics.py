@@ -0,0 +1,118 @@
+import json
+import re
+
+import pytest
+
+from utils import metrics
+from utils.metrics import DURATION_BUCKETS, MetricsRegistry, Span, span
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse_exposition(text):
+    """Map (metric name, frozenset of label pairs) to the sample value."""
+    samples = {}
+    types = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE"):
+            _, _, name, kind = line.split()
+            types[name] = kind
+            continue
+        if line.startswith("#") or not line:
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        pairs = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[name, pairs] = float(value)
+    return samples, types
+
+
+def record(registry, stage, duration, error=None, **attributes):
+    item = Span(stage, **attributes)
+    item.duration = duration
+    item.error = error
+    registry.record(item)
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    for duration in (0.002, 0.02, 0.02, 0.3, 100.0):
+        record(registry, "search", duration, items=2, bytes=10)
+    record(registry, "search", 0.004, error="TimeoutError")
+    record(registry, "parse", 1.5, cache_hit=True)
+    record(registry, "parse", 2.0, cache_hit=False)
+    registry.record_cache("answer", True)
+    registry.record_cache("answer", True)
+    registry.record_cache("answer", False)
+    return registry
+
+
+def test_prometheus_histogram(registry):
+    samples, types = parse_exposition(registry.to_prometheus(prefix="t"))
+    assert types["t_stage_duration_seconds"] == "histogram"
+
+    def bucket(le):
+        return samples["t_stage_duration_seconds_bucket", frozenset({("stage", "search"), ("le", le)})]
+
+    bounds = [str(bound) for bound in DURATION_BUCKETS]
+    counts = [bucket(le) for le in bounds]
+    assert counts == sorted(counts)  # cumulative
+    assert bucket("0.001") == 0
+    assert bucket("0.005") == 2
+    assert bucket("0.025") == 4
+    assert bucket("0.5") == 5
+    assert bucket("60.0") == 5  # 100 s only lands in +Inf
+    assert bucket("+Inf") == 6
+    stage = frozenset({("stage", "search")})
+    assert samples["t_stage_duration_seconds_count", stage] == 6
+    assert samples["t_stage_duration_seconds_sum", stage] == pytest.approx(100.346)
+
+
+def test_prometheus_counters(registry):
+    samples, types = parse_exposition(registry.to_prometheus(prefix="t"))
+    search = frozenset({("stage", "search")})
+    assert samples["t_stage_errors_total", search] == 1
+    assert samples["t_stage_payload_items_total", search] == 10
+    assert samples["t_stage_payload_bytes_total", search] == 50
+    assert types["t_cache_lookups_total"] == "counter"
+
+    def lookups(cache, result):
+        return samples["t_cache_lookups_total", frozenset({("cache", cache), ("result", result)})]
+
+    assert (lookups("answer", "hit"), lookups("answer", "miss")) == (2, 1)
+    assert (lookups("parse", "hit"), lookups("parse", "miss")) == (1, 1)
+
+
+def test_prometheus_escapes_labels():
+    registry = MetricsRegistry()
+    record(registry, 'odd "stage"\n', 0.1)
+    samples, _ = parse_exposition(registry.to_prometheus(prefix="t"))
+    assert samples["t_stage_duration_seconds_count",
+                   frozenset({("stage", 'odd \\"stage\\"\\n')})] == 1
+
+
+def test_summary(registry):
+    summary = registry.summary()
+    search = summary["stages"]["search"]
+    assert (search["count"], search["errors"], search["items"], search["bytes"]) == (6, 1, 10, 50)
+    assert search["p50_ms"] == 20.0
+    assert search["max_ms"] == 100000.0
+    assert search["mean_ms"] == pytest.approx(100346 / 6, abs=1e-3)
+    assert summary["caches"]["answer"] == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+    assert summary["caches"]["parse"]["hit_rate"] == 0.5
+    assert json.loads(registry.to_json())["recent_spans"][0]["stage"] == "search"
+
+
+def test_span_records_parent_and_error(monkeypatch, tmp_path):
+    registry = MetricsRegistry(json_log_path=tmp_path / "spans.jsonl")
+    monkeypatch.setattr(metrics, "get_metrics", lambda: registry)
+    with pytest.raises(ValueError):
+        with span("outer"):
+            with span("inner") as inner:
+                inner.set(items=3)
+            raise ValueError
+    registry.set_json_log(None)
+    logged = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    assert [(entry["stage"], entry["parent"], entry["error"]) for entry in logged] == \
+        [("inner", "outer", None), ("outer", None, "ValueError")]
+    assert logged[0]["items"] == 3
@@ -0,0 +1,57 @@
+import numpy as np
+
+from utils.mmr import mmr_rerank, mmr_select
+
+
+def reference_mmr(query, candidates, k, lambda_mult):
+    """Straightforward MMR, recomputing every similarity at every step."""
+    def cosine(a, b):
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    picked = []
+    while len(picked) < min(k, len(candidates)):
+        best, best_score = None, -np.inf
+        for i, candidate in enumerate(candidates):
+            if i in picked:
+                continue
+            redundancy = max((cosine(candidate, candidates[j]) for j in picked), default=0.0)
+            score = lambda_mult * cosine(query, candidate) - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        picked.append(best)
+    return picked
+
+
+def test_matches_reference():
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(16)
+    candidates = rng.standard_normal((40, 16))
+    # lambda 0 ties on the first pick, which mmr_select breaks by relevance
+    for lambda_mult in (0.1, 0.3, 0.7):
+        assert mmr_select(query, candidates, 10, lambda_mult) == \
+            reference_mmr(query, candidates, 10, lambda_mult)
+
+
+def test_lambda_one_is_relevance_order():
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(8)
+    candidates = rng.standard_normal((20, 8))
+    relevance = candidates @ query / np.linalg.norm(candidates, axis=1)
+    assert mmr_select(query, candidates, 5, lambda_mult=1.0) == list(np.argsort(-relevance)[:5])
+
+
+def test_skips_near_duplicates():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[1.0, 0.1], [1.0, 0.11], [0.6, -0.8]])
+    assert mmr_select(query, candidates, 2, lambda_mult=0.5) == [0, 2]
+
+
+def test_edge_cases():
+    assert mmr_select(np.ones(3), np.empty((0, 3)), 5) == []
+    assert len(mmr_select(np.ones(3), np.eye(3), 10)) == 3
+
+
+def test_mmr_rerank_returns_hits():
+    hits = [{"_id": "a"}, {"_id": "b"}, {"_id": "c"}]
+    vectors = np.array([[1.0, 0.1], [1.0, 0.11], [0.6, -0.8]])
+    assert mmr_rerank(hits, [1.0, 0.0], vectors, 2) == [hits[0], hits[2]]
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pymupdf
+import pytest
+
+from utils.page_render import DiskPageCache, PageRenderer
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    doc = pymupdf.open()
+    for number in range(3):
+        page = doc.new_page(width=200, height=100)
+        page.insert_text((20, 50), f"page {number}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_render_page_matches_pymupdf(pdf_path):
+    img = PageRenderer().render_page(pdf_path, 1)
+    with pymupdf.open(pdf_path) as doc:
+        pix = doc[1].get_pixmap(alpha=False)
+    expected = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    np.testing.assert_array_equal(img, expected)
+    assert not img.flags.writeable
+
+
+def test_memory_cache_hits_and_byte_bound(pdf_path):
+    renderer = PageRenderer()
+    first = renderer.render_page(pdf_path, 0)
+    assert renderer.render_page(pdf_path, 0) is first
+    assert renderer.stats()["hits"] == 1
+    assert renderer.stats()["misses"] == 1
+
+    small = PageRenderer(max_bytes=first.nbytes)
+    for number in range(3):
+        small.render_page(pdf_path, number)
+    assert small.stats()["cached_pages"] == 1
+    assert small.stats()["cached_bytes"] <= first.nbytes
+
+
+def test_rerenders_after_file_changes(pdf_path):
+    renderer = PageRenderer()
+    renderer.render_page(pdf_path, 0)
+    with pymupdf.open(pdf_path) as doc:
+        doc[0].insert_text((20, 80), "changed")
+        doc.saveIncr()
+    renderer.render_page(pdf_path, 0)
+    assert renderer.stats()["misses"] == 2
+
+
+def test_disk_cache_is_shared_between_renderers(tmp_path, pdf_path):
+    disk_cache = DiskPageCache(tmp_path / "pages")
+    img = PageRenderer(disk_cache=disk_cache).render_page(pdf_path, 2)
+    other = PageRenderer(disk_cache=disk_cache)
+    cached = other.render_page(pdf_path, 2)
+    assert other.stats()["disk_hits"] == 1
+    assert other.stats()["misses"] == 0
+    np.testing.assert_array_equal(cached, img)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    img = np.zeros((10, 10, 3), dtype=np.uint8)
+    disk_cache = DiskPageCache(tmp_path / "pages")
+    entry_bytes = os.path.getsize(disk_cache.put(("h", 0, 72), img))
+    disk_cache.max_bytes = 3 * entry_bytes
+    for number in range(1, 3):
+        os.utime(disk_cache.put(("h", number, 72), img), (number, number))
+    os.utime(disk_cache._path(("h", 0, 72)), (0, 0))
+    assert disk_cache.get(("h", 1, 72)) is not None  # refreshes page 1
+
+    disk_cache.put(("h", 3, 72), img)
+    assert disk_cache.get(("h", 0, 72)) is None
+    assert disk_cache.get(("h", 2, 72)) is None
+    assert disk_cache.get(("h", 1, 72)) is not None
+    assert disk_cache.size_bytes() <= disk_cache.max_bytes
+
+
+def test_disk_cache_counts_existing_files(tmp_path):
+    img = np.zeros((10, 10, 3), dtype=np.uint8)
+    first = DiskPageCache(tmp_path / "pages")
+    for number in range(4):
+        first.put(("h", number, 72), img)
+    entry_bytes = first.size_bytes() // 4
+
+    second = DiskPageCache(tmp_path / "pages", max_bytes=4 * entry_bytes)
+    second.put(("h", 4, 72), img)
+    assert second.size_bytes() <= second.max_bytes
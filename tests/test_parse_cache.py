@@ -0,0 +1,106 @@
+import os
+import threading
+
+import pytest
+
+from utils import parse_cache
+from utils.metrics import get_metrics
+from utils.parse_cache import ParseCache, cached_parse, hash_pdf
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 fake")
+    return path
+
+
+@pytest.fixture
+def fake_parse(monkeypatch, parsed_doc):
+    calls = []
+
+    def parse(file_path, **kwargs):
+        calls.append((file_path, kwargs))
+        return parsed_doc
+
+    monkeypatch.setattr(parse_cache, "parse", parse)
+    return calls
+
+
+def test_hash_pdf_depends_on_bytes_and_options(tmp_path, pdf_file):
+    other = tmp_path / "other.pdf"
+    other.write_bytes(b"%PDF-1.4 different")
+    assert hash_pdf(pdf_file) == hash_pdf(pdf_file, {})
+    assert hash_pdf(pdf_file) != hash_pdf(other)
+    assert hash_pdf(pdf_file) != hash_pdf(pdf_file, {"include_marginalia": False})
+
+
+def test_get_or_parse_reports_hits(tmp_path, pdf_file, fake_parse):
+    cache = ParseCache(tmp_path / "cache")
+    first, hit = cache.get_or_parse(str(pdf_file))
+    assert not hit
+    second, hit = cache.get_or_parse(str(pdf_file))
+    assert hit
+    assert second[0].chunks == first[0].chunks
+    assert len(fake_parse) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_options_are_separate_entries(tmp_path, pdf_file, fake_parse):
+    cache = ParseCache(tmp_path / "cache")
+    cache.parse(str(pdf_file))
+    cache.parse(str(pdf_file), include_marginalia=False)
+    assert len(fake_parse) == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_eviction_keeps_the_newest_entry(tmp_path, parsed_doc):
+    cache = ParseCache(tmp_path / "cache", max_bytes=1)
+    first = cache.put("a", parsed_doc)
+    os.utime(first, (0, 0))
+    second = cache.put("b", parsed_doc)
+    assert not first.exists()
+    assert second.exists()
+    assert cache.evictions == 1
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    (cache.cache_dir / "bad.pkl").write_bytes(b"")
+    assert cache.get("bad") is None
+    assert cache.misses == 1
+
+
+def test_cached_parse_labels_concurrent_calls(tmp_path, pdf_file, fake_parse):
+    cache = ParseCache(tmp_path / "cache")
+    cache.parse(str(pdf_file))
+    registry = get_metrics()
+    registry.reset()
+
+    threads = [threading.Thread(target=cached_parse, args=(str(pdf_file),),
+                                kwargs={"cache": cache}) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.summary()["caches"]["parse"] == {"hits": 8, "misses": 0, "hit_rate": 1.0}
+
+
+def test_results_with_errors_are_not_cached(tmp_path, pdf_file, monkeypatch, parsed_doc):
+    from agentic_doc.common import PageError, ParsedDocument
+
+    failed = [ParsedDocument(markdown="", chunks=[], start_page_idx=0, end_page_idx=0,
+                             doc_type="pdf", result_path=None,
+                             errors=[PageError(page_num=0, error="timeout", error_code=-1)])]
+    results = [failed, parsed_doc]
+    monkeypatch.setattr(parse_cache, "parse", lambda file_path, **kwargs: results.pop(0))
+
+    cache = ParseCache(tmp_path / "cache")
+    first, hit = cache.get_or_parse(str(pdf_file))
+    assert first is failed and not hit
+    assert cache.stats()["entries"] == 0
+    second, hit = cache.get_or_parse(str(pdf_file))
+    assert second is parsed_doc and not hit
+    assert cache.get_or_parse(str(pdf_file))[1]
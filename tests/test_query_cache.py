@@ -0,0 +1,62 @@
+import time
+
+from utils.query_cache import QueryCache, normalize_query
+
+
+def test_keys_normalize_the_query():
+    assert normalize_query("  Schottky   BARRIER\n") == "schottky barrier"
+    assert QueryCache.make_key("idx", "ns", "Schottky  Barrier", 5) == \
+        QueryCache.make_key("idx", "ns", "schottky barrier", 5.0)
+    assert QueryCache.make_key("idx", "ns", "q", 5, filter={"b": 1, "a": 2}) == \
+        QueryCache.make_key("idx", "ns", "q", 5, filter={"a": 2, "b": 1})
+    assert QueryCache.make_key("idx", "ns", "q", 5) != QueryCache.make_key("idx", "ns", "q", 5, backend="local")
+
+
+def test_hit_and_miss():
+    cache = QueryCache()
+    key = QueryCache.make_key("idx", "ns", "q", 5)
+    assert cache.get(key) is None
+    cache.put(key, ["hit"], cache.generation("ns"))
+    assert cache.get(key) == ["hit"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    keys = [QueryCache.make_key("idx", "ns", f"q{i}", 5) for i in range(3)]
+    cache.put(keys[0], 0, 0)
+    cache.put(keys[1], 1, 0)
+    cache.get(keys[0])
+    cache.put(keys[2], 2, 0)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl():
+    cache = QueryCache(ttl=0.05)
+    key = QueryCache.make_key("idx", "ns", "q", 5)
+    cache.put(key, "value", 0)
+    assert cache.get(key) == "value"
+    time.sleep(0.1)
+    assert cache.get(key) is None
+
+
+def test_invalidate_namespace():
+    cache = QueryCache()
+    key, other = QueryCache.make_key("idx", "ns", "q", 5), QueryCache.make_key("idx", "other", "q", 5)
+    cache.put(key, "value", 0)
+    cache.put(other, "value", 0)
+    cache.invalidate_namespace("ns")
+    assert cache.get(key) is None
+    assert cache.get(other) == "value"
+
+
+def test_result_computed_before_an_upsert_is_not_cached():
+    cache = QueryCache()
+    key = QueryCache.make_key("idx", "ns", "q", 5)
+    generation = cache.generation("ns")
+    cache.invalidate_namespace("ns")  # an upsert lands while the search runs
+    cache.put(key, "stale", generation)
+    assert cache.get(key) is None
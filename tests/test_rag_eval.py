@@ -0,0 +1,46 @@
+import pytest
+
+from utils.metrics import percentile
+from utils.rag_eval import recall_at_k, summarize
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_recall_at_k():
+    assert recall_at_k(["a", "b", "c"], ["a", "c", "d", "e"], 3) == 0.5
+    assert recall_at_k(["a", "b", "c"], ["c"], 2) == 0.0
+    assert recall_at_k(["a", "a"], ["a"], 2) == 1.0
+    assert recall_at_k(["a"], [], 1) is None
+    assert recall_at_k(["a"], None, 1) is None
+
+
+def test_summarize():
+    results = [{"id": str(i), "recall": i % 2,
+                "timings": {"retrieve": 0.01 * (i + 1), "total": 0.1 * (i + 1)}}
+               for i in range(10)]
+    results[3]["recall"] = None
+    results.append({"id": "failed", "error": "boom", "timings": {}})
+    summary = summarize(results, seconds=2.0, top_k=5)
+    assert summary["questions"] == 11
+    assert summary["errors"] == 1
+    assert summary["questions_per_second"] == 5.0
+    assert summary["retrieve_p50_ms"] == pytest.approx(50.0)
+    assert summary["retrieve_p99_ms"] == pytest.approx(100.0)
+    assert summary["total_p95_ms"] == pytest.approx(1000.0)
+    assert "generate_p50_ms" not in summary
+    assert summary["labeled_questions"] == 9
+    assert summary["recall@5"] == round(4 / 9, 4)
+
+
+def test_summarize_without_successes():
+    summary = summarize([{"id": "0", "error": "boom", "timings": {}}], seconds=0.0, top_k=3)
+    assert summary["questions_per_second"] == 0.0
+    assert summary["recall@3"] is None
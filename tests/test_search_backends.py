@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from utils import search_backends
+from utils.search_backends import LocalIndex, _matches
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"pdf_page": 3}, True),
+    ({"pdf_page": {"$eq": 4}}, False),
+    ({"pdf_page": {"$ne": 4}}, True),
+    ({"chunk_type": {"$in": ["text", "table"]}}, True),
+    ({"chunk_type": {"$nin": ["text"]}}, False),
+    ({"pdf_page": {"$gt": 3}}, False),
+    ({"pdf_page": {"$gte": 3, "$lt": 5}}, True),
+    ({"pdf_page": {"$lte": 2}}, False),
+    ({"missing": {"$gt": 0}}, False),
+    ({"missing": {"$ne": 1}}, True),
+    ({"pdf_page": 3, "chunk_type": "table"}, False),
+])
+def test_matches(filter, expected):
+    assert _matches({"pdf_page": 3, "chunk_type": "text"}, filter) is expected
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    # Small blocks so that the per-block top-k and the merge are exercised
+    monkeypatch.setattr(search_backends, "_SEARCH_BLOCK_ROWS", 7)
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((50, 16), dtype=np.float32)
+    local = LocalIndex(tmp_path, max_workers=2)
+    local.build("ns", [f"id-{i}" for i in range(50)], embeddings,
+                [{"pdf_page": i % 5} for i in range(50)])
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return local, normalized
+
+
+def test_top_k_matches_a_full_sort(local_index):
+    local, normalized = local_index
+    queries = np.random.default_rng(1).standard_normal((3, 16), dtype=np.float32)
+    results = local.search_vectors(queries, "ns", top_k=6)
+    for query, hits in zip(queries, results):
+        expected = normalized @ (query / np.linalg.norm(query))
+        order = np.argsort(-expected)[:6]
+        assert [hit["_id"] for hit in hits] == [f"id-{i}" for i in order]
+        assert [hit["_score"] for hit in hits] == pytest.approx(expected[order], abs=1e-5)
+
+
+def test_filter_and_short_results(local_index):
+    local, normalized = local_index
+    query = normalized[12]
+    hits = local.search_vectors(query, "ns", top_k=20, filter={"pdf_page": 2})
+    assert len(hits[0]) == 10
+    assert hits[0][0]["_id"] == "id-12"
+    assert all(hit["fields"]["pdf_page"] == 2 for hit in hits[0])
+    assert local.search_vectors(query, "ns", top_k=5, filter={"pdf_page": 9}) == [[]]
+    assert len(local.search_vectors(query, "ns", top_k=100)[0]) == 50
+
+
+def test_filter_masks_are_capped(local_index, monkeypatch):
+    local, normalized = local_index
+    monkeypatch.setattr(search_backends, "MAX_FILTER_MASKS", 2)
+    for page in range(4):
+        local.search_vectors(normalized[0], "ns", filter={"pdf_page": page})
+    local.search_vectors(normalized[0], "ns", filter={"pdf_page": 2})
+    local.search_vectors(normalized[0], "ns", filter={"pdf_page": 0})
+    assert [key[1] for key in local._filter_masks] == ['{"pdf_page": 2}', '{"pdf_page": 0}']
+
+
+def test_cache_key_depends_on_the_root(tmp_path):
+    assert LocalIndex(tmp_path / "a").cache_key != LocalIndex(tmp_path / "b").cache_key
+    assert LocalIndex(tmp_path / "a").cache_key == LocalIndex(tmp_path / "a").cache_key
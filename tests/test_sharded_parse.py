@@ -0,0 +1,79 @@
+import pymupdf
+import pytest
+from agentic_doc.common import PageError, ParsedDocument
+
+from conftest import make_chunk
+from utils.pdf_utils import count_pages, page_ranges
+from utils.sharded_parse import merge_shard_results, sharded_parse
+
+
+def shard_result(name, num_pages, errors=()):
+    """A shard's parse result with one chunk per page, pages relative to the shard."""
+    return ParsedDocument(
+        markdown=f"# {name}",
+        chunks=[make_chunk(f"{name}-{page}", f"{name} page {page}", page) for page in range(num_pages)],
+        start_page_idx=0, end_page_idx=num_pages - 1, doc_type="pdf", result_path=None,
+        errors=[PageError(page_num=page, error="failed", error_code=-1) for page in errors])
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    doc = pymupdf.open()
+    for number in range(7):
+        doc.new_page().insert_text((72, 72), f"page {number}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_page_ranges():
+    assert page_ranges(7, 3) == [(0, 2), (3, 5), (6, 6)]
+    assert page_ranges(3, 5) == [(0, 2)]
+    with pytest.raises(ValueError):
+        page_ranges(3, 0)
+
+
+def test_merge_offsets_pages_and_errors():
+    merged = merge_shard_results([(shard_result("a", 3), 0),
+                                  (shard_result("b", 3, errors=[1]), 3),
+                                  (shard_result("c", 1), 6)])
+    assert [chunk.chunk_id for chunk in merged.chunks] == \
+        ["a-0", "a-1", "a-2", "b-0", "b-1", "b-2", "c-0"]
+    assert [chunk.grounding[0].page for chunk in merged.chunks] == list(range(7))
+    assert [error.page_num for error in merged.errors] == [4]
+    assert (merged.start_page_idx, merged.end_page_idx) == (0, 6)
+    assert merged.markdown == "# a\n\n# b\n\n# c"
+
+
+def test_merge_does_not_modify_the_shards():
+    shard = shard_result("b", 2)
+    merge_shard_results([(shard, 10)])
+    assert [chunk.grounding[0].page for chunk in shard.chunks] == [0, 1]
+    assert shard.start_page_idx == 0
+
+
+def test_merge_of_nothing_is_an_empty_document():
+    merged = merge_shard_results([])
+    assert merged.chunks == []
+    assert merged.errors == []
+
+
+def test_sharded_parse_matches_page_numbers(pdf_path):
+    calls = []
+
+    def parse_fn(path):
+        calls.append(path)
+        return [shard_result(f"s{len(calls)}", count_pages(path))]
+
+    merged = sharded_parse(str(pdf_path), pages_per_shard=3, max_workers=1, parse_fn=parse_fn)
+    assert len(calls) == 3
+    assert [chunk.grounding[0].page for chunk in merged[0].chunks] == list(range(7))
+    assert merged[0].end_page_idx == 6
+
+
+def test_small_document_is_parsed_whole(pdf_path):
+    calls = []
+    sharded_parse(str(pdf_path), pages_per_shard=10,
+                  parse_fn=lambda path: calls.append(path) or [shard_result("all", 7)])
+    assert calls == [str(pdf_path)]
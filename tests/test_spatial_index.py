@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from utils.spatial_index import PageSpatialIndex, build_page_indexes
+
+
+def brute_force_rect(boxes, left, top, right, bottom):
+    return {i for i, (l_, t_, r_, b_) in enumerate(boxes)
+            if l_ <= right and left <= r_ and t_ <= bottom and top <= b_}
+
+
+@pytest.fixture
+def random_boxes():
+    rng = np.random.default_rng(0)
+    corners = rng.random((300, 2), dtype=np.float32) * 0.85
+    sizes = rng.random((300, 2), dtype=np.float32) * 0.15
+    return np.concatenate([corners, corners + sizes], axis=1)
+
+
+def test_queries_match_brute_force(random_boxes):
+    index = PageSpatialIndex(range(len(random_boxes)), random_boxes, grid_size=8)
+    rng = np.random.default_rng(1)
+    for x, y in rng.random((50, 2)):
+        assert set(index.query_point(x, y)) == brute_force_rect(random_boxes, x, y, x, y)
+        right, bottom = min(x + 0.1, 1.0), min(y + 0.1, 1.0)
+        assert set(index.query_rect(x, y, right, bottom)) == \
+            brute_force_rect(random_boxes, x, y, right, bottom)
+
+
+def test_overlapping_pairs_match_brute_force(random_boxes):
+    index = PageSpatialIndex(range(len(random_boxes)), random_boxes)
+    expected = {}
+    for i in range(len(random_boxes)):
+        for j in range(i + 1, len(random_boxes)):
+            width = min(random_boxes[i, 2], random_boxes[j, 2]) - max(random_boxes[i, 0], random_boxes[j, 0])
+            height = min(random_boxes[i, 3], random_boxes[j, 3]) - max(random_boxes[i, 1], random_boxes[j, 1])
+            if width > 0 and height > 0:
+                expected[(i, j)] = width * height
+    pairs = index.overlapping_pairs()
+    assert {(a, b): pytest.approx(area) for a, b, area in pairs} == expected
+    areas = [area for _, _, area in pairs]
+    assert areas == sorted(areas, reverse=True)
+
+
+def test_empty_and_mismatched_input():
+    index = PageSpatialIndex([], [])
+    assert len(index) == 0
+    assert index.query_point(0.5, 0.5) == []
+    assert index.overlapping_pairs() == []
+    with pytest.raises(ValueError):
+        PageSpatialIndex(["a", "b"], [(0, 0, 1, 1)])
+
+
+def test_build_page_indexes(parsed_doc):
+    indexes = build_page_indexes(parsed_doc)
+    assert sorted(indexes) == [0, 1, 2]
+    assert indexes[2].query_point(0.5, 0.1) == [("spans", 1)]
+    assert sorted(indexes[1].query_point(0.3, 0.47)) == [("figure", 0), ("table", 0)]
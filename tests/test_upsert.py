@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from utils.metadata_store import MetadataStore
+from utils.upsert import (InMemoryIndex, ThrottledError, UpsertEngine, batch_records,
+                          is_throttling_error, record_size)
+
+
+def make_records(n, text="x" * 100):
+    return [{"_id": f"chunk-{i}", "chunk_text": text, "pdf_page": i % 5} for i in range(n)]
+
+
+class ScriptedIndex(InMemoryIndex):
+    """InMemoryIndex that raises the given errors on its first calls."""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+        self._script_lock = threading.Lock()
+
+    def upsert_records(self, namespace, records):
+        with self._script_lock:
+            error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            self.calls += 1
+            raise error
+        super().upsert_records(namespace, records)
+
+
+def test_batch_records_limits_count_and_bytes():
+    records = make_records(250)
+    batches = list(batch_records(records, max_records=96))
+    assert [len(batch) for batch in batches] == [96, 96, 58]
+    assert [record for batch in batches for record in batch] == records
+
+    size = record_size(records[0])
+    batches = list(batch_records(records[:10], max_bytes=3 * size))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+
+
+def test_oversized_record_gets_its_own_batch():
+    records = make_records(3)
+    records[1] = {"_id": "big", "chunk_text": "x" * 10_000}
+    batches = list(batch_records(records, max_bytes=1000))
+    assert [[record["_id"] for record in batch] for batch in batches] == \
+        [["chunk-0"], ["big"], ["chunk-2"]]
+
+
+def test_is_throttling_error():
+    assert is_throttling_error(ThrottledError("slow down"))
+    assert is_throttling_error(RuntimeError("RESOURCE_EXHAUSTED: quota"))
+    assert not is_throttling_error(ValueError("bad record"))
+
+
+def test_upsert_stores_everything():
+    index = InMemoryIndex()
+    progress = []
+    report = UpsertEngine(index, max_workers=4, max_records=10).upsert(
+        "ns", make_records(95), progress_fn=lambda done, total: progress.append((done, total)))
+    assert index.count("ns") == 95
+    assert (report.records, report.batches, report.failed_batches) == (95, 10, 0)
+    assert progress[-1] == (95, 95)
+    assert report.summary()["records"] == 95
+
+
+def test_throttled_batches_are_retried(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("utils.upsert.time.sleep", sleeps.append)
+    index = ScriptedIndex([ThrottledError("429"), ThrottledError("429")])
+    report = UpsertEngine(index, max_workers=1, max_records=10, base_delay=1.0,
+                          max_delay=1.5).upsert("ns", make_records(20))
+    assert report.retries == 2
+    assert report.failed_batches == 0
+    assert index.count("ns") == 20
+    # Full jitter: each sleep is at most min(max_delay, base_delay * 2 ** attempt)
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 1.5
+
+
+def test_failed_batches_are_reported(monkeypatch):
+    monkeypatch.setattr("utils.upsert.time.sleep", lambda seconds: None)
+    index = ScriptedIndex([ValueError("bad record")] + [ThrottledError("429")] * 3)
+    report = UpsertEngine(index, max_workers=1, max_records=10, max_retries=2).upsert(
+        "ns", make_records(30))
+    assert report.failed_batches == 2
+    assert report.errors == ["bad record", "429"]
+    assert report.records == 10
+    assert index.count("ns") == 10
+
+
+def test_metadata_store_gets_accepted_batches_only(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite")
+    index = ScriptedIndex([ValueError("bad record")])
+    UpsertEngine(index, max_workers=1, max_records=10, metadata_store=store).upsert(
+        "ns", make_records(30))
+    assert store.count("ns") == 20
+    assert store.get("ns", "chunk-0") is None
+    assert store.get("ns", "chunk-29")["pdf_page"] == 4
+
+
+@pytest.mark.parametrize("errors", [[], [ValueError("bad record")]])
+def test_on_upsert_gets_every_chunk_id(errors):
+    calls = []
+    UpsertEngine(ScriptedIndex(errors), max_records=10,
+                 on_upsert=lambda namespace, chunk_ids: calls.append((namespace, chunk_ids))).upsert(
+        "ns", make_records(25))
+    assert calls == [("ns", [f"chunk-{i}" for i in range(25)])]
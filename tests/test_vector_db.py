@@ -0,0 +1,125 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import vector_db
+from utils.search_backends import PineconeBackend
+from utils.vector_db import chat_response_stream, retrieve_contexts_multi
+
+
+class FakeStream:
+    def __init__(self, deltas, on_event=None):
+        self.deltas = deltas
+        self.on_event = on_event
+        self.closed = False
+
+    def __iter__(self):
+        yield SimpleNamespace(type="response.created")
+        for delta in self.deltas:
+            yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+            if self.on_event is not None:
+                self.on_event(delta)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    streams = []
+
+    def install(deltas, on_event=None):
+        def create(**kwargs):
+            assert kwargs["stream"] is True
+            streams.append(FakeStream(deltas, on_event))
+            return streams[-1]
+
+        client = SimpleNamespace(responses=SimpleNamespace(create=create))
+        monkeypatch.setattr(vector_db, "get_openai_client", lambda: client)
+        return streams
+
+    return install
+
+
+def test_stream_fills_timings(fake_openai):
+    streams = fake_openai(["Hello", ", ", "world"])
+    timings = {}
+    assert "".join(chat_response_stream("prompt", timings=timings)) == "Hello, world"
+    assert timings["cancelled"] is False
+    assert 0 <= timings["ttft"] <= timings["total"]
+    assert streams[0].closed
+
+
+def test_cancel_event_stops_the_stream(fake_openai):
+    cancel_event = threading.Event()
+    streams = fake_openai(["one", "two", "three"],
+                          on_event=lambda delta: delta == "two" and cancel_event.set())
+    timings = {}
+    deltas = list(chat_response_stream("prompt", cancel_event=cancel_event, timings=timings))
+    assert deltas == ["one", "two"]
+    assert timings["cancelled"] is True
+    assert timings["ttft"] is not None and timings["total"] >= timings["ttft"]
+    assert streams[0].closed
+
+
+def test_closing_the_generator_counts_as_cancelled(fake_openai):
+    streams = fake_openai(["one", "two", "three"])
+    timings = {}
+    stream = chat_response_stream("prompt", timings=timings)
+    assert next(stream) == "one"
+    stream.close()
+    assert timings["cancelled"] is True
+    assert timings["total"] is not None
+    assert streams[0].closed
+
+
+class StubIndex:
+    """Pinecone Index stand-in whose search returns fixed scores per namespace."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.requests = []
+
+    def search(self, namespace, query):
+        self.requests.append((namespace, query["top_k"]))
+        hits = sorted(self.scores[namespace].items(), key=lambda item: -item[1])[:query["top_k"]]
+        return {"result": {"hits": [{"_id": chunk_id, "_score": score,
+                                     "fields": {"chunk_text": chunk_id}}
+                                    for chunk_id, score in hits]}}
+
+
+@pytest.fixture
+def stub_index():
+    return StubIndex({
+        "a": {"a1": 0.9, "a2": 0.8, "a3": 0.7, "a4": 0.1},
+        "b": {"b1": 0.85, "b2": 0.8, "b3": 0.2},
+        "c": {"c1": 0.3},
+        "empty": {},
+    })
+
+
+def test_multi_merges_by_score(stub_index):
+    chunk_ids, metadata = retrieve_contexts_multi(
+        "q", "idx", ["a", "b", "c", "empty"], top_k=4, backend=PineconeBackend(stub_index),
+        use_cache=False)
+    # a2 and b2 tie at 0.8: the namespace listed first wins
+    assert chunk_ids == ["a1", "b1", "a2", "b2"]
+    assert [m["_score"] for m in metadata] == [0.9, 0.85, 0.8, 0.8]
+    assert [m["namespace"] for m in metadata] == ["a", "b", "a", "b"]
+    assert sorted(stub_index.requests) == [("a", 4), ("b", 4), ("c", 4), ("empty", 4)]
+
+
+def test_multi_asks_every_namespace_for_the_full_top_k(stub_index):
+    chunk_ids, _ = retrieve_contexts_multi(
+        "q", "idx", ["c", "a"], top_k=3, backend=PineconeBackend(stub_index), use_cache=False)
+    # One namespace may fill every slot, so each is searched for top_k, not top_k / n
+    assert chunk_ids == ["a1", "a2", "a3"]
+    chunk_ids, _ = retrieve_contexts_multi(
+        "q", "idx", ["c", "a"], top_k=10, backend=PineconeBackend(stub_index), use_cache=False)
+    assert chunk_ids == ["a1", "a2", "a3", "c1", "a4"]
+
+
+def test_multi_with_no_namespaces(stub_index):
+    assert retrieve_contexts_multi("q", "idx", [], backend=PineconeBackend(stub_index)) == ([], [])
+    assert stub_index.requests == []
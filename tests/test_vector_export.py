@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils.vector_export import export_namespace_to_parquet, read_namespace_export
+
+
+class FakeIndex:
+    """
+    The parts of a Pinecone Index handle used by the export: list, fetch
+    and describe_index_stats.
+    """
+
+    def __init__(self, vectors, dimension=3, page_size=4, fail_on=None):
+        self.vectors = {vector.id: vector for vector in vectors}
+        self.dimension = dimension
+        self.page_size = page_size
+        self.fail_on = fail_on
+
+    def list(self, namespace):
+        ids = list(self.vectors)
+        for start in range(0, len(ids), self.page_size):
+            yield ids[start:start + self.page_size]
+
+    def fetch(self, ids, namespace):
+        if self.fail_on in ids:
+            raise RuntimeError("fetch failed")
+        return SimpleNamespace(vectors={i: self.vectors[i] for i in ids})
+
+    def describe_index_stats(self):
+        return SimpleNamespace(dimension=self.dimension)
+
+
+def make_vectors(n, dimension=3):
+    return [SimpleNamespace(id=f"id-{i}", values=[float(i)] * dimension,
+                            metadata={"chunk_text": f"text {i}", "pdf_page": i % 3,
+                                      "chunk_type": "text", "custom": i})
+            for i in range(n)]
+
+
+def test_round_trip(tmp_path):
+    vectors = make_vectors(25)
+    out_path, rows = export_namespace_to_parquet(FakeIndex(vectors), "ns", tmp_path / "ns.parquet",
+                                                 batch_size=6, max_workers=2, row_group_size=10)
+    assert rows == 25
+    ids, embeddings, metadata = read_namespace_export(out_path)
+    assert ids == [vector.id for vector in vectors]
+    assert embeddings.dtype == np.float32
+    np.testing.assert_array_equal(embeddings, [vector.values for vector in vectors])
+    assert metadata["pdf_page"].tolist() == [i % 3 for i in range(25)]
+    assert metadata["extra_metadata"][7] == '{"custom": 7}'
+    assert not (tmp_path / "ns.parquet.tmp").exists()
+
+
+def test_read_selected_columns(tmp_path):
+    out_path, _ = export_namespace_to_parquet(FakeIndex(make_vectors(5)), "ns",
+                                              tmp_path / "ns.parquet")
+    _, _, metadata = read_namespace_export(out_path, columns=["chunk_text"])
+    assert list(metadata.columns) == ["chunk_text"]
+
+
+def test_empty_namespace_writes_schema(tmp_path):
+    out_path, rows = export_namespace_to_parquet(FakeIndex([], dimension=8), "empty",
+                                                 tmp_path / "empty.parquet")
+    assert rows == 0
+    assert out_path.exists()
+    ids, embeddings, _ = read_namespace_export(out_path)
+    assert ids == []
+    assert embeddings.shape == (0, 8)
+
+
+def test_failed_export_removes_temp_file(tmp_path):
+    index = FakeIndex(make_vectors(20), fail_on="id-12")
+    with pytest.raises(RuntimeError):
+        export_namespace_to_parquet(index, "ns", tmp_path / "ns.parquet",
+                                    batch_size=4, max_workers=1, row_group_size=4)
+    assert list(tmp_path.iterdir()) == []
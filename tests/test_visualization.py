@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils import visualization
+from utils.visualization import annotate_hits, boxes_to_pixels
+
+
+def scalar_pixels(box, width, height):
+    """The per-box math of `viz_grounding_box` that `boxes_to_pixels` replaced."""
+    left, top, right, bottom = box
+    return (max(0, math.floor(left * width)), max(0, math.floor(top * height)),
+            min(width, math.ceil(right * width)), min(height, math.ceil(bottom * height)))
+
+
+def test_boxes_to_pixels_matches_scalar_math():
+    rng = np.random.default_rng(0)
+    # Boxes overlap the page and may stick out of any side, the range the
+    # scalar math handled (it did not clip boxes lying entirely off the page)
+    boxes = rng.uniform(-0.2, 1.0, size=(2000, 4))
+    boxes[:, 2:] = np.maximum(boxes[:, :2] + rng.uniform(0, 0.4, size=(2000, 2)), 0)
+    boxes[:5] = [(0, 0, 1, 1), (0.1, 0.1, 0.5, 0.2), (-0.5, -0.1, 1.5, 2.0),
+                 (0.999, 0.999, 1.0, 1.0), (1 / 3, 2 / 3, 0.7, 0.9)]
+    for width, height in ((612, 792), (1275, 1650), (7, 3)):
+        expected = [scalar_pixels(box, width, height) for box in boxes.tolist()]
+        assert boxes_to_pixels(boxes, width, height).tolist() == [list(box) for box in expected]
+
+
+def test_boxes_to_pixels_shapes():
+    assert boxes_to_pixels([], 10, 10).shape == (0, 4)
+    assert boxes_to_pixels((0.1, 0.2, 0.3, 0.4), 10, 10).tolist() == [[1, 2, 3, 4]]
+    assert boxes_to_pixels([(-1, -1, 2, 2)], 10, 20).tolist() == [[0, 0, 10, 20]]
+    # Boxes entirely off the page collapse onto its edge
+    assert boxes_to_pixels([(1.2, 1.1, 1.5, 1.3)], 10, 20).tolist() == [[10, 20, 10, 20]]
+
+
+@pytest.fixture
+def blank_pages(monkeypatch):
+    rendered = []
+
+    def render_page(pdf_path, page_number, dpi=72):
+        rendered.append(page_number)
+        page = np.full((100, 200, 3), 255, dtype=np.uint8)
+        page.flags.writeable = False  # like the shared renderer's cached pages
+        return page
+
+    monkeypatch.setattr(visualization, "render_page", render_page)
+    return rendered
+
+
+def test_annotate_hits_draws_each_page_once(blank_pages):
+    hits = [{"pdf_page": 1, "box": {"l": 0.1, "t": 0.1, "r": 0.5, "b": 0.5}},
+            {"pdf_page": 0, "box": '{"l": 0.5, "t": 0.5, "r": 0.9, "b": 0.9}'},
+            {"pdf_page": 1, "box": {"l": 0.6, "t": 0.2, "r": 0.7, "b": 0.3}},
+            {}]  # blanked-out hit from another document
+    pages = annotate_hits("doc.pdf", hits, color=(0, 255, 0), thickness=1, label=False)
+    assert sorted(blank_pages) == [0, 1]
+    assert sorted(pages) == [0, 1]
+    page = pages[1]
+    assert tuple(page[10, 20]) == (0, 255, 0)  # top-left corner of the first box
+    assert tuple(page[50, 100]) == (0, 255, 0)  # bottom-right corner
+    assert tuple(page[30, 60]) == (255, 255, 255)  # inside, not filled
+    assert tuple(page[20, 120]) == (0, 255, 0)  # second box on the same page
+
+
+def test_annotate_hits_clips_at_page_edges(blank_pages):
+    hits = [{"pdf_page": 0, "box": {"l": -0.2, "t": 0.5, "r": 1.3, "b": 1.4}}]
+    page = annotate_hits("doc.pdf", hits, color=(255, 0, 0), thickness=1, label=False)[0]
+    assert page.shape == (100, 200, 3)
+    assert tuple(page[50, 0]) == (0, 0, 255)  # BGR red drawn on the RGB page
+    assert tuple(page[50, 199]) == (0, 0, 255)
+    assert tuple(page[99, 100]) == (0, 0, 255)
+    assert tuple(page[49, 100]) == (255, 255, 255)
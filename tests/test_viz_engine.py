@@ -0,0 +1,65 @@
+import json
+import math
+
+import cv2
+import pymupdf
+import pytest
+
+from utils.viz_engine import _page_marks, visualize_parsed_document
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    for number in range(3):
+        doc.new_page().insert_text((72, 72), f"page {number}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_page_marks_group_groundings_by_page(parsed_doc):
+    marks = _page_marks(parsed_doc[0])
+    assert [label for label, _, _ in marks[0]] == ["0 text", "1 text"]
+    assert [label for label, _, _ in marks[1]] == ["0 table", "1 figure", "2-0 text"]
+    assert marks[2] == [("2-1 text", "text", (0.1, 0.05, 0.9, 0.2))]
+
+
+@pytest.mark.parametrize("image_format, magic", [("webp", b"RIFF"), ("jpeg", b"\xff\xd8\xff")])
+def test_writes_pages_and_manifest(tmp_path, pdf_path, parsed_doc, image_format, magic):
+    output_dir = tmp_path / "viz"
+    manifest = visualize_parsed_document(parsed_doc, pdf_path, output_dir,
+                                         image_format=image_format, quality=60, max_workers=1)
+    suffix = ".webp" if image_format == "webp" else ".jpg"
+    assert [page["file"] for page in manifest["pages"]] == \
+        [f"paper_viz_page_{i}{suffix}" for i in range(3)]
+    assert [page["num_marks"] for page in manifest["pages"]] == [2, 3, 1]
+    for page in manifest["pages"]:
+        data = (output_dir / page["file"]).read_bytes()
+        assert data.startswith(magic)
+        assert page["bytes"] == len(data)
+        assert cv2.imread(str(output_dir / page["file"])) is not None
+    assert manifest["total_bytes"] == sum(page["bytes"] for page in manifest["pages"])
+    assert (manifest["source"], manifest["format"], manifest["quality"]) == \
+        ("paper.pdf", image_format, 60)
+    assert json.loads((output_dir / "manifest.json").read_text()) == manifest
+
+
+def test_boxes_are_drawn_in_the_chunk_type_color(tmp_path, pdf_path, parsed_doc):
+    output_dir = tmp_path / "viz"
+    visualize_parsed_document(parsed_doc, pdf_path, output_dir, image_format="png",
+                              style={"color_map": {"text": (0, 0, 255), "table": (0, 255, 0),
+                                                   "figure": (255, 0, 0),
+                                                   "marginalia": (0, 255, 255)}},
+                              max_workers=1)
+    img = cv2.imread(str(output_dir / "paper_viz_page_1.png"))
+    height, width = img.shape[:2]
+    # Top-left corner of the table box (0.1, 0.1), in BGR
+    assert tuple(img[math.floor(0.1 * height), math.floor(0.1 * width)]) == (0, 255, 0)
+    assert tuple(img[height // 2 - 40, 5]) == (255, 255, 255)
+
+
+def test_rejects_unknown_formats(tmp_path, pdf_path, parsed_doc):
+    with pytest.raises(ValueError):
+        visualize_parsed_document(parsed_doc, pdf_path, tmp_path, image_format="gif")
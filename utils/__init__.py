@@ -2,6 +2,8 @@ from .file_utils import remove_extension
 from .serialization import save_pickle, save_json
 from .visualization import create_visualizations, viz_chunk_in_pdf
 from .vector_db import get_vector_db_as_df
+from .parse_cache import cached_parse
+from .doc_index import ParsedDocIndex, get_doc_index
 
 __all__ = [
     'remove_extension',
@@ -9,5 +11,8 @@ __all__ = [
     'save_json',
     'create_visualizations',
     'viz_chunk_in_pdf',
-    'get_vector_db_as_df'
+    'get_vector_db_as_df',
+    'cached_parse',
+    'ParsedDocIndex',
+    'get_doc_index'
 ]
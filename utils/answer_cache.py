@@ -0,0 +1,206 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .query_cache import normalize_query
+
+ANSWER_CACHE_DB_PATH = Path("app_storage/answer_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+_SQL_VARIABLE_LIMIT = 900  # stay under SQLite's default limit of 999 bound parameters
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key        TEXT PRIMARY KEY,
+    answer     TEXT NOT NULL,
+    latency    REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS answer_chunks (
+    chunk_id TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    PRIMARY KEY (chunk_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+CREATE INDEX IF NOT EXISTS answer_chunks_key ON answer_chunks (key);
+"""
+
+
+def make_answer_key(prompt_version, chunk_ids, question, model_name, temperature):
+    """
+    Hash everything that determines an answer into a cache key.
+
+    Args:
+        prompt_version (str): Version of the prompt templates
+        chunk_ids (list[str]): IDs of the packed contexts, in prompt order
+        question (str): The question, normalized before hashing
+        model_name (str): The model
+        temperature (float): Sampling temperature
+    """
+    payload = json.dumps([str(prompt_version), list(chunk_ids), normalize_query(question),
+                          model_name, round(float(temperature), 4)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AnswerCache:
+    """
+    SQLite cache of RAG answers with LRU and TTL eviction.
+
+    Every entry remembers the chunk IDs its prompt was built from, so
+    re-upserting any of those chunks drops the answer (see
+    `invalidate_cached_results`, the upload paths' `on_upsert` callback).
+    Entries also store how long the LLM call took, which is counted as
+    saved latency whenever the entry is served.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        max_entries (int): Entries kept; the least recently used go first
+        ttl (float): Seconds an answer stays valid
+    """
+
+    def __init__(self, db_path=ANSWER_CACHE_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl=DEFAULT_TTL_SECONDS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _delete_keys(self, conn, keys):
+        for start in range(0, len(keys), _SQL_VARIABLE_LIMIT):
+            batch = keys[start:start + _SQL_VARIABLE_LIMIT]
+            placeholders = ", ".join("?" * len(batch))
+            conn.execute(f"DELETE FROM answers WHERE key IN ({placeholders})", batch)
+            conn.execute(f"DELETE FROM answer_chunks WHERE key IN ({placeholders})", batch)
+
+    def get(self, key):
+        """
+        Return the cached answer for a key, or None.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer, latency, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[2] >= self.ttl:
+                self._delete_keys(conn, [key])
+                row = None
+            if row is not None:
+                conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[1]
+        return row[0]
+
+    def put(self, key, answer, chunk_ids, latency):
+        """
+        Store an answer.
+
+        Args:
+            key (str): Key from `make_answer_key`
+            answer (str): The answer text
+            chunk_ids (list[str]): Chunks the prompt was built from
+            latency (float): Seconds the LLM call took
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, latency, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)", (key, answer, latency, now, now))
+            conn.executemany("INSERT OR IGNORE INTO answer_chunks (chunk_id, key) VALUES (?, ?)",
+                             [(chunk_id, key) for chunk_id in set(chunk_ids)])
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        expired = [key for (key,) in conn.execute(
+            "SELECT key FROM answers WHERE created_at <= ?", (now - self.ttl,))]
+        excess = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - len(expired) \
+            - self.max_entries
+        if excess > 0:
+            expired += [key for (key,) in conn.execute(
+                "SELECT key FROM answers WHERE created_at > ? ORDER BY last_used LIMIT ?",
+                (now - self.ttl, excess))]
+        if expired:
+            self._delete_keys(conn, expired)
+            with self._stats_lock:
+                self.evictions += len(expired)
+
+    def invalidate_chunks(self, chunk_ids):
+        """
+        Drop every answer built from any of the given chunks.
+
+        Returns:
+            int: Number of answers dropped
+        """
+        chunk_ids = list(dict.fromkeys(chunk_ids))
+        with self._connect() as conn:
+            keys = set()
+            for start in range(0, len(chunk_ids), _SQL_VARIABLE_LIMIT):
+                batch = chunk_ids[start:start + _SQL_VARIABLE_LIMIT]
+                keys.update(key for (key,) in conn.execute(
+                    f"SELECT key FROM answer_chunks "
+                    f"WHERE chunk_id IN ({', '.join('?' * len(batch))})", batch))
+            self._delete_keys(conn, list(keys))
+        with self._stats_lock:
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers")
+            conn.execute("DELETE FROM answer_chunks")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+        stats["entries"] = len(self)
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """
+    Return the process-wide AnswerCache at `app_storage/answer_cache.sqlite`.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnswerCache()
+        return _default_cache
@@ -0,0 +1,320 @@
+import json
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from .search_backends import SearchBackend, _matches
+from .serialization import parsed_doc_to_records
+
+BM25_INDEX_PATH = Path("app_storage/bm25_index.pkl")
+PARSED_JSON_DIR = Path("app_storage/parsed_docs_json")
+
+# Keeps formulas and part numbers whole ("teo2", "cdznte", "ab-123", "1.5")
+_TERM_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+
+    Compound terms such as "Cd-Zn-Te" are kept whole and their parts are
+    added too, so both "cd-zn-te" and "zn" match.
+    """
+    terms = []
+    for term in _TERM_PATTERN.findall(text.casefold()):
+        terms.append(term)
+        if not term.isalnum():
+            terms.extend(part for part in re.split(r"[-./]", term) if part)
+    return terms
+
+
+class BM25Index(SearchBackend):
+    """
+    Okapi BM25 keyword search over chunk texts, with an in-memory inverted index.
+
+    Documents are Pinecone-style records (`_id`, `chunk_text`, metadata)
+    grouped by namespace. Each term maps to a posting list of document
+    numbers and term frequencies, kept as NumPy arrays once built, so a
+    query only touches the postings of its own terms.
+
+    Adding a namespace again replaces its documents: the old ones are
+    marked deleted and left out of scoring and statistics until the index
+    is compacted (done automatically when a third of it is deleted).
+
+    Args:
+        k1 (float): Term-frequency saturation
+        b (float): Document-length normalization
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.namespaces_of = []
+        self.fields = []
+        self.lengths = []
+        self.deleted = []
+        self._postings = defaultdict(lambda: ([], []))
+        self._by_namespace = defaultdict(list)
+        self._arrays = None
+        self._lock = threading.RLock()
+
+    # -- building ---------------------------------------------------------
+
+    def add_records(self, namespace, records):
+        """
+        Index (or re-index) the records of a namespace.
+
+        Args:
+            namespace (str): Namespace, one per PDF
+            records (list[dict]): Records as built by `parsed_doc_to_records`
+        """
+        with self._lock:
+            self._delete_namespace(namespace)
+            for record in records:
+                doc = len(self.ids)
+                terms = Counter(tokenize(record.get("chunk_text") or ""))
+                for term, tf in terms.items():
+                    docs, tfs = self._postings[term]
+                    docs.append(doc)
+                    tfs.append(tf)
+                self.ids.append(record["_id"])
+                self.namespaces_of.append(namespace)
+                self.fields.append({k: v for k, v in record.items() if k != "_id"})
+                self.lengths.append(sum(terms.values()))
+                self.deleted.append(False)
+                self._by_namespace[namespace].append(doc)
+            self._arrays = None
+            if self.deleted.count(True) * 3 > len(self.deleted):
+                self._compact()
+
+    def remove_namespace(self, namespace):
+        with self._lock:
+            self._delete_namespace(namespace)
+            self._arrays = None
+
+    def _delete_namespace(self, namespace):
+        for doc in self._by_namespace.pop(namespace, []):
+            self.deleted[doc] = True
+
+    def _compact(self):
+        live = [doc for doc, dead in enumerate(self.deleted) if not dead]
+        by_namespace = defaultdict(list)
+        for doc in live:
+            by_namespace[self.namespaces_of[doc]].append(doc)
+        records = {ns: [{"_id": self.ids[doc], **self.fields[doc]} for doc in docs]
+                   for ns, docs in by_namespace.items()}
+        self.ids, self.namespaces_of, self.fields, self.lengths, self.deleted = [], [], [], [], []
+        self._postings.clear()
+        self._by_namespace.clear()
+        for namespace, ns_records in records.items():
+            self.add_records(namespace, ns_records)
+
+    def add_json_file(self, json_path):
+        """
+        Index a parsed document saved by `save_json`; the namespace is the file stem.
+        """
+        json_path = Path(json_path)
+        with open(json_path) as f:
+            parsed_doc_json = json.load(f)
+        records = parsed_doc_to_records(parsed_doc_json, json_path.stem + ".pdf")
+        self.add_records(json_path.stem, records)
+        return len(records)
+
+    @classmethod
+    def from_json_dir(cls, json_dir=PARSED_JSON_DIR, **kwargs):
+        index = cls(**kwargs)
+        for json_path in sorted(Path(json_dir).glob("*.json")):
+            index.add_json_file(json_path)
+        return index
+
+    # -- persistence ------------------------------------------------------
+
+    def save(self, path=BM25_INDEX_PATH):
+        """
+        Atomically write the index to disk.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            state = {
+                "k1": self.k1, "b": self.b, "ids": self.ids,
+                "namespaces_of": self.namespaces_of, "fields": self.fields,
+                "lengths": self.lengths, "deleted": self.deleted,
+                "postings": dict(self._postings),
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=BM25_INDEX_PATH):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        index = cls(state["k1"], state["b"])
+        index.ids = state["ids"]
+        index.namespaces_of = state["namespaces_of"]
+        index.fields = state["fields"]
+        index.lengths = state["lengths"]
+        index.deleted = state["deleted"]
+        index._postings.update(state["postings"])
+        for doc, (namespace, dead) in enumerate(zip(index.namespaces_of, index.deleted)):
+            if not dead:
+                index._by_namespace[namespace].append(doc)
+        return index
+
+    # -- searching --------------------------------------------------------
+
+    def namespaces(self):
+        with self._lock:
+            return sorted(self._by_namespace)
+
+    def __len__(self):
+        return len(self.ids) - self.deleted.count(True)
+
+    def _freeze(self):
+        if self._arrays is None:
+            lengths = np.asarray(self.lengths, dtype=np.float32)
+            live = ~np.asarray(self.deleted, dtype=bool)
+            n_live = int(live.sum())
+            avg_length = float(lengths[live].mean()) if n_live else 0.0
+            postings = {}
+            for term, (docs, tfs) in self._postings.items():
+                docs = np.asarray(docs, dtype=np.int32)
+                tfs = np.asarray(tfs, dtype=np.float32)
+                keep = live[docs]
+                if keep.any():
+                    df = int(keep.sum())
+                    idf = math.log(1 + (n_live - df + 0.5) / (df + 0.5))
+                    postings[term] = (docs[keep], tfs[keep], idf)
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1e-9))
+            self._arrays = (postings, norm, live)
+        return self._arrays
+
+    def score(self, query):
+        """
+        BM25 score of every document for a query.
+
+        Returns:
+            np.ndarray: One score per document number (0 for no match)
+        """
+        with self._lock:
+            postings, norm, _ = self._freeze()
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            for term in set(tokenize(query)):
+                entry = postings.get(term)
+                if entry is None:
+                    continue
+                docs, tfs, idf = entry
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+            return scores
+
+    def search(self, query, namespace=None, top_k=2, filter=None):
+        """
+        Top-k BM25 search, in the hit format of `SearchBackend.search`.
+
+        Args:
+            query (str): The query text
+            namespace (str or list[str]): Namespace(s) to search, None for all
+            top_k (int): Number of hits
+            filter (dict): Optional Pinecone-style metadata filter
+        """
+        with self._lock:
+            scores = self.score(query)
+            if namespace is not None:
+                namespaces = [namespace] if isinstance(namespace, str) else namespace
+                docs = [doc for ns in namespaces for doc in self._by_namespace.get(ns, [])]
+                candidates = np.asarray(docs, dtype=np.int64)
+            else:
+                candidates = np.flatnonzero(self._freeze()[2])
+            candidates = candidates[scores[candidates] > 0]
+            if filter:
+                candidates = np.asarray([doc for doc in candidates
+                                         if _matches(self.fields[doc], filter)], dtype=np.int64)
+            k = min(top_k, len(candidates))
+            if k == 0:
+                return []
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [{"_id": self.ids[doc], "_score": float(scores[doc]),
+                     "fields": {**self.fields[doc], "namespace": self.namespaces_of[doc]}}
+                    for doc in top]
+
+
+def reciprocal_rank_fusion(result_lists, weights=None, k=60, top_k=None):
+    """
+    Merge ranked hit lists with weighted reciprocal rank fusion.
+
+    A hit's fused score is the sum over lists of `weight / (k + rank)`.
+    Hits are matched by `_id`; the fields of the first list a hit appears
+    in are kept.
+
+    Args:
+        result_lists (list[list[dict]]): Hit lists, each best first
+        weights (list[float]): Weight per list, defaults to 1 each
+        k (int): Rank offset; larger values flatten the rank differences
+        top_k (int): Number of fused hits to return, defaults to all
+
+    Returns:
+        list[dict]: Fused hits, best first, with the fused `_score`
+    """
+    weights = weights or [1.0] * len(result_lists)
+    fused, fields = defaultdict(float), {}
+    for hits, weight in zip(result_lists, weights):
+        for rank, hit in enumerate(hits, start=1):
+            fused[hit["_id"]] += weight / (k + rank)
+            fields.setdefault(hit["_id"], hit["fields"])
+    ranked = sorted(fused, key=lambda chunk_id: -fused[chunk_id])[:top_k]
+    return [{"_id": chunk_id, "_score": fused[chunk_id], "fields": dict(fields[chunk_id])}
+            for chunk_id in ranked]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_bm25_index():
+    """
+    Return the process-wide BM25 index, loaded from `app_storage/bm25_index.pkl`
+    or built from `app_storage/parsed_docs_json` on first use.
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            if BM25_INDEX_PATH.exists():
+                _default_index = BM25Index.load()
+            else:
+                _default_index = BM25Index.from_json_dir()
+                _default_index.save()
+        return _default_index
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    vocabulary = [f"term{i}" for i in range(20_000)] + ["TeO2", "CdZnTeSe", "Schottky"]
+    index = BM25Index()
+    start = time.perf_counter()
+    for n in range(100):
+        words = rng.choice(vocabulary, size=(500, 120))
+        index.add_records(f"paper-{n}", [{"_id": f"{n}-{i}", "chunk_text": " ".join(w)}
+                                         for i, w in enumerate(words)])
+    print(f"indexed {len(index)} chunks in {time.perf_counter() - start:.2f} s")
+    index.search("warm up", top_k=5)
+
+    queries = ["TeO2 thickness", "Schottky barrier CdZnTeSe", "term17 term42 term99"]
+    start = time.perf_counter()
+    for _ in range(20):
+        for query in queries:
+            index.search(query, top_k=10)
+    print(f"{(time.perf_counter() - start) * 1000 / 60:.2f} ms per query over all namespaces")
@@ -0,0 +1,247 @@
+import gzip
+import json
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pa_compute
+import pyarrow.parquet as pq
+
+from .file_utils import remove_extension
+
+CHUNK_STORE_DIR = Path("app_storage/parsed_docs_parquet")
+
+CHUNK_SCHEMA = pa.schema([
+    ("chunk_id", pa.string()),
+    ("chunk_type", pa.dictionary(pa.int8(), pa.string())),
+    ("text", pa.string()),
+    ("page", pa.int32()),
+    ("chunk_idx", pa.int32()),
+    ("grounding_idx", pa.int16()),
+    ("l", pa.float32()),
+    ("t", pa.float32()),
+    ("r", pa.float32()),
+    ("b", pa.float32()),
+    ("image_path", pa.string()),
+])
+
+
+def _chunk_type_value(chunk_type):
+    return getattr(chunk_type, "value", chunk_type)
+
+
+def parsed_doc_to_table(parsed_doc):
+    """
+    Convert a parsed document to an Arrow table with one row per grounding box.
+
+    Rows are sorted by page so that Parquet row-group statistics let page
+    lookups skip most of the file. `chunk_idx` keeps the original chunk order.
+
+    Args:
+        parsed_doc: The parsed document, as returned by `parse()`
+
+    Returns:
+        pa.Table: The chunk table
+    """
+    rows = []
+    for chunk_idx, chunk in enumerate(parsed_doc[0].chunks):
+        for grounding_idx, g in enumerate(chunk.grounding):
+            rows.append((g.page, chunk_idx, grounding_idx, chunk, g))
+    rows.sort(key=lambda row: (row[0], row[1], row[2]))
+
+    chunk_types = pa.array([_chunk_type_value(chunk.chunk_type) for _, _, _, chunk, _ in rows],
+                           pa.string())
+    return pa.table({
+        "chunk_id": [chunk.chunk_id for _, _, _, chunk, _ in rows],
+        "chunk_type": chunk_types.dictionary_encode().cast(CHUNK_SCHEMA.field("chunk_type").type),
+        "text": [chunk.text for _, _, _, chunk, _ in rows],
+        "page": [page for page, _, _, _, _ in rows],
+        "chunk_idx": [chunk_idx for _, chunk_idx, _, _, _ in rows],
+        "grounding_idx": [grounding_idx for _, _, grounding_idx, _, _ in rows],
+        "l": [g.box.l for *_, g in rows],
+        "t": [g.box.t for *_, g in rows],
+        "r": [g.box.r for *_, g in rows],
+        "b": [g.box.b for *_, g in rows],
+        "image_path": [None if g.image_path is None else str(g.image_path) for *_, g in rows],
+    }, schema=CHUNK_SCHEMA)
+
+
+def parsed_doc_metadata(parsed_doc):
+    """
+    Collect the document-level fields of a parsed document.
+    """
+    doc = parsed_doc[0]
+    return {
+        "markdown": doc.markdown,
+        "start_page_idx": doc.start_page_idx,
+        "end_page_idx": doc.end_page_idx,
+        "doc_type": doc.doc_type,
+        "result_path": None if doc.result_path is None else str(doc.result_path),
+        "errors": [e.model_dump() for e in doc.errors],
+        "num_chunks": len(doc.chunks),
+    }
+
+
+def _metadata_path(file_path):
+    return Path(file_path).with_suffix(".meta.json.gz")
+
+
+def save_chunk_store(parsed_doc, save_dir=CHUNK_STORE_DIR, file_name=None, row_group_size=256):
+    """
+    Save a parsed document as a columnar Parquet chunk store.
+
+    Chunks go in `<name>.parquet`. Document-level fields, including the
+    markdown, go in a gzipped JSON sidecar `<name>.meta.json.gz` so they do
+    not bloat the Parquet footer that every read has to parse.
+
+    Args:
+        parsed_doc: The parsed document
+        save_dir (str): The directory to save to
+        file_name (str): The name for the file
+        row_group_size (int): Rows per row group; smaller groups make page
+            lookups read less, larger groups compress better
+
+    Returns:
+        Path: The path to the saved Parquet file
+    """
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    file_path = save_dir / (remove_extension(file_name) + ".parquet")
+    pq.write_table(parsed_doc_to_table(parsed_doc), file_path,
+                   row_group_size=row_group_size, compression="zstd")
+    with gzip.open(_metadata_path(file_path), "wt") as f:
+        json.dump(parsed_doc_metadata(parsed_doc), f)
+    return file_path
+
+
+def load_doc_metadata(file_path):
+    """
+    Read the document-level metadata (markdown, page range, errors) without
+    reading any chunk rows.
+    """
+    with gzip.open(_metadata_path(file_path), "rt") as f:
+        return json.load(f)
+
+
+def _row_groups_for_pages(parquet_file, pages):
+    """
+    Use the page column's min/max statistics to pick the row groups that can
+    contain any of `pages`.
+    """
+    page_col = parquet_file.schema_arrow.get_field_index("page")
+    selected = []
+    for i in range(parquet_file.metadata.num_row_groups):
+        stats = parquet_file.metadata.row_group(i).column(page_col).statistics
+        if stats is None or not stats.has_min_max or any(
+                stats.min <= p <= stats.max for p in pages):
+            selected.append(i)
+    return selected
+
+
+def load_chunks(file_path, pages=None, chunk_types=None, chunk_ids=None, columns=None):
+    """
+    Read chunk rows, touching only the requested columns and row groups.
+
+    Args:
+        file_path (str): Path to the chunk store
+        pages (list[int]): Only rows on these pages
+        chunk_types (list[str]): Only rows of these chunk types
+        chunk_ids (list[str]): Only rows of these chunks
+        columns (list[str]): Columns to return, defaults to all
+
+    Returns:
+        pa.Table: The matching rows
+    """
+    parquet_file = pq.ParquetFile(file_path)
+    filters = {"page": pages, "chunk_type": chunk_types, "chunk_id": chunk_ids}
+    filters = {col: values for col, values in filters.items() if values is not None}
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, *filters]))
+
+    if pages is not None:
+        row_groups = _row_groups_for_pages(parquet_file, pages)
+        table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+    else:
+        table = parquet_file.read(columns=read_columns)
+
+    for col, values in filters.items():
+        if col == "chunk_type":
+            values = [_chunk_type_value(v) for v in values]
+            column = table[col].cast(pa.string())
+        else:
+            column = table[col]
+        table = table.filter(pa_compute.is_in(column, value_set=pa.array(values, column.type)))
+    return table if columns is None else table.select(columns)
+
+
+def load_parsed_doc(file_path):
+    """
+    Rebuild the parsed document saved by `save_chunk_store`.
+
+    Returns:
+        list[ParsedDocument]: The document, in the same shape `parse()` returns
+    """
+    from agentic_doc.common import (Chunk, ChunkGrounding, ChunkGroundingBox,
+                                    PageError, ParsedDocument)
+
+    doc_metadata = load_doc_metadata(file_path)
+    table = pq.ParquetFile(file_path).read()
+    table = table.sort_by([("chunk_idx", "ascending"), ("grounding_idx", "ascending")])
+    chunks = []
+    for row in table.to_pylist():
+        grounding = ChunkGrounding(
+            page=row["page"],
+            box=ChunkGroundingBox(l=row["l"], t=row["t"], r=row["r"], b=row["b"]),
+            image_path=row["image_path"],
+        )
+        if row["grounding_idx"] == 0:
+            chunks.append(Chunk(text=row["text"], grounding=[grounding],
+                                chunk_type=row["chunk_type"], chunk_id=row["chunk_id"]))
+        else:
+            chunks[-1].grounding.append(grounding)
+
+    return [ParsedDocument(
+        markdown=doc_metadata["markdown"],
+        chunks=chunks,
+        start_page_idx=doc_metadata["start_page_idx"],
+        end_page_idx=doc_metadata["end_page_idx"],
+        doc_type=doc_metadata["doc_type"],
+        result_path=doc_metadata["result_path"],
+        errors=[PageError(**e) for e in doc_metadata["errors"]],
+    )]
+
+
+if __name__ == "__main__":
+    import pickle
+    import tempfile
+    import time
+
+    pickle_dir = Path("app_storage/parsed_docs_pkl")
+
+    def _best_of(fn, repeat=5):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'document':<60} {'pkl KB':>8} {'pq KB':>8} {'pkl ms':>8} "
+              f"{'pq ms':>8} {'page ms':>8}")
+        for pkl_path in sorted(pickle_dir.glob("*.pkl")):
+            with open(pkl_path, "rb") as f:
+                parsed_doc = pickle.load(f)
+            store_path = save_chunk_store(parsed_doc, tmp, pkl_path.name)
+
+            def _load_pickle():
+                with open(pkl_path, "rb") as f:
+                    pickle.load(f)
+
+            pkl_ms = _best_of(_load_pickle)
+            pq_ms = _best_of(lambda: load_chunks(store_path))
+            page_ms = _best_of(lambda: load_chunks(store_path, pages=[0],
+                                                   columns=["chunk_id", "l", "t", "r", "b"]))
+            store_kb = (store_path.stat().st_size
+                        + store_path.with_suffix(".meta.json.gz").stat().st_size) / 1024
+            print(f"{pkl_path.stem[:60]:<60} {pkl_path.stat().st_size / 1024:>8.1f} "
+                  f"{store_kb:>8.1f} {pkl_ms:>8.2f} "
+                  f"{pq_ms:>8.2f} {page_ms:>8.2f}")
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+
+# One pool per process; keep-alive connections are reused across requests and sessions
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+class ConnectionStats:
+    """
+    Count requests and the distinct connections that served them.
+
+    httpx exposes the network stream of every response; a stream that has
+    not been seen before is a new connection (TCP + TLS handshake), a known
+    one is a reused keep-alive connection.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self._streams = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def record(self, response):
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            if stream not in self._streams:
+                self._streams.add(stream)
+                self.connections += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reuse_rate": 1 - self.connections / self.requests if self.requests else 0.0,
+            }
+
+
+openai_connection_stats = ConnectionStats()
+
+_lock = threading.Lock()
+_http_client = None
+_openai_client = None
+_async_openai_clients = weakref.WeakKeyDictionary()
+_pinecone_client = None
+_indexes = {}
+
+
+def get_http_client():
+    """
+    Return the shared synchronous httpx client.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT,
+                event_hooks={"response": [openai_connection_stats.record]})
+        return _http_client
+
+
+def get_openai_client():
+    """
+    Return the shared OpenAI client, backed by the pooled httpx client.
+    """
+    global _openai_client
+    from openai import OpenAI
+
+    http_client = get_http_client()
+    with _lock:
+        if _openai_client is None:
+            _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+        return _openai_client
+
+
+def get_async_openai_client():
+    """
+    Return the AsyncOpenAI client of the running event loop.
+
+    Async connection pools are bound to the loop they were created on, so
+    there is one client (and one httpx.AsyncClient pool) per loop, shared by
+    every coroutine on it.
+    """
+    from openai import AsyncOpenAI
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_openai_clients.get(loop)
+        if client is None:
+            async def _record(response):
+                openai_connection_stats.record(response)
+
+            http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT,
+                                            event_hooks={"response": [_record]})
+            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+            _async_openai_clients[loop] = client
+        return client
+
+
+def get_pinecone_client():
+    """
+    Return the shared Pinecone client.
+    """
+    global _pinecone_client
+    from pinecone import Pinecone
+
+    with _lock:
+        if _pinecone_client is None:
+            _pinecone_client = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        return _pinecone_client
+
+
+def get_index(index_name):
+    """
+    Return a cached `Index` handle.
+
+    Each handle owns a urllib3 connection pool, and resolving an index by
+    name costs a describe call, so handles are created once per index.
+    """
+    pc = get_pinecone_client()
+    with _lock:
+        index = _indexes.get(index_name)
+        if index is None:
+            index = _indexes[index_name] = pc.Index(index_name)
+        return index
+
+
+def _pool_manager(index):
+    """
+    The urllib3 PoolManager behind an Index handle, or None. It sits on
+    private attributes of the Pinecone client, so every hop may be missing
+    in other client versions.
+    """
+    obj = index
+    for attribute in ("_vector_api", "api_client", "rest_client", "pool_manager"):
+        obj = getattr(obj, attribute, None)
+        if obj is None:
+            return None
+    return obj
+
+
+def pinecone_connection_stats():
+    """
+    Requests sent and connections opened by the cached Index handles.
+
+    Returns:
+        dict: `requests`, `connections` and `reuse_rate`; empty when the
+            client does not expose its connection pools
+    """
+    requests = connections = 0
+    found = False
+    with _lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        pools = getattr(_pool_manager(index), "pools", None)
+        if pools is None:
+            continue
+        found = True
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests += getattr(pool, "num_requests", 0)
+                connections += getattr(pool, "num_connections", 0)
+    if indexes and not found:
+        return {}
+    return {
+        "requests": requests,
+        "connections": connections,
+        "reuse_rate": 1 - connections / requests if requests else 0.0,
+    }
+
+
+def connection_stats():
+    """
+    Connection reuse of the pooled OpenAI and Pinecone clients.
+    """
+    return {"openai": openai_connection_stats.stats(), "pinecone": pinecone_connection_stats()}
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import tiktoken
+
+DEFAULT_TOKEN_BUDGET = 2500
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Jaccard similarity of word 3-gram shingles
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+logger = logging.getLogger(__name__)
+
+# Fallback when the tokenizer's BPE file cannot be loaded (tiktoken downloads
+# it on first use, which fails offline): words split into pieces of up to 4
+# characters plus single punctuation marks, close to BPE counts for English.
+_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model_name):
+    """
+    The model's tiktoken encoding, or None (logged once per model) if it
+    cannot be loaded.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("Could not load the tiktoken encoding for %s (%s); token budgets "
+                       "use an approximate count", model_name, e)
+        return None
+
+
+def count_tokens(text, model_name="gpt-4o-mini"):
+    """
+    Count the tokens of a text with the model's tokenizer.
+
+    Falls back to a regex approximation if the encoding cannot be loaded.
+    """
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return len(_TOKEN_PATTERN.findall(text))
+    return len(encoding.encode(text))
+
+
+def _shingles(text, n=3):
+    words = _WORD_PATTERN.findall(text.casefold())
+    if len(words) < n:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class PackedContext:
+    """The contexts chosen for a prompt, in prompt order."""
+    contexts: list = field(default_factory=list)
+    chunk_ids: list = field(default_factory=list)
+    scores: list = field(default_factory=list)
+    tokens: int = 0
+    token_budget: int = 0
+    dropped: dict = field(default_factory=dict)  # chunk ID -> reason
+
+    def text(self, separator=CONTEXT_SEPARATOR, numbered=True):
+        """
+        Join the contexts. Numbered contexts ("[1] ...") can be cited by the
+        answer and mapped back to `chunk_ids`.
+        """
+        if numbered:
+            return separator.join(f"[{i}] {context}" for i, context in enumerate(self.contexts, 1))
+        return separator.join(self.contexts)
+
+
+def pack_contexts(context_list, chunk_ids=None, scores=None,
+                  token_budget=DEFAULT_TOKEN_BUDGET,
+                  model_name="gpt-4o-mini",
+                  near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Choose which retrieved contexts go into a prompt.
+
+    1. Exact duplicates (same normalized text) and near duplicates (shingle
+       Jaccard similarity above the threshold) of a better-scored context
+       are dropped.
+    2. If everything left fits in `token_budget`, everything is kept.
+       Otherwise contexts are picked greedily by score per token, so a long,
+       marginally relevant chunk does not crowd out several short, relevant
+       ones.
+    3. The chosen contexts are returned best score first.
+
+    Args:
+        context_list (list[str]): Retrieved chunk texts
+        chunk_ids (list[str]): Their chunk IDs, defaults to their positions
+        scores (list[float]): Their retrieval scores, higher is better;
+            defaults to 1 / rank
+        token_budget (int): Maximum tokens for all contexts together
+        model_name (str): Model whose tokenizer counts the tokens
+        near_duplicate_threshold (float): Similarity above which two
+            contexts count as duplicates
+
+    Returns:
+        PackedContext: The chosen contexts with their IDs, scores and tokens
+    """
+    n = len(context_list)
+    chunk_ids = list(chunk_ids) if chunk_ids is not None else [str(i) for i in range(n)]
+    if scores is None or any(s is None for s in scores):
+        scores = [1 / (rank + 1) for rank in range(n)]
+    order = sorted(range(n), key=lambda i: -scores[i])
+
+    packed = PackedContext(token_budget=token_budget)
+    kept, seen_hashes, kept_shingles = [], set(), []
+    for i in order:
+        normalized = " ".join(context_list[i].casefold().split())
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        if digest in seen_hashes:
+            packed.dropped[chunk_ids[i]] = "duplicate"
+            continue
+        shingles = _shingles(normalized)
+        if any(_jaccard(shingles, other) > near_duplicate_threshold for other in kept_shingles):
+            packed.dropped[chunk_ids[i]] = "near duplicate"
+            continue
+        seen_hashes.add(digest)
+        kept_shingles.append(shingles)
+        kept.append(i)
+
+    tokens = {i: count_tokens(context_list[i], model_name) for i in kept}
+    if sum(tokens.values()) <= token_budget:
+        chosen = kept
+    else:
+        chosen, used = [], 0
+        for i in sorted(kept, key=lambda i: -scores[i] / max(tokens[i], 1)):
+            if used + tokens[i] <= token_budget:
+                chosen.append(i)
+                used += tokens[i]
+            else:
+                packed.dropped[chunk_ids[i]] = "over budget"
+        chosen.sort(key=lambda i: -scores[i])
+
+    for i in chosen:
+        packed.contexts.append(context_list[i])
+        packed.chunk_ids.append(chunk_ids[i])
+        packed.scores.append(scores[i])
+        packed.tokens += tokens[i]
+    return packed
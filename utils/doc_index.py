@@ -0,0 +1,135 @@
+import threading
+import weakref
+from collections import defaultdict
+
+import numpy as np
+
+from .spatial_index import build_page_indexes
+
+
+def _chunk_type_value(chunk_type):
+    return getattr(chunk_type, "value", chunk_type)
+
+
+class ParsedDocIndex:
+    """
+    Lookup tables over the chunks of one parsed document, built in one pass.
+
+    Views:
+        by_id     chunk_id -> chunk
+        by_page   page -> chunks with at least one grounding box on that page,
+                  in document order
+        by_type   chunk type ("text", "table", ...) -> array of chunk IDs,
+                  in document order
+
+    A per-page spatial index over the grounding boxes is built on first use
+    by `chunks_at` / `chunks_in_rect`.
+
+    Args:
+        parsed_doc: A `ParsedDocument`, or the list returned by `parse()`
+    """
+
+    def __init__(self, parsed_doc):
+        if isinstance(parsed_doc, (list, tuple)):
+            parsed_doc = parsed_doc[0]
+        self.num_chunks = len(parsed_doc.chunks)
+        self.by_id = {}
+        self.by_page = defaultdict(list)
+        ids_by_type = defaultdict(list)
+        for chunk in parsed_doc.chunks:
+            self.by_id[chunk.chunk_id] = chunk
+            ids_by_type[_chunk_type_value(chunk.chunk_type)].append(chunk.chunk_id)
+            for page in dict.fromkeys(g.page for g in chunk.grounding):
+                self.by_page[page].append(chunk)
+        self.by_page = dict(self.by_page)
+        self.by_type = {t: np.array(ids) for t, ids in ids_by_type.items()}
+        self._parsed_doc = weakref.ref(parsed_doc)
+        self._spatial = None
+
+    def __len__(self):
+        return self.num_chunks
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.by_id
+
+    def get(self, chunk_id, default=None):
+        return self.by_id.get(chunk_id, default)
+
+    def chunks_on_page(self, page):
+        return self.by_page.get(page, [])
+
+    def ids_of_type(self, chunk_type):
+        return self.by_type.get(_chunk_type_value(chunk_type), np.array([], dtype=str))
+
+    def pages(self):
+        return sorted(self.by_page)
+
+    def spatial_index(self, page):
+        """
+        Return the PageSpatialIndex of a page, or None if the page has no boxes.
+        """
+        if self._spatial is None:
+            parsed_doc = self._parsed_doc()
+            if parsed_doc is None:
+                raise ReferenceError("The parsed document has been garbage collected")
+            self._spatial = build_page_indexes(parsed_doc)
+        return self._spatial.get(page)
+
+    def chunks_at(self, page, x, y):
+        """
+        Return the chunks whose boxes contain the normalized point (x, y).
+        """
+        page_index = self.spatial_index(page)
+        if page_index is None:
+            return []
+        return [self.by_id[chunk_id] for chunk_id in
+                dict.fromkeys(chunk_id for chunk_id, _ in page_index.query_point(x, y))]
+
+    def chunks_in_rect(self, page, left, top, right, bottom):
+        """
+        Return the chunks whose boxes intersect the normalized rectangle.
+        """
+        page_index = self.spatial_index(page)
+        if page_index is None:
+            return []
+        return [self.by_id[chunk_id] for chunk_id in
+                dict.fromkeys(chunk_id for chunk_id, _ in page_index.query_rect(left, top, right, bottom))]
+
+
+# Parsed documents are unhashable pydantic models, so the cache is keyed by
+# id() and entries are dropped by a weakref callback when the document dies.
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _forget(doc_id):
+    with _indexes_lock:
+        _indexes.pop(doc_id, None)
+
+
+def get_doc_index(parsed_doc):
+    """
+    Return the ParsedDocIndex for a parsed document, building it on first use.
+
+    The index lives as long as the document object. It is rebuilt if the
+    number of chunks has changed since it was built.
+
+    Args:
+        parsed_doc: A `ParsedDocument`, or the list returned by `parse()`
+
+    Returns:
+        ParsedDocIndex: The index
+    """
+    if isinstance(parsed_doc, (list, tuple)):
+        parsed_doc = parsed_doc[0]
+    doc_id = id(parsed_doc)
+    with _indexes_lock:
+        entry = _indexes.get(doc_id)
+        if entry is not None and entry[0]() is parsed_doc \
+                and entry[1].num_chunks == len(parsed_doc.chunks):
+            return entry[1]
+    doc_index = ParsedDocIndex(parsed_doc)
+    with _indexes_lock:
+        _indexes[doc_id] = (weakref.ref(parsed_doc, lambda _, doc_id=doc_id: _forget(doc_id)),
+                            doc_index)
+    return doc_index
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .parse_cache import cached_parse, has_parse_errors
+from .serialization import (parsed_doc_to_records, save_json, save_pickle,
+                            save_records)
+from .sharded_parse import sharded_parse
+
+ORIGINAL_FILES_DIR = Path("app_storage/original_files")
+JSON_DIR = Path("app_storage/parsed_docs_json")
+PICKLE_DIR = Path("app_storage/parsed_docs_pkl")
+RECORDS_DIR = Path("app_storage/records")
+MANIFEST_PATH = Path("app_storage/ingest_manifest.jsonl")
+
+
+class IngestManifest:
+    """
+    Append-only JSON Lines log of ingested files.
+
+    Each finished file appends one line, flushed and fsynced before the next
+    file is reported done, so a crashed run loses at most the files that were
+    in flight. Files are identified by path, size and mtime; a file that
+    changed on disk since it was ingested is ingested again.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    self.entries[entry["file"]] = entry
+
+    @staticmethod
+    def file_signature(file_path):
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_done(self, file_path, require_upsert=False):
+        entry = self.entries.get(str(file_path))
+        if entry is None or entry["status"] != "done":
+            return False
+        if entry["signature"] != self.file_signature(file_path):
+            return False
+        return entry.get("upserted", False) or not require_upsert
+
+    def record(self, file_path, status, **fields):
+        entry = {
+            "file": str(file_path),
+            "status": status,
+            "signature": self.file_signature(file_path),
+            "finished_at": time.time(),
+            **fields,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[entry["file"]] = entry
+        return entry
+
+
+def find_pdfs(input_dir, pattern="*.pdf", recursive=True):
+    """
+    List the PDF files under a directory in a stable order.
+    """
+    input_dir = Path(input_dir)
+    paths = input_dir.rglob(pattern) if recursive else input_dir.glob(pattern)
+    return sorted(p for p in paths if p.is_file())
+
+
+def document_name(file_path, input_dir=None):
+    """
+    Name of a PDF's outputs and namespace: the file stem, plus a short hash
+    of the path relative to `input_dir` for files in subdirectories, so that
+    a/report.pdf and b/report.pdf do not overwrite each other.
+    """
+    file_path = Path(file_path)
+    if input_dir is None:
+        return file_path.stem
+    relative = file_path.relative_to(input_dir)
+    if relative.parent == Path("."):
+        return file_path.stem
+    digest = hashlib.sha1(relative.as_posix().encode()).hexdigest()[:8]
+    return f"{file_path.stem}-{digest}"
+
+
+def ingest_file(file_path,
+                json_dir=JSON_DIR,
+                pickle_dir=PICKLE_DIR,
+                records_dir=RECORDS_DIR,
+                pages_per_shard=None,
+                upsert_fn=None,
+                bm25_index=None,
+                name=None):
+    """
+    Parse one PDF and write its JSON, pickle and records.
+
+    Args:
+        file_path (Path): The PDF to ingest
+        name (str): Name of the outputs and the namespace, defaults to the
+            file stem (see `document_name`)
+        json_dir, pickle_dir, records_dir: Output directories
+        pages_per_shard (int): Use sharded parsing with this shard size
+        upsert_fn (callable): Called as `upsert_fn(namespace, records)` to
+            upload the records, skipped if None
+        bm25_index (BM25Index): Keyword index to add the records to
+
+    Returns:
+        dict: Summary fields for the manifest
+
+    Raises:
+        RuntimeError: If the parse reported page errors or found no chunks,
+            so the file is recorded as failed and retried on the next run
+    """
+    file_path = Path(file_path)
+    if pages_per_shard:
+        parsed_doc = sharded_parse(str(file_path), pages_per_shard=pages_per_shard)
+    else:
+        parsed_doc = cached_parse(str(file_path))
+    if has_parse_errors(parsed_doc):
+        errors = [error for doc in parsed_doc for error in doc.errors]
+        raise RuntimeError(f"parse failed on {len(errors)} page(s): {errors[0].error}")
+    if not any(doc.chunks for doc in parsed_doc):
+        raise RuntimeError("parse returned no chunks")
+
+    namespace = name or file_path.stem
+    save_pickle(parsed_doc, save_dir=pickle_dir, file_name=namespace + ".pdf")
+    json_data, json_path = save_json(parsed_doc, doc_path=namespace + ".pdf", save_dir=json_dir)
+    records = parsed_doc_to_records(json_data, file_path.name)
+    records_path = save_records(records, save_dir=records_dir, file_name=namespace + ".pdf")
+
+    if bm25_index is not None:
+        bm25_index.add_records(namespace, records)
+    if upsert_fn is not None and records:
+        upsert_fn(namespace, records)
+
+    return {
+        "json_path": str(json_path),
+        "records_path": str(records_path),
+        "num_chunks": len(records),
+        "namespace": namespace,
+        "upserted": upsert_fn is not None,
+    }
+
+
+def ingest_directory(input_dir=ORIGINAL_FILES_DIR,
+                     concurrency=4,
+                     manifest_path=MANIFEST_PATH,
+                     pattern="*.pdf",
+                     recursive=True,
+                     upsert_fn=None,
+                     progress_fn=print,
+                     bm25_index=None,
+                     **ingest_kwargs):
+    """
+    Ingest every PDF under a directory with bounded concurrency, skipping
+    files the manifest already records as done.
+
+    At most `concurrency` files are parsed at once and no more than that are
+    queued, so memory stays flat however many files the directory holds.
+
+    Args:
+        input_dir (str): Directory to walk
+        concurrency (int): Maximum number of files in flight
+        manifest_path (str): Path to the resumable manifest
+        pattern (str): Glob pattern for input files
+        recursive (bool): Walk subdirectories as well
+        upsert_fn (callable): Optional `upsert_fn(namespace, records)`
+        progress_fn (callable): Called with a one-line status message per file
+        bm25_index (BM25Index): Keyword index updated with every ingested
+            file and saved at the end
+        **ingest_kwargs: Extra keyword arguments for `ingest_file`
+
+    Returns:
+        dict: Counts of done, skipped and failed files
+    """
+    manifest = IngestManifest(manifest_path)
+    require_upsert = upsert_fn is not None
+    all_files = find_pdfs(input_dir, pattern, recursive)
+    pending = [p for p in all_files
+               if not manifest.is_done(p, require_upsert=require_upsert)]
+    summary = {"done": 0, "failed": 0, "skipped": len(all_files) - len(pending)}
+    total = len(pending)
+
+    def _run(file_path):
+        start = time.perf_counter()
+        fields = ingest_file(file_path, upsert_fn=upsert_fn, bm25_index=bm25_index,
+                             name=document_name(file_path, input_dir), **ingest_kwargs)
+        fields["seconds"] = round(time.perf_counter() - start, 3)
+        return fields
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        queue = iter(pending)
+        while True:
+            while len(in_flight) < concurrency:
+                file_path = next(queue, None)
+                if file_path is None:
+                    break
+                in_flight[executor.submit(_run, file_path)] = file_path
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                file_path = in_flight.pop(future)
+                try:
+                    fields = future.result()
+                    manifest.record(file_path, "done", **fields)
+                    summary["done"] += 1
+                    status = f"done ({fields['num_chunks']} chunks, {fields['seconds']}s)"
+                except Exception as e:
+                    manifest.record(file_path, "failed", error=str(e))
+                    summary["failed"] += 1
+                    status = f"failed: {e}"
+                count = summary["done"] + summary["failed"]
+                progress_fn(f"[{count}/{total}] {file_path.name}: {status}")
+
+    if bm25_index is not None and summary["done"]:
+        bm25_index.save()
+    return summary
@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+METADATA_DB_PATH = Path("app_storage/chunk_metadata.sqlite")
+_SQL_VARIABLE_LIMIT = 900  # stay under SQLite's default limit of 999 bound parameters
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    namespace    TEXT NOT NULL,
+    chunk_id     TEXT NOT NULL,
+    pdf_filename TEXT,
+    pdf_page     INTEGER,
+    chunk_type   TEXT,
+    box          TEXT,
+    chunk_text   TEXT,
+    PRIMARY KEY (namespace, chunk_id)
+) WITHOUT ROWID
+"""
+_COLUMNS = ("pdf_filename", "pdf_page", "chunk_type", "box", "chunk_text")
+
+
+def _box_to_text(box):
+    if box is None or isinstance(box, str):
+        return box
+    return json.dumps(box)
+
+
+class MetadataStore:
+    """
+    Local SQLite copy of the per-chunk metadata sent to Pinecone.
+
+    Rows are keyed by (namespace, chunk_id) and hold the fields needed to
+    draw a chunk (file, page, box) plus its type and text, so those lookups
+    never need an `index.fetch` round trip. The database runs in WAL mode
+    and every thread gets its own connection, so upsert workers and
+    Streamlit sessions can read and write concurrently.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+    """
+
+    def __init__(self, db_path=METADATA_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put_records(self, namespace, records):
+        """
+        Insert or replace records in `upsert_records` format
+        (`_id`, `pdf_filename`, `pdf_page`, `chunk_type`, `box`, `chunk_text`).
+
+        Returns:
+            int: Number of rows written
+        """
+        rows = [
+            (namespace, record.get("_id", record.get("id")),
+             record.get("pdf_filename"),
+             None if record.get("pdf_page") is None else int(record["pdf_page"]),
+             record.get("chunk_type"),
+             _box_to_text(record.get("box")),
+             record.get("chunk_text"))
+            for record in records
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO chunks (namespace, chunk_id, {', '.join(_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_many(self, namespace, chunk_ids):
+        """
+        Look up many chunks in bulk.
+
+        Args:
+            namespace (str): Namespace the chunks were upserted into
+            chunk_ids (list[str]): Chunk IDs
+
+        Returns:
+            dict: chunk_id -> metadata dict, with `box` as a JSON string as in
+                Pinecone. IDs that are not stored are left out.
+        """
+        chunk_ids = list(dict.fromkeys(chunk_ids))
+        found = {}
+        conn = self._connect()
+        for start in range(0, len(chunk_ids), _SQL_VARIABLE_LIMIT):
+            batch = chunk_ids[start:start + _SQL_VARIABLE_LIMIT]
+            cursor = conn.execute(
+                f"SELECT chunk_id, {', '.join(_COLUMNS)} FROM chunks "
+                f"WHERE namespace = ? AND chunk_id IN ({', '.join('?' * len(batch))})",
+                [namespace, *batch])
+            for chunk_id, *values in cursor:
+                found[chunk_id] = dict(zip(_COLUMNS, values))
+        return found
+
+    def get(self, namespace, chunk_id):
+        return self.get_many(namespace, [chunk_id]).get(chunk_id)
+
+    def count(self, namespace):
+        cursor = self._connect().execute(
+            "SELECT COUNT(*) FROM chunks WHERE namespace = ?", (namespace,))
+        return cursor.fetchone()[0]
+
+    def delete(self, namespace, chunk_ids=None):
+        """
+        Delete some chunks of a namespace, or the whole namespace.
+        """
+        with self._connect() as conn:
+            if chunk_ids is None:
+                conn.execute("DELETE FROM chunks WHERE namespace = ?", (namespace,))
+                return
+            chunk_ids = list(chunk_ids)
+            for start in range(0, len(chunk_ids), _SQL_VARIABLE_LIMIT):
+                batch = chunk_ids[start:start + _SQL_VARIABLE_LIMIT]
+                conn.execute(
+                    f"DELETE FROM chunks WHERE namespace = ? "
+                    f"AND chunk_id IN ({', '.join('?' * len(batch))})",
+                    [namespace, *batch])
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_metadata_store():
+    """
+    Return the process-wide MetadataStore at `app_storage/chunk_metadata.sqlite`.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = MetadataStore()
+        return _default_store
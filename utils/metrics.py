@@ -0,0 +1,327 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT_SPANS = 1000  # spans kept for percentiles and the JSON export
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed run of a pipeline stage.
+
+    Attributes set with `set` end up in the JSON log. Three have a meaning
+    for the aggregated metrics: `bytes` and `items` (payload size) and
+    `cache_hit` (counted as a lookup of the stage's cache).
+    """
+
+    __slots__ = ("stage", "parent", "attributes", "start", "duration", "error")
+
+    def __init__(self, stage, parent=None, **attributes):
+        self.stage = stage
+        self.parent = parent
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def to_dict(self):
+        return {
+            "ts": self.start,
+            "stage": self.stage,
+            "parent": self.parent,
+            "duration_ms": round(1000 * self.duration, 3),
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class _StageStats:
+    __slots__ = ("count", "errors", "seconds", "buckets", "bytes", "items", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.bytes = 0
+        self.items = 0
+        self.recent = deque(maxlen=RECENT_SPANS)
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an ascending list; 0.0 when it is empty.
+
+    Args:
+        sorted_values (list[float]): Values in ascending order
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The value at that rank
+    """
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Process-wide store of stage timings, payload sizes and cache lookups.
+
+    Every finished span adds to its stage's count, total time, duration
+    histogram and payload counters, and to a bounded list of recent
+    durations used for percentiles. With a JSON log path (argument or the
+    `METRICS_JSON_LOG` environment variable) each span is also appended to
+    that file as one JSON line.
+
+    Args:
+        json_log_path (str): Optional JSON Lines file for finished spans
+    """
+
+    def __init__(self, json_log_path=None):
+        self._stages = defaultdict(_StageStats)
+        self._cache_lookups = defaultdict(lambda: [0, 0])  # cache -> [hits, misses]
+        self._recent_spans = deque(maxlen=RECENT_SPANS)
+        self._lock = threading.Lock()
+        self._log_file = None
+        json_log_path = json_log_path or os.getenv("METRICS_JSON_LOG")
+        if json_log_path:
+            self.set_json_log(json_log_path)
+
+    def set_json_log(self, path):
+        """
+        Append every finished span to `path` as a JSON line; None to stop.
+        """
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._log_file = open(path, "a", buffering=1)
+
+    def record(self, span):
+        span_dict = span.to_dict()
+        with self._lock:
+            stats = self._stages[span.stage]
+            stats.count += 1
+            stats.seconds += span.duration
+            stats.recent.append(span.duration)
+            if span.error is not None:
+                stats.errors += 1
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    stats.buckets[i] += 1
+                    break
+            stats.bytes += int(span.attributes.get("bytes", 0) or 0)
+            stats.items += int(span.attributes.get("items", 0) or 0)
+            cache_hit = span.attributes.get("cache_hit")
+            if cache_hit is not None:
+                self._cache_lookups[span.stage][0 if cache_hit else 1] += 1
+            self._recent_spans.append(span_dict)
+            if self._log_file is not None:
+                self._log_file.write(json.dumps(span_dict, default=str) + "\n")
+
+    def record_cache(self, cache, hit):
+        """
+        Count a cache lookup outside of a span.
+        """
+        with self._lock:
+            self._cache_lookups[cache][0 if hit else 1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._cache_lookups.clear()
+            self._recent_spans.clear()
+
+    def summary(self):
+        """
+        Per-stage counts, latency percentiles, payload totals and cache hit rates.
+        """
+        with self._lock:
+            stages = {}
+            for stage, stats in sorted(self._stages.items()):
+                recent = sorted(stats.recent)
+                stages[stage] = {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "total_s": round(stats.seconds, 4),
+                    "mean_ms": round(1000 * stats.seconds / stats.count, 3) if stats.count else 0.0,
+                    "p50_ms": round(1000 * percentile(recent, 50), 3),
+                    "p95_ms": round(1000 * percentile(recent, 95), 3),
+                    "max_ms": round(1000 * recent[-1], 3) if recent else 0.0,
+                    "bytes": stats.bytes,
+                    "items": stats.items,
+                }
+            caches = {
+                cache: {"hits": hits, "misses": misses,
+                        "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+                for cache, (hits, misses) in sorted(self._cache_lookups.items())
+            }
+        return {"stages": stages, "caches": caches}
+
+    def to_json(self, recent_spans=True):
+        """
+        The summary and (optionally) the recent spans as a JSON document.
+        """
+        document = self.summary()
+        if recent_spans:
+            with self._lock:
+                document["recent_spans"] = list(self._recent_spans)
+        return json.dumps(document, default=str)
+
+    def to_prometheus(self, prefix="landing_ai"):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            stages = sorted(self._stages.items())
+            caches = sorted(self._cache_lookups.items())
+            lines = [
+                f"# HELP {prefix}_stage_duration_seconds Time spent per pipeline stage",
+                f"# TYPE {prefix}_stage_duration_seconds histogram",
+            ]
+            for stage, stats in stages:
+                label = f'stage="{_escape(stage)}"'
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f"{prefix}_stage_duration_seconds_sum{{{label}}} {stats.seconds:.6f}")
+                lines.append(f"{prefix}_stage_duration_seconds_count{{{label}}} {stats.count}")
+            for name, attribute, help_text in (
+                    ("stage_errors_total", "errors", "Stage runs that raised"),
+                    ("stage_payload_bytes_total", "bytes", "Bytes produced or moved per stage"),
+                    ("stage_payload_items_total", "items", "Items (chunks, pages, records) per stage")):
+                lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+                lines += [f'{prefix}_{name}{{stage="{_escape(stage)}"}} {getattr(stats, attribute)}'
+                          for stage, stats in stages]
+            lines += [f"# HELP {prefix}_cache_lookups_total Cache lookups by result",
+                      f"# TYPE {prefix}_cache_lookups_total counter"]
+            for cache, (hits, misses) in caches:
+                lines.append(f'{prefix}_cache_lookups_total{{cache="{_escape(cache)}",result="hit"}} {hits}')
+                lines.append(f'{prefix}_cache_lookups_total{{cache="{_escape(cache)}",result="miss"}} {misses}')
+        return "\n".join(lines) + "\n"
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the process-wide MetricsRegistry shared by all Streamlit sessions.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
+
+
+class span:
+    """
+    Time a block as one run of a pipeline stage.
+
+        with span("search", namespace=namespace) as s:
+            hits = backend.search(...)
+            s.set(items=len(hits))
+
+    Spans opened inside another span record it as their parent, so the
+    JSON log shows which stage a nested call belonged to.
+    """
+
+    __slots__ = ("_span", "_token", "_start")
+
+    def __init__(self, stage, **attributes):
+        parent = _current_span.get()
+        self._span = Span(stage, parent.stage if parent is not None else None, **attributes)
+        self._token = None
+        self._start = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self._span)
+        self._start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        self._span.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self._span.error = exc_type.__name__
+        _current_span.reset(self._token)
+        get_metrics().record(self._span)
+        return False
+
+
+def timed(stage, payload=None):
+    """
+    Decorator that runs a function inside `span(stage)`.
+
+    Args:
+        stage (str): Stage name
+        payload (callable): Optional `payload(result)` returning span
+            attributes such as `bytes`, `items` or `cache_hit`
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage) as s:
+                result = fn(*args, **kwargs)
+                if payload is not None:
+                    s.set(**payload(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """
+    The innermost open span, or None; lets callees add attributes.
+    """
+    return _current_span.get()
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def array_bytes(images):
+    return sum(getattr(img, "nbytes", 0) for img in images)
+
+
+if __name__ == "__main__":
+    registry = get_metrics()
+
+    @timed("noop")
+    def noop():
+        pass
+
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        noop()
+    per_span = (time.perf_counter() - start) / n
+    print(f"{per_span * 1e6:.2f} us per span")
+    print(registry.to_prometheus())
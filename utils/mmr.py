@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def mmr_select(query_vector, candidate_vectors, k, lambda_mult=0.5):
+    """
+    Pick a relevant but diverse subset of candidates with maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+        lambda * sim(query, c) - (1 - lambda) * max sim(c, already picked)
+    All similarities are cosine and computed up front with two matrix
+    products; the running "max similarity to the picked set" is updated with
+    one vector operation per step.
+
+    Args:
+        query_vector (array-like): (d,) query embedding
+        candidate_vectors (array-like): (n, d) candidate embeddings
+        k (int): Number of candidates to pick
+        lambda_mult (float): 1 ranks by relevance only, 0 by diversity only
+
+    Returns:
+        list[int]: Indices of the picked candidates, in pick order
+    """
+    candidates = _normalize(candidate_vectors)
+    n = len(candidates)
+    k = min(k, n)
+    if k == 0:
+        return []
+    relevance = candidates @ _normalize(query_vector)
+    similarity = candidates @ candidates.T
+
+    picked = [int(np.argmax(relevance))]
+    max_similarity = similarity[picked[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[picked[0]] = False
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return picked
+
+
+def mmr_rerank(hits, query_vector, candidate_vectors, k, lambda_mult=0.5):
+    """
+    Apply `mmr_select` to search hits that come with their vectors.
+
+    Args:
+        hits (list[dict]): Over-fetched hits, one per row of `candidate_vectors`
+        query_vector (array-like): (d,) query embedding
+        candidate_vectors (array-like): (n, d) embeddings of the hits
+        k (int): Number of hits to keep
+        lambda_mult (float): Relevance/diversity trade-off
+
+    Returns:
+        list[dict]: The picked hits, in pick order
+    """
+    return [hits[i] for i in mmr_select(query_vector, candidate_vectors, k, lambda_mult)]
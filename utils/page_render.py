@@ -0,0 +1,275 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pymupdf
+
+DEFAULT_DPI = 72  # pymupdf's default, same page size as `pdf_to_images`
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+PAGE_CACHE_DIR = Path("app_storage/page_cache")
+DEFAULT_DISK_CACHE_BYTES = 2 * 1024 ** 3
+DISK_EVICT_TARGET = 0.9  # eviction frees space down to this fraction of max_bytes
+
+
+def file_sha256(file_path):
+    """
+    Compute the SHA-256 hex digest of a file.
+    """
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class DiskPageCache:
+    """
+    Rendered pages stored on disk as raw `.npy` files, shared by processes.
+
+    The directory layout is the index: `<file hash>/p<page>_d<dpi>.npy`.
+    Reads memory-map the file read-only, so a page rendered by one worker
+    is reused by every other worker without decoding. Writes go to a temp
+    file that is renamed into place, so readers never see a partial file.
+    The total size is tracked with a running count, seeded by one scan of
+    the directory. Only when it passes `max_bytes` is the directory scanned
+    again and the least recently used files (by mtime, refreshed on every
+    hit) deleted, down to `DISK_EVICT_TARGET` of the limit so that the next
+    writes do not trigger another scan right away. Files written by other
+    processes are counted at that scan.
+
+    Args:
+        cache_dir (str): Root directory of the cache
+        max_bytes (int): Upper bound on the total size of cached files
+    """
+
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, max_bytes=DEFAULT_DISK_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._total_bytes = None  # running size estimate, seeded on the first write
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        file_hash, page_number, dpi = key
+        return self.cache_dir / file_hash / f"p{page_number}_d{dpi}.npy"
+
+    def get(self, key):
+        """
+        Return the cached page as a read-only memory map, or None.
+        """
+        path = self._path(key)
+        try:
+            img = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return img
+
+    def put(self, key, img):
+        """
+        Atomically write a rendered page to the cache.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(img))
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            # e.g. another process has the target mapped on Windows; its copy is identical
+            written = replaced
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self.size_bytes()
+            else:
+                self._total_bytes += written - replaced
+            if self._total_bytes > self.max_bytes:
+                self._total_bytes = self._evict(int(self.max_bytes * DISK_EVICT_TARGET))
+        return path
+
+    def size_bytes(self):
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*/*.npy"))
+
+    def _evict(self, target_bytes):
+        """
+        Delete the least recently used files until at most `target_bytes`
+        remain. Returns the remaining total.
+        """
+        entries = []
+        for path in self.cache_dir.glob("*/*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= target_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass  # still mapped by a reader on Windows, try again next time
+        return total
+
+
+class PageRenderer:
+    """
+    Render single PDF pages on demand and keep them in an in-memory LRU.
+
+    Documents are opened once and kept open, and only the requested page is
+    rasterized. Rendered pages are cached by (file hash, page, dpi) and the
+    cache is bounded by the total bytes of the cached images. Cached images
+    are read-only; copy them before drawing on them.
+
+    With a `disk_cache`, pages missing from memory are looked up on disk
+    before they are rendered, and newly rendered pages are written there.
+
+    Args:
+        max_bytes (int): Upper bound on the bytes of cached page images
+        max_open_docs (int): Number of PDF documents kept open
+        disk_cache (DiskPageCache): Optional cache shared across processes
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, max_open_docs=8, disk_cache=None):
+        self.max_bytes = max_bytes
+        self.max_open_docs = max_open_docs
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._pages_bytes = 0
+        self._docs = OrderedDict()
+        self._hashes = {}
+        # pymupdf documents are not thread-safe, so rendering is serialized
+        self._lock = threading.RLock()
+
+    def file_hash(self, pdf_path):
+        """
+        Content hash of a PDF, recomputed only when its size or mtime change.
+        """
+        pdf_path = os.fspath(pdf_path)
+        stat = os.stat(pdf_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(pdf_path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, file_sha256(pdf_path))
+            self._hashes[pdf_path] = cached
+        return cached[1]
+
+    def _open(self, pdf_path, file_hash):
+        doc = self._docs.get(file_hash)
+        if doc is None:
+            doc = pymupdf.open(pdf_path)
+            self._docs[file_hash] = doc
+            while len(self._docs) > self.max_open_docs:
+                _, old_doc = self._docs.popitem(last=False)
+                old_doc.close()
+        else:
+            self._docs.move_to_end(file_hash)
+        return doc
+
+    def page_count(self, pdf_path):
+        with self._lock:
+            return len(self._open(pdf_path, self.file_hash(pdf_path)))
+
+    def _rasterize(self, pdf_path, file_hash, page_number, dpi):
+        page = self._open(pdf_path, file_hash)[page_number]
+        pix = page.get_pixmap(dpi=dpi, alpha=False)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+            pix.height, pix.width, pix.n).copy()
+
+    def _store(self, key, img):
+        if img.flags.writeable:
+            img.flags.writeable = False
+        self._pages[key] = img
+        self._pages_bytes += img.nbytes
+        while self._pages_bytes > self.max_bytes and len(self._pages) > 1:
+            _, old = self._pages.popitem(last=False)
+            self._pages_bytes -= old.nbytes
+
+    def render_page(self, pdf_path, page_number, dpi=DEFAULT_DPI):
+        """
+        Render one page of a PDF as an RGB image.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_number (int): Zero-based page index
+            dpi (int): Render resolution
+
+        Returns:
+            np.ndarray: Read-only (height, width, 3) uint8 RGB image
+        """
+        with self._lock:
+            file_hash = self.file_hash(pdf_path)
+            key = (file_hash, int(page_number), int(dpi))
+            img = self._pages.get(key)
+            if img is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return img
+            if self.disk_cache is not None:
+                img = self.disk_cache.get(key)
+                if img is not None:
+                    self.disk_hits += 1
+                    self._store(key, img)
+                    return img
+            self.misses += 1
+            img = self._rasterize(pdf_path, file_hash, int(page_number), int(dpi))
+            if self.disk_cache is not None:
+                self.disk_cache.put(key, img)
+            self._store(key, img)
+            return img
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "cached_pages": len(self._pages),
+                "cached_bytes": self._pages_bytes,
+                "open_docs": len(self._docs),
+            }
+
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_page_renderer():
+    """
+    Return the process-wide PageRenderer, backed by the shared disk cache
+    under `app_storage/page_cache`.
+    """
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = PageRenderer(disk_cache=DiskPageCache())
+        return _default_renderer
+
+
+def render_page(pdf_path, page_number, dpi=DEFAULT_DPI):
+    """
+    Render one page of a PDF with the shared PageRenderer.
+    """
+    return get_page_renderer().render_page(pdf_path, page_number, dpi)
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+
+from agentic_doc.parse import parse
+
+from .metrics import span
+
+PARSE_CACHE_DIR = Path("app_storage/parse_cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+
+def hash_pdf(file_path, options=None):
+    """
+    Compute the cache key for a PDF file and its parse options.
+
+    Args:
+        file_path (str): Path to the PDF file
+        options (dict): Keyword arguments passed to `parse()`
+
+    Returns:
+        str: SHA-256 hex digest of the file bytes plus the options
+    """
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    # Options are part of the key so a different parse config is a different entry
+    sha.update(json.dumps(options or {}, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
+
+
+def has_parse_errors(parsed_documents):
+    """
+    Whether a parse result is incomplete: agentic_doc reports failed pages
+    (API or network errors) in `errors` instead of raising.
+    """
+    return any(doc.errors for doc in parsed_documents)
+
+
+class ParseCache:
+    """
+    Content-addressed cache of agentic_doc parse results stored on disk.
+
+    Results with page errors are not stored, so a transient failure is
+    retried on the next parse instead of being served from the cache.
+
+    Entries are pickles named by their key. The file mtime is refreshed on
+    every hit, so evicting the oldest mtimes first gives LRU eviction once
+    the total size of the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key):
+        """
+        Return the cached parse result for a key, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                parsed_documents = pickle.load(f)
+            os.utime(path)  # mark as most recently used
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return parsed_documents
+
+    def put(self, key, parsed_documents):
+        """
+        Store a parse result under a key and evict old entries if needed.
+
+        Returns:
+            Path: The path to the cache entry
+        """
+        path = self._entry_path(key)
+        # Write to a temp file first so readers never see a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(parsed_documents, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep=None):
+        entries = []
+        for path in self.cache_dir.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def size_bytes(self):
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*.pkl"))
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.pkl"):
+            path.unlink()
+
+    def stats(self):
+        """
+        Return hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(list(self.cache_dir.glob("*.pkl"))),
+                "size_bytes": self.size_bytes(),
+            }
+
+    def get_or_parse(self, file_path, **parse_kwargs):
+        """
+        Parse a PDF, returning the cached result if the same bytes and
+        options were parsed before.
+
+        Args:
+            file_path (str): Path to the PDF file
+            **parse_kwargs: Extra keyword arguments for agentic_doc `parse()`
+
+        Returns:
+            tuple: The parsed documents, as returned by `parse()`, and
+                whether they came from the cache
+        """
+        key = hash_pdf(file_path, parse_kwargs)
+        parsed_documents = self.get(key)
+        if parsed_documents is not None:
+            return parsed_documents, True
+        parsed_documents = parse(file_path, **parse_kwargs)
+        if not has_parse_errors(parsed_documents):
+            self.put(key, parsed_documents)
+        return parsed_documents, False
+
+    def parse(self, file_path, **parse_kwargs):
+        """
+        Like `get_or_parse`, but return only the parsed documents.
+        """
+        return self.get_or_parse(file_path, **parse_kwargs)[0]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Return the process-wide parse cache under `app_storage/parse_cache`.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ParseCache()
+        return _default_cache
+
+
+def cached_parse(file_path, cache=None, **parse_kwargs):
+    """
+    Drop-in replacement for agentic_doc `parse()` backed by a ParseCache.
+
+    Args:
+        file_path (str): Path to the PDF file
+        cache (ParseCache): Cache to use, defaults to the shared cache
+        **parse_kwargs: Extra keyword arguments for agentic_doc `parse()`
+
+    Returns:
+        list: The parsed documents
+    """
+    cache = cache or get_parse_cache()
+    with span("parse") as s:
+        parsed_documents, hit = cache.get_or_parse(file_path, **parse_kwargs)
+        s.set(cache_hit=hit, items=sum(len(doc.chunks) for doc in parsed_documents))
+    return parsed_documents
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+
+
+def count_pages(pdf_path):
+    """
+    Count the pages in a PDF file.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        int: The number of pages
+    """
+    return len(PdfReader(pdf_path).pages)
+
+
+def page_ranges(num_pages, pages_per_range):
+    """
+    Cut a page count into consecutive page ranges.
+
+    Args:
+        num_pages (int): Total number of pages
+        pages_per_range (int): Maximum number of pages per range
+
+    Returns:
+        list[tuple[int, int]]: Zero-based (start, end) ranges, end inclusive
+    """
+    if pages_per_range < 1:
+        raise ValueError("pages_per_range must be at least 1")
+    return [(start, min(start + pages_per_range, num_pages) - 1)
+            for start in range(0, num_pages, pages_per_range)]
+
+
+def write_page_range(reader, start_page, end_page, output_path):
+    """
+    Write a range of pages from an open PDF to a new PDF file.
+
+    Args:
+        reader (PdfReader): The source PDF
+        start_page (int): Zero-based index of the first page
+        end_page (int): Zero-based index of the last page, inclusive
+        output_path (str | file): Path or binary file object to write to
+
+    Returns:
+        str | file: The output path or file object
+    """
+    writer = PdfWriter()
+    for page_num in range(start_page, end_page + 1):
+        writer.add_page(reader.pages[page_num])
+    if isinstance(output_path, (str, Path)):
+        with open(output_path, "wb") as f:
+            writer.write(f)
+    else:
+        writer.write(output_path)
+    return output_path
+
+
+def split_pdf_into_ranges(pdf_path, output_dir, pages_per_range):
+    """
+    Split a PDF into several smaller PDFs of at most `pages_per_range` pages.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        output_dir (str): Directory to write the parts into
+        pages_per_range (int): Maximum number of pages per part
+
+    Returns:
+        list[tuple[Path, int, int]]: (part path, start page, end page) per part
+    """
+    reader = PdfReader(pdf_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(pdf_path).stem
+    parts = []
+    for start, end in page_ranges(len(reader.pages), pages_per_range):
+        part_path = output_dir / f"{stem}_pages_{start + 1}_to_{end + 1}.pdf"
+        write_page_range(reader, start, end, part_path)
+        parts.append((part_path, start, end))
+    return parts
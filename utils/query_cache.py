@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 600
+
+
+def normalize_query(query):
+    """
+    Normalize a query for cache lookups: case-folded, whitespace collapsed.
+    """
+    return " ".join(query.casefold().split())
+
+
+class QueryCache:
+    """
+    In-memory LRU cache of search results with a time-to-live.
+
+    Keys are (backend, index, namespace, normalized query, top_k, filter).
+    Every namespace has a generation counter that is bumped whenever its
+    records change (upsert, delete, local rebuild); entries remember the
+    generation they were computed under and are never served once it has
+    moved on.
+
+    Args:
+        max_entries (int): Maximum number of cached results
+        ttl (float): Seconds a result stays valid
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(index_name, namespace, query, top_k, filter=None, backend="pinecone"):
+        filter_key = json.dumps(filter, sort_keys=True, default=str) if filter else None
+        return (backend, index_name, namespace, normalize_query(query), int(top_k), filter_key)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def invalidate_namespace(self, namespace):
+        """
+        Bump the generation of a namespace so its cached results are stale.
+        """
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            stale = [key for key in self._entries if key[2] == namespace]
+            for key in stale:
+                del self._entries[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generation, expires_at, value = entry
+                if generation == self._generations.get(key[2], 0) and time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation):
+        """
+        Store a result computed while the namespace was at `generation`.
+
+        The generation must be read before the search starts, so a result
+        that raced with an upsert is dropped instead of cached.
+        """
+        with self._lock:
+            if generation != self._generations.get(key[2], 0):
+                return
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    """
+    Return the process-wide QueryCache shared by all Streamlit sessions.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = QueryCache()
+        return _default_cache
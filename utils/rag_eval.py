@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .metrics import percentile
+
+EVAL_OUTPUT_PATH = Path("app_storage/eval/results.jsonl")
+STAGES = ("retrieve", "generate", "total")
+
+
+def load_questions(path):
+    """
+    Read a JSON Lines question file.
+
+    Each line holds a `question` and optionally an `id`, a `namespace` and
+    `relevant_chunk_ids` (the labeled chunks used for recall@k).
+    """
+    questions = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", str(line_number))
+            questions.append(item)
+    return questions
+
+
+def recall_at_k(retrieved_ids, relevant_ids, k):
+    """
+    Fraction of the relevant chunks found in the first `k` retrieved ones,
+    or None when the question has no labels.
+    """
+    relevant = set(relevant_ids or ())
+    if not relevant:
+        return None
+    return len(relevant & set(retrieved_ids[:k])) / len(relevant)
+
+
+async def _evaluate_one(item, index_name, namespace, top_k, model_name, temperature,
+                        retrieval_only, use_cache, mmr_lambda, retrieve_fn, answer_fn):
+    result = {"id": item["id"], "question": item["question"],
+              "namespace": item.get("namespace", namespace)}
+    start = time.perf_counter()
+    try:
+        chunk_ids, metadata_list = await retrieve_fn(
+            item["question"], index_name, result["namespace"], top_k,
+            use_cache=use_cache, mmr_lambda=mmr_lambda)
+        retrieved = time.perf_counter()
+        result["chunk_ids"] = chunk_ids
+        result["recall"] = recall_at_k(chunk_ids, item.get("relevant_chunk_ids"), top_k)
+        timings = {"retrieve": retrieved - start}
+        if not retrieval_only:
+            result["answer"] = await answer_fn(
+                item["question"], [metadata["chunk_text"] for metadata in metadata_list],
+                model_name=model_name, chunk_ids=chunk_ids,
+                scores=[metadata.get("_score") for metadata in metadata_list],
+                temperature=temperature, use_cache=use_cache)
+            timings["generate"] = time.perf_counter() - retrieved
+        timings["total"] = time.perf_counter() - start
+        result["timings"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_eval_async(questions, index_name, namespace=None, top_k=5, concurrency=8,
+                         model_name="gpt-4o-mini", temperature=0.1, retrieval_only=False,
+                         use_cache=True, mmr_lambda=None, output_path=None,
+                         retrieve_fn=None, answer_fn=None):
+    """
+    Run retrieval and generation for many questions with bounded concurrency.
+
+    At most `concurrency` questions are in flight; each one retrieves its
+    contexts and then generates its answer on the shared async clients.
+    The default retrieval runs on a thread pool of `concurrency` workers,
+    so it is not capped by the event loop's default executor.
+    Results are written to `output_path` (one JSON line per question, in
+    completion order) as soon as they finish.
+
+    Args:
+        questions (list[dict]): Items from `load_questions`
+        index_name (str): Pinecone index
+        namespace (str): Namespace for questions that do not name one
+        top_k (int): Chunks retrieved per question (the k of recall@k)
+        concurrency (int): Questions in flight at once
+        model_name (str): Model that answers
+        temperature (float): Sampling temperature
+        retrieval_only (bool): Skip generation, e.g. to measure recall only
+        use_cache (bool): Use the query and answer caches
+        mmr_lambda (float): Diversify the retrieved chunks with MMR
+        output_path (str): JSON Lines file for the per-question results
+        retrieve_fn (callable): Defaults to `retrieve_contexts_async`
+        answer_fn (callable): Defaults to `rag_response_async`
+
+    Returns:
+        tuple[list[dict], dict]: Per-question results in input order, and
+            the `summarize` report
+    """
+    executor = None
+    if retrieve_fn is None or answer_fn is None:
+        from .vector_db import rag_response_async, retrieve_contexts_async
+        if retrieve_fn is None:
+            executor = ThreadPoolExecutor(max_workers=concurrency,
+                                          thread_name_prefix="rag-eval-retrieve")
+            retrieve_fn = functools.partial(retrieve_contexts_async, executor=executor)
+        answer_fn = answer_fn or rag_response_async
+
+    semaphore = asyncio.Semaphore(concurrency)
+    out = None
+    if output_path is not None:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        out = open(output_path, "w")
+
+    async def bounded(item):
+        async with semaphore:
+            result = await _evaluate_one(item, index_name, namespace, top_k, model_name,
+                                         temperature, retrieval_only, use_cache, mmr_lambda,
+                                         retrieve_fn, answer_fn)
+        if out is not None:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+        return result
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(bounded(item) for item in questions))
+    finally:
+        if out is not None:
+            out.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+    return results, summarize(results, time.perf_counter() - start, top_k)
+
+
+def run_eval(questions, index_name, **kwargs):
+    """
+    Synchronous entry point for `run_eval_async`.
+    """
+    return asyncio.run(run_eval_async(questions, index_name, **kwargs))
+
+
+def summarize(results, seconds, top_k):
+    """
+    Latency percentiles per stage, throughput and mean recall@k of a run.
+    """
+    succeeded = [result for result in results if "error" not in result]
+    summary = {
+        "questions": len(results),
+        "errors": len(results) - len(succeeded),
+        "seconds": round(seconds, 3),
+        "questions_per_second": round(len(succeeded) / seconds, 2) if seconds else 0.0,
+    }
+    for stage in STAGES:
+        latencies = sorted(result["timings"][stage] for result in succeeded
+                           if stage in result["timings"])
+        if latencies:
+            for q in (50, 95, 99):
+                summary[f"{stage}_p{q}_ms"] = round(1000 * percentile(latencies, q), 1)
+    recalls = [result["recall"] for result in succeeded if result.get("recall") is not None]
+    summary[f"recall@{top_k}"] = round(sum(recalls) / len(recalls), 4) if recalls else None
+    summary["labeled_questions"] = len(recalls)
+    return summary
@@ -0,0 +1,358 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .query_cache import get_query_cache
+
+LOCAL_INDEX_DIR = Path("app_storage/local_index")
+_SEARCH_BLOCK_ROWS = 16384  # rows of the matrix scored per matmul
+MAX_FILTER_MASKS = 64  # filter masks kept per LocalIndex, least recently used evicted
+
+
+class SearchBackend:
+    """
+    Interface for vector search used by `retrieve_contexts`.
+
+    `search` returns hits in the shape of Pinecone's search API:
+    a list of dicts with `_id`, `_score` and `fields` (the record metadata),
+    best match first.
+    """
+
+    @property
+    def cache_key(self):
+        """
+        Identifies this backend's results in the query cache. Backends that
+        can serve different data for the same index and namespace names
+        must override it.
+        """
+        return type(self).__name__
+
+    def search(self, query, namespace, top_k=2, filter=None):
+        raise NotImplementedError
+
+    def search_batch(self, queries, namespace, top_k=2, filter=None):
+        return [self.search(q, namespace, top_k, filter) for q in queries]
+
+    def search_with_vectors(self, query, namespace, top_k=2, filter=None):
+        """
+        Search and also return the query embedding and the hits' embeddings,
+        as needed for MMR.
+
+        Returns:
+            tuple: hits, (d,) query vector, (n, d) hit vectors
+        """
+        raise NotImplementedError
+
+
+class PineconeBackend(SearchBackend):
+    """
+    Search a Pinecone index with integrated inference (server-side embedding).
+
+    Args:
+        index: A Pinecone `Index` handle
+        embed_fn (callable): Query embedder, only needed by `search_with_vectors`
+    """
+
+    def __init__(self, index, embed_fn=None):
+        self.index = index
+        self.embed_fn = embed_fn
+
+    def search(self, query, namespace, top_k=2, filter=None):
+        search_query = {"top_k": top_k, "inputs": {"text": query}}
+        if filter:
+            search_query["filter"] = filter
+        search_results = self.index.search(namespace=namespace, query=search_query)
+        return [
+            {"_id": hit["_id"], "_score": hit["_score"], "fields": dict(hit["fields"])}
+            for hit in search_results["result"]["hits"]
+        ]
+
+    def search_with_vectors(self, query, namespace, top_k=2, filter=None):
+        if self.embed_fn is None:
+            raise ValueError("PineconeBackend needs an embed_fn to return query vectors")
+        hits = self.search(query, namespace, top_k, filter)
+        query_vector = np.asarray(self.embed_fn([query])[0], dtype=np.float32)
+        if not hits:
+            return hits, query_vector, np.empty((0, len(query_vector)), dtype=np.float32)
+        # Integrated-inference search does not return values, so fetch them in one call
+        vectors = self.index.fetch(ids=[hit["_id"] for hit in hits], namespace=namespace).vectors
+        hits = [hit for hit in hits if hit["_id"] in vectors]
+        hit_vectors = np.asarray([vectors[hit["_id"]].values for hit in hits], dtype=np.float32)
+        return hits, query_vector, hit_vectors
+
+
+def _matches(metadata, filter):
+    """
+    Evaluate a Pinecone-style metadata filter against one record.
+    Supports field equality and the $eq, $ne, $in, $nin, $gt(e), $lt(e) operators.
+    """
+    for key, condition in filter.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if op == "$eq" and value != operand:
+                return False
+            if op == "$ne" and value == operand:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$nin" and value in operand:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+    return True
+
+
+class LocalIndex(SearchBackend):
+    """
+    Exact cosine-similarity search over embeddings stored on local disk.
+
+    Each namespace is a directory under `root` holding:
+        embeddings.npy   float32 (n, d) matrix of L2-normalized vectors,
+                         memory-mapped read-only
+        metadata.jsonl   one record per row: {"_id": ..., "fields": {...}}
+
+    Queries are scored with one matrix product per block of rows, without
+    any network call. Blocks are scored on a thread pool (matmul releases
+    the GIL) and each keeps only its own top-k, so the full score row is
+    never materialized. Scoring reads the whole matrix once per batch of
+    queries and is bound by memory bandwidth: on one core a 100k x 1024
+    namespace (400 MB) takes about 40 ms for a single query and about 15 ms
+    per query in a batch of 8 (see `python -m utils.search_backends`).
+    More cores raise the bandwidth available to the block workers; smaller
+    embeddings or fewer rows scale the cost down linearly.
+
+    Args:
+        root (str): Directory holding one subdirectory per namespace
+        embed_fn (callable): Maps a list of query strings to an (n, d) array.
+            Only needed when searching by text rather than by vector.
+        max_workers (int): Threads scoring blocks in parallel, defaults to
+            the number of CPUs
+    """
+
+    def __init__(self, root=LOCAL_INDEX_DIR, embed_fn=None, max_workers=None):
+        self.root = Path(root)
+        self.embed_fn = embed_fn
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._namespaces = {}
+        self._filter_masks = OrderedDict()
+        self._masks_lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def cache_key(self):
+        return f"LocalIndex:{self.root.resolve()}"
+
+    # -- building ---------------------------------------------------------
+
+    def build(self, namespace, ids, embeddings, metadata):
+        """
+        Write (or replace) a namespace on disk.
+
+        Args:
+            namespace (str): Namespace name
+            ids (list[str]): Record IDs, one per row
+            embeddings (array-like): (n, d) embedding matrix
+            metadata (list[dict]): Record metadata, one per row
+
+        Returns:
+            Path: The namespace directory
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or not len(embeddings) == len(ids) == len(metadata):
+            raise ValueError("ids, embeddings and metadata must have matching lengths")
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+
+        ns_dir = self.root / namespace
+        ns_dir.mkdir(parents=True, exist_ok=True)
+        # Write both files next to their final location, then swap them in
+        fd, tmp_npy = tempfile.mkstemp(dir=ns_dir, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, embeddings)
+        fd, tmp_meta = tempfile.mkstemp(dir=ns_dir, suffix=".jsonl")
+        with os.fdopen(fd, "w") as f:
+            for record_id, fields in zip(ids, metadata):
+                f.write(json.dumps({"_id": record_id, "fields": fields}, default=str) + "\n")
+        os.replace(tmp_npy, ns_dir / "embeddings.npy")
+        os.replace(tmp_meta, ns_dir / "metadata.jsonl")
+
+        self._namespaces.pop(namespace, None)
+        get_query_cache().invalidate_namespace(namespace)
+        with self._masks_lock:
+            for key in [key for key in self._filter_masks if key[0] == namespace]:
+                del self._filter_masks[key]
+        return ns_dir
+
+    def build_from_dataframe(self, namespace, df):
+        """
+        Build a namespace from the DataFrame returned by `get_vector_db_as_df`.
+        """
+        meta_cols = [c for c in df.columns if c not in ("id", "embedding", "dimensions")]
+        metadata = df[meta_cols].to_dict(orient="records")
+        return self.build(namespace, df["id"].tolist(), np.stack(df["embedding"].to_numpy()), metadata)
+
+    # -- searching --------------------------------------------------------
+
+    def namespaces(self):
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "embeddings.npy").exists())
+
+    def _load(self, namespace):
+        if namespace not in self._namespaces:
+            ns_dir = self.root / namespace
+            matrix = np.load(ns_dir / "embeddings.npy", mmap_mode="r")
+            with open(ns_dir / "metadata.jsonl") as f:
+                rows = [json.loads(line) for line in f]
+            self._namespaces[namespace] = (matrix, rows)
+        return self._namespaces[namespace]
+
+    def _filter_mask(self, namespace, rows, filter):
+        key = (namespace, json.dumps(filter, sort_keys=True, default=str))
+        with self._masks_lock:
+            mask = self._filter_masks.get(key)
+            if mask is not None:
+                self._filter_masks.move_to_end(key)
+                return mask
+        mask = np.fromiter(
+            (_matches(row["fields"], filter) for row in rows), dtype=bool, count=len(rows))
+        with self._masks_lock:
+            self._filter_masks[key] = mask
+            while len(self._filter_masks) > MAX_FILTER_MASKS:
+                self._filter_masks.popitem(last=False)
+        return mask
+
+    def _embed(self, queries):
+        if self.embed_fn is None:
+            raise ValueError("LocalIndex needs an embed_fn to search by text")
+        return np.asarray(self.embed_fn(list(queries)), dtype=np.float32)
+
+    def _map_blocks(self, fn, starts):
+        if self.max_workers == 1 or len(starts) == 1:
+            return [fn(start) for start in starts]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="local-index")
+        return list(self._executor.map(fn, starts))
+
+    def _top_rows(self, query_vectors, namespace, top_k, filter):
+        """
+        Score a batch of query vectors.
+
+        Returns:
+            list[tuple]: Per query, (best rows, their scores), best first
+        """
+        matrix, rows = self._load(namespace)
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        mask = self._filter_mask(namespace, rows, filter) if filter else None
+        k = min(top_k, len(matrix))
+        if k == 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        def score_block(start):
+            block = matrix[start:start + _SEARCH_BLOCK_ROWS]
+            scores = queries @ block.T
+            if mask is not None:
+                scores[:, ~mask[start:start + len(block)]] = -np.inf
+            if scores.shape[1] > k:
+                top = np.argpartition(scores, -k, axis=1)[:, -k:]
+                scores = np.take_along_axis(scores, top, axis=1)
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            return top + start, scores
+
+        blocks = self._map_blocks(score_block, range(0, len(matrix), _SEARCH_BLOCK_ROWS))
+        candidates = np.concatenate([top for top, _ in blocks], axis=1)
+        scores = np.concatenate([block_scores for _, block_scores in blocks], axis=1)
+        best = []
+        for q in range(len(queries)):
+            order = np.argsort(-scores[q], kind="stable")[:k]
+            order = order[np.isfinite(scores[q, order])]
+            best.append((candidates[q, order], scores[q, order]))
+        return best
+
+    def search_vectors(self, query_vectors, namespace, top_k=2, filter=None):
+        """
+        Top-k search for a batch of query vectors.
+
+        Args:
+            query_vectors (array-like): (q, d) query matrix
+            namespace (str): Namespace to search
+            top_k (int): Number of hits per query
+            filter (dict): Optional Pinecone-style metadata filter
+
+        Returns:
+            list[list[dict]]: Hits per query
+        """
+        _, rows = self._load(namespace)
+        return [
+            [{"_id": rows[i]["_id"], "_score": float(score), "fields": dict(rows[i]["fields"])}
+             for i, score in zip(order, scores)]
+            for order, scores in self._top_rows(query_vectors, namespace, top_k, filter)
+        ]
+
+    def search(self, query, namespace, top_k=2, filter=None):
+        return self.search_batch([query], namespace, top_k, filter)[0]
+
+    def search_with_vectors(self, query, namespace, top_k=2, filter=None):
+        query_vector = self._embed([query])[0]
+        matrix, rows = self._load(namespace)
+        order, scores = self._top_rows(query_vector, namespace, top_k, filter)[0]
+        hits = [{"_id": rows[i]["_id"], "_score": float(score), "fields": dict(rows[i]["fields"])}
+                for i, score in zip(order, scores)]
+        return hits, query_vector, np.asarray(matrix[order])
+
+    def search_batch(self, queries, namespace, top_k=2, filter=None):
+        return self.search_vectors(self._embed(queries), namespace, top_k, filter)
+
+
+def pinecone_query_embedder(pc, model="llama-text-embed-v2"):
+    """
+    Build an `embed_fn` for LocalIndex that embeds queries with Pinecone
+    inference, using the same model as an integrated index.
+    """
+    def embed_fn(queries):
+        embeddings = pc.inference.embed(
+            model=model, inputs=queries, parameters={"input_type": "query"})
+        return np.array([e["values"] for e in embeddings], dtype=np.float32)
+    return embed_fn
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n, d = 100_000, 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalIndex(tmp)
+        local.build("bench", [f"id-{i}" for i in range(n)],
+                    rng.standard_normal((n, d), dtype=np.float32),
+                    [{"pdf_page": i % 30} for i in range(n)])
+        queries = rng.standard_normal((8, d), dtype=np.float32)
+        local.search_vectors(queries[:1], "bench", top_k=5)  # warm the page cache
+        start = time.perf_counter()
+        for q in queries:
+            local.search_vectors(q, "bench", top_k=5)
+        print(f"{(time.perf_counter() - start) / len(queries) * 1000:.2f} ms per query")
+        start = time.perf_counter()
+        local.search_vectors(queries, "bench", top_k=5)
+        print(f"{(time.perf_counter() - start) / len(queries) * 1000:.2f} ms per query "
+              f"in a batch of {len(queries)}")
@@ -3,8 +3,10 @@ import json
 from pathlib import Path
 
 from .file_utils import remove_extension
+from .metrics import file_size, timed
 
 
+@timed("serialize.save_pickle", payload=lambda path: {"bytes": file_size(path)})
 def save_pickle(parsed_documents, save_dir, file_name):
     """
     Save documents as a pickle file.
@@ -26,6 +28,8 @@ def save_pickle(parsed_documents, save_dir, file_name):
     return file_path
 
 
+@timed("serialize.save_json",
+       payload=lambda result: {"bytes": file_size(result[1]), "items": len(result[0]["chunks"])})
 def save_json(parsed_results, doc_path, save_dir):
     """
     Save parsed results as a JSON file.
@@ -82,6 +86,7 @@ def save_json(parsed_results, doc_path, save_dir):
     return json_data, json_file_path
 
 
+@timed("serialize.extract_json", payload=lambda json_data: {"items": len(json_data["chunks"])})
 def extract_json_from_parsed_doc(parsed_doc):
     """
     Extract JSON from parsed document.
@@ -132,6 +137,7 @@ def json_to_string(json_obj):
     return str(json_obj)
 
 
+@timed("serialize.records", payload=lambda records: {"items": len(records)})
 def parsed_doc_to_records(parsed_doc_json, pdf_filename):
 
     records = []
@@ -146,3 +152,33 @@ def parsed_doc_to_records(parsed_doc_json, pdf_filename):
         }
         records.append(record)
     return records
+
+
+@timed("serialize.save_records", payload=lambda path: {"bytes": file_size(path)})
+def save_records(records, save_dir, file_name):
+    """
+    Save Pinecone records as a JSON Lines file, one record per line.
+
+    Args:
+        records (list[dict]): The records to save
+        save_dir (str): The directory to save to
+        file_name (str): The name for the file
+
+    Returns:
+        Path: The path to the saved file
+    """
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    file_path = save_dir / (remove_extension(file_name) + '.jsonl')
+    with open(file_path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return file_path
+
+
+def load_records(file_path):
+    """
+    Load records saved by `save_records`.
+    """
+    with open(file_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,110 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from agentic_doc.common import ParsedDocument
+from agentic_doc.config import settings
+
+from .parse_cache import cached_parse
+from .pdf_utils import count_pages, split_pdf_into_ranges
+
+# One shard per agentic_doc request, so the library does not split the shards again
+DEFAULT_PAGES_PER_SHARD = settings.split_size
+DEFAULT_MAX_WORKERS = settings.max_workers
+
+
+def _offset_parsed_document(parsed_doc, page_offset):
+    """
+    Shift every page number in a shard's parse result by `page_offset`.
+    """
+    chunks = [
+        chunk.model_copy(update={
+            "grounding": [g.model_copy(update={"page": g.page + page_offset})
+                          for g in chunk.grounding]
+        })
+        for chunk in parsed_doc.chunks
+    ]
+    errors = [e.model_copy(update={"page_num": e.page_num + page_offset})
+              for e in parsed_doc.errors]
+    return parsed_doc.model_copy(update={
+        "chunks": chunks,
+        "errors": errors,
+        "start_page_idx": parsed_doc.start_page_idx + page_offset,
+        "end_page_idx": parsed_doc.end_page_idx + page_offset,
+    })
+
+
+def merge_shard_results(shard_results):
+    """
+    Merge per-shard parse results into one ParsedDocument.
+
+    Args:
+        shard_results (list[tuple[ParsedDocument, int]]): Each shard's parsed
+            document with page numbers relative to the shard, paired with the
+            global index of the shard's first page. Must be in page order.
+
+    Returns:
+        ParsedDocument: A single document with global page numbers
+    """
+    shifted = [_offset_parsed_document(doc, offset) for doc, offset in shard_results]
+    if not shifted:
+        return ParsedDocument(markdown="", chunks=[], start_page_idx=0,
+                              end_page_idx=0, doc_type="pdf")
+    return ParsedDocument(
+        markdown="\n\n".join(doc.markdown for doc in shifted),
+        chunks=[chunk for doc in shifted for chunk in doc.chunks],
+        start_page_idx=shifted[0].start_page_idx,
+        end_page_idx=shifted[-1].end_page_idx,
+        doc_type="pdf",
+        result_path=None,
+        errors=[error for doc in shifted for error in doc.errors],
+    )
+
+
+def sharded_parse(file_path,
+                  pages_per_shard=DEFAULT_PAGES_PER_SHARD,
+                  max_workers=DEFAULT_MAX_WORKERS,
+                  parse_fn=cached_parse,
+                  **parse_kwargs):
+    """
+    Parse a large PDF by cutting it into page ranges and parsing the shards
+    concurrently on a bounded thread pool.
+
+    agentic_doc's `parse()` already splits a PDF into `split_size` pages and
+    parses them on `max_workers` threads, but it only returns the merged
+    document, so nothing can be cached until every part has finished. Here
+    each shard goes through `parse_fn`, so with the default `cached_parse`
+    shards are cached individually and a document whose parse failed or was
+    interrupted only re-parses the shards that are missing. Shards that came
+    back with page errors are not cached (see `ParseCache`), so they are
+    parsed again too.
+
+    The defaults follow the library's settings: a shard is one `split_size`
+    request and the library does not split it again, so the parallelism is
+    only this pool's `max_workers`. Larger shards are split by the library
+    as well, multiplying the requests in flight.
+
+    Args:
+        file_path (str): Path to the PDF file
+        pages_per_shard (int): Maximum number of pages per shard
+        max_workers (int): Maximum number of shards parsed at once
+        parse_fn (callable): Function with the signature of agentic_doc `parse()`
+        **parse_kwargs: Extra keyword arguments for `parse_fn`
+
+    Returns:
+        list[ParsedDocument]: A single merged document, in the same shape as
+            `parse()` returns for one file
+    """
+    if count_pages(file_path) <= pages_per_shard:
+        return parse_fn(file_path, **parse_kwargs)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shards = split_pdf_into_ranges(file_path, temp_dir, pages_per_shard)
+
+        def _parse_shard(shard):
+            shard_path, start_page, _ = shard
+            return parse_fn(str(shard_path), **parse_kwargs)[0], start_page
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            shard_results = list(executor.map(_parse_shard, shards))
+
+    return [merge_shard_results(shard_results)]
@@ -0,0 +1,159 @@
+import numpy as np
+
+DEFAULT_GRID_SIZE = 16  # cells per side; boxes are in normalized [0, 1] page coordinates
+
+
+class PageSpatialIndex:
+    """
+    Uniform-grid index over the grounding boxes of one page.
+
+    The page is split into `grid_size` x `grid_size` cells and every box is
+    registered in each cell it overlaps. The cell lists are stored in CSR
+    form (one offsets array, one flat array of box numbers), so a query looks
+    up a few cells and tests only their candidates, vectorized with NumPy.
+
+    Args:
+        ids (list): One identifier per box, e.g. (chunk_id, grounding_idx)
+        boxes (array-like): (n, 4) normalized (l, t, r, b) boxes
+        grid_size (int): Cells per side
+    """
+
+    def __init__(self, ids, boxes, grid_size=DEFAULT_GRID_SIZE):
+        self.ids = list(ids)
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if len(self.ids) != len(self.boxes):
+            raise ValueError("ids and boxes must have the same length")
+        self.grid_size = grid_size
+
+        # Inclusive cell ranges covered by each box
+        c0, r0 = self._cell(self.boxes[:, 0]), self._cell(self.boxes[:, 1])
+        c1, r1 = self._cell(self.boxes[:, 2]), self._cell(self.boxes[:, 3])
+        cells, owners = [], []
+        for i in range(len(self.boxes)):
+            rows, cols = np.meshgrid(np.arange(r0[i], r1[i] + 1), np.arange(c0[i], c1[i] + 1),
+                                     indexing="ij")
+            covered = (rows * grid_size + cols).ravel()
+            cells.append(covered)
+            owners.append(np.full(len(covered), i, dtype=np.int32))
+        cells = np.concatenate(cells) if cells else np.empty(0, dtype=np.int64)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int32)
+
+        order = np.argsort(cells, kind="stable")
+        self._items = owners[order]
+        counts = np.bincount(cells, minlength=grid_size * grid_size)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, coords):
+        return np.clip((np.asarray(coords) * self.grid_size).astype(np.int64), 0, self.grid_size - 1)
+
+    def _candidates(self, c0, r0, c1, r1):
+        cells = (np.arange(r0, r1 + 1)[:, None] * self.grid_size
+                 + np.arange(c0, c1 + 1)[None, :]).ravel()
+        parts = [self._items[self._offsets[c]:self._offsets[c + 1]] for c in cells]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(parts))
+
+    def query_point(self, x, y):
+        """
+        Return the IDs of the boxes that contain the point (x, y).
+        """
+        col, row = int(self._cell(x)), int(self._cell(y))
+        candidates = self._candidates(col, row, col, row)
+        b = self.boxes[candidates]
+        hit = (b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3])
+        return [self.ids[i] for i in candidates[hit]]
+
+    def query_rect(self, left, top, right, bottom):
+        """
+        Return the IDs of the boxes that intersect the normalized rectangle.
+        """
+        candidates = self._candidates(int(self._cell(left)), int(self._cell(top)),
+                                      int(self._cell(right)), int(self._cell(bottom)))
+        boxes = self.boxes[candidates]
+        hit = ((boxes[:, 0] <= right) & (left <= boxes[:, 2])
+               & (boxes[:, 1] <= bottom) & (top <= boxes[:, 3]))
+        return [self.ids[i] for i in candidates[hit]]
+
+    def overlapping_pairs(self, min_area=0.0):
+        """
+        Find every pair of boxes whose intersection area is above `min_area`.
+
+        Only boxes that share a grid cell are compared.
+
+        Returns:
+            list[tuple]: (id_a, id_b, intersection area), largest overlap first
+        """
+        pairs = []
+        for c in range(self.grid_size * self.grid_size):
+            members = self._items[self._offsets[c]:self._offsets[c + 1]]
+            if len(members) > 1:
+                a, b = np.triu_indices(len(members), k=1)
+                pairs.append(np.stack([members[a], members[b]], axis=1))
+        if not pairs:
+            return []
+        pairs = np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+
+        first, second = self.boxes[pairs[:, 0]], self.boxes[pairs[:, 1]]
+        width = np.minimum(first[:, 2], second[:, 2]) - np.maximum(first[:, 0], second[:, 0])
+        height = np.minimum(first[:, 3], second[:, 3]) - np.maximum(first[:, 1], second[:, 1])
+        area = np.clip(width, 0, None) * np.clip(height, 0, None)
+        keep = np.flatnonzero(area > min_area)
+        keep = keep[np.argsort(-area[keep], kind="stable")]
+        return [(self.ids[pairs[i, 0]], self.ids[pairs[i, 1]], float(area[i])) for i in keep]
+
+
+def build_page_indexes(parsed_doc, grid_size=DEFAULT_GRID_SIZE):
+    """
+    Build one PageSpatialIndex per page of a parsed document.
+
+    Each box is identified by (chunk_id, grounding_idx).
+
+    Args:
+        parsed_doc: A `ParsedDocument`, or the list returned by `parse()`
+        grid_size (int): Cells per side
+
+    Returns:
+        dict: page -> PageSpatialIndex
+    """
+    if isinstance(parsed_doc, (list, tuple)):
+        parsed_doc = parsed_doc[0]
+    ids_by_page, boxes_by_page = {}, {}
+    for chunk in parsed_doc.chunks:
+        for j, g in enumerate(chunk.grounding):
+            ids_by_page.setdefault(g.page, []).append((chunk.chunk_id, j))
+            boxes_by_page.setdefault(g.page, []).append((g.box.l, g.box.t, g.box.r, g.box.b))
+    return {page: PageSpatialIndex(ids_by_page[page], boxes_by_page[page], grid_size)
+            for page in ids_by_page}
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    corners = rng.random((n, 2), dtype=np.float32) * 0.9
+    sizes = rng.random((n, 2), dtype=np.float32) * 0.1
+    boxes = np.concatenate([corners, corners + sizes], axis=1)
+
+    start = time.perf_counter()
+    index = PageSpatialIndex(range(n), boxes)
+    print(f"build {n} boxes: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    points = rng.random((1000, 2))
+    start = time.perf_counter()
+    for x, y in points:
+        index.query_point(x, y)
+    print(f"point query: {(time.perf_counter() - start) * 1000 / len(points):.4f} ms")
+
+    start = time.perf_counter()
+    for x, y in points:
+        index.query_rect(x, y, min(x + 0.05, 1), min(y + 0.05, 1))
+    print(f"rect query: {(time.perf_counter() - start) * 1000 / len(points):.4f} ms")
+
+    start = time.perf_counter()
+    pairs = index.overlapping_pairs()
+    print(f"overlapping pairs ({len(pairs)}): {(time.perf_counter() - start) * 1000:.2f} ms")
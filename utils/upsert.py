@@ -0,0 +1,240 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .metrics import Span, get_metrics, percentile
+
+MAX_RECORDS_PER_BATCH = 96  # Pinecone limit for upsert_records with integrated inference
+MAX_BATCH_BYTES = 2 * 1024 * 1024  # Pinecone request size limit
+
+
+def record_size(record):
+    """
+    Approximate the request payload size of one record in bytes.
+    """
+    return len(json.dumps(record, default=str).encode())
+
+
+def batch_records(records, max_records=MAX_RECORDS_PER_BATCH, max_bytes=MAX_BATCH_BYTES):
+    """
+    Group records into batches bounded by record count and payload bytes.
+
+    Args:
+        records (list[dict]): The records to batch
+        max_records (int): Maximum records per batch
+        max_bytes (int): Maximum payload bytes per batch
+
+    Yields:
+        list[dict]: A batch of records
+    """
+    batch, batch_bytes = [], 0
+    for record in records:
+        size = record_size(record)
+        if batch and (len(batch) >= max_records or batch_bytes + size > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(record)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def is_throttling_error(exc):
+    """
+    Return True if an exception from the Pinecone client is a rate limit or
+    a transient server error that is worth retrying.
+    """
+    status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    if status in (429, 500, 502, 503, 504):
+        return True
+    message = str(exc)
+    return any(s in message for s in ("429", "Too Many Requests", "RESOURCE_EXHAUSTED"))
+
+
+@dataclass
+class UpsertReport:
+    """Throughput and latency of one upsert run."""
+    records: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    seconds: float = 0.0
+    batch_latencies: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def records_per_second(self):
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def latency_ms(self, q):
+        return 1000 * percentile(sorted(self.batch_latencies), q)
+
+    def summary(self):
+        return {
+            "records": self.records,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "seconds": round(self.seconds, 3),
+            "records_per_second": round(self.records_per_second, 1),
+            "batch_latency_p50_ms": round(self.latency_ms(50), 1),
+            "batch_latency_p95_ms": round(self.latency_ms(95), 1),
+            "batch_latency_max_ms": round(self.latency_ms(100), 1),
+        }
+
+
+class UpsertEngine:
+    """
+    Upload records to a Pinecone index with several batches in flight.
+
+    Batches are sized by record count and payload bytes and sent from a
+    thread pool. Throttled batches are retried with exponential backoff and
+    full jitter. Any object with an `upsert_records(namespace, records)`
+    method works as the index, including `InMemoryIndex`.
+
+    With a `metadata_store`, every batch that was accepted by the index is
+    also written to the local store, so later box/page lookups need no fetch.
+    With an `on_upsert` callback, it is called as
+    `on_upsert(namespace, chunk_ids)` after each upsert, e.g. to invalidate
+    cached results built from those chunks.
+    """
+
+    def __init__(self, index,
+                 max_workers=8,
+                 max_records=MAX_RECORDS_PER_BATCH,
+                 max_bytes=MAX_BATCH_BYTES,
+                 max_retries=6,
+                 base_delay=0.5,
+                 max_delay=30.0,
+                 metadata_store=None,
+                 on_upsert=None):
+        self.index = index
+        self.metadata_store = metadata_store
+        self.on_upsert = on_upsert
+        self.max_workers = max_workers
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+
+    def _send(self, namespace, batch, report):
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                self.index.upsert_records(namespace, batch)
+                return time.perf_counter() - start
+            except Exception as e:
+                if attempt >= self.max_retries or not is_throttling_error(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                time.sleep(random.uniform(0, delay))
+                attempt += 1
+                with self._lock:
+                    report.retries += 1
+
+    def upsert(self, namespace, records, progress_fn=None):
+        """
+        Upsert all records into a namespace.
+
+        Args:
+            namespace (str): Target namespace
+            records (list[dict]): Records in `upsert_records` format
+            progress_fn (callable): Called as `progress_fn(done, total)` with
+                record counts after each batch, from the calling thread
+
+        Returns:
+            UpsertReport: Counts, timings and any batch errors
+        """
+        report = UpsertReport()
+        total = len(records)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            batches = batch_records(records, self.max_records, self.max_bytes)
+            while True:
+                # Keep the queue short so huge uploads are not all batched up front
+                while len(in_flight) < 2 * self.max_workers:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    future = executor.submit(self._send, namespace, batch, report)
+                    in_flight[future] = batch
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = in_flight.pop(future)
+                    report.batches += 1
+                    try:
+                        report.batch_latencies.append(future.result())
+                        report.records += len(batch)
+                        if self.metadata_store is not None:
+                            self.metadata_store.put_records(namespace, batch)
+                    except Exception as e:
+                        report.failed_batches += 1
+                        report.errors.append(str(e))
+                    if progress_fn is not None:
+                        progress_fn(report.records, total)
+        report.seconds = time.perf_counter() - start
+        upsert_span = Span("upsert", namespace=namespace, items=report.records,
+                           failed_batches=report.failed_batches, retries=report.retries)
+        upsert_span.duration = report.seconds
+        get_metrics().record(upsert_span)
+        if self.on_upsert is not None:
+            # Called even after partial failures: some records may have changed
+            self.on_upsert(namespace, [record.get("_id", record.get("id")) for record in records])
+        return report
+
+
+class ThrottledError(Exception):
+    status = 429
+
+
+class InMemoryIndex:
+    """
+    Stand-in for a Pinecone index that keeps records in memory.
+
+    Args:
+        latency (float): Seconds each `upsert_records` call sleeps, to mimic
+            a network round trip
+        throttle_rate (float): Fraction of calls that raise a 429 error
+    """
+
+    def __init__(self, latency=0.0, throttle_rate=0.0, seed=None):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.namespaces = {}
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upsert_records(self, namespace, records):
+        with self._lock:
+            self.calls += 1
+            throttled = self._random.random() < self.throttle_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            raise ThrottledError("429 Too Many Requests")
+        with self._lock:
+            store = self.namespaces.setdefault(namespace, {})
+            for record in records:
+                store[record["_id"]] = record
+
+    def count(self, namespace):
+        return len(self.namespaces.get(namespace, {}))
+
+
+if __name__ == "__main__":
+    records = [{"_id": f"chunk-{i}", "chunk_text": "x" * 800, "pdf_page": i % 50}
+               for i in range(50_000)]
+    index = InMemoryIndex(latency=0.2, throttle_rate=0.02, seed=0)
+    report = UpsertEngine(index, max_workers=16).upsert("benchmark", records)
+    print(report.summary())
+    print(f"Stored {index.count('benchmark')} of {len(records)} records")
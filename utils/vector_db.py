@@ -1,13 +1,28 @@
-from pinecone import Pinecone, ServerlessSpec
-import os
 import sys
 sys.path.append("C:/Users/johnk/Projects-code/LEARN/landing-ai")
-from PROMPTS.prompts import ANSWER_WITH_CONTEXT
-from openai import OpenAI
+from PROMPTS.prompts import ANSWER_WITH_CONTEXT, SYSTEM_PROMPT
+from utils.search_backends import PineconeBackend, pinecone_query_embedder
+from utils.vector_export import iter_namespace_vectors
+from utils.metadata_store import get_metadata_store
+from utils.query_cache import get_query_cache
+from utils.answer_cache import get_answer_cache, make_answer_key
+from utils.context_packing import pack_contexts
+from utils.bm25 import get_bm25_index, reciprocal_rank_fusion
+from utils.mmr import mmr_rerank
+from utils.metrics import Span, get_metrics, span, timed
+from utils.clients import get_async_openai_client, get_index, get_openai_client, get_pinecone_client
 import pandas as pd
+import asyncio
+import contextvars
+import functools
+import hashlib
+import heapq
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+pc = get_pinecone_client()
+CHARS_PER_TOKEN = 4  # rough size of an English token, converts old character limits
 
 def create_index(index_name: str):
     """
@@ -56,80 +71,402 @@ def query_to_embedding(query: str):
     """
     Create an embedding for a query using the OpenAI API.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = get_openai_client()
     res = client.embeddings.create(
         model="text-embedding-ada-002",
         input=[query],
     )
     return res.data[0].embedding
 
-def retrieve_contexts(query: str, index_name: str, namespace: str, top_k=2):
+def _pinecone_backend(index_name):
+    # The query embedder is only used for MMR, which needs the query vector
+    return PineconeBackend(get_index(index_name), embed_fn=pinecone_query_embedder(pc))
+
+def _cached_search(backend, query, index_name, namespace, top_k, filter, use_cache,
+                   mmr_lambda=None, fetch_k=None):
+    cache = get_query_cache()
+    backend_key = backend.cache_key
+    if mmr_lambda is not None:
+        fetch_k = fetch_k or max(4 * top_k, 20)
+        backend_key = f"{backend_key}:mmr={mmr_lambda}:fetch_k={fetch_k}"
+    key = cache.make_key(index_name, namespace, query, top_k, filter, backend_key)
+    with span("search", backend=backend_key, namespace=namespace, top_k=top_k) as s:
+        hits = cache.get(key) if use_cache else None
+        if use_cache:
+            s.set(cache_hit=hits is not None)
+        if hits is None:
+            generation = cache.generation(namespace)
+            if mmr_lambda is None:
+                hits = backend.search(query, namespace, top_k=top_k, filter=filter)
+            else:
+                candidates, query_vector, vectors = backend.search_with_vectors(
+                    query, namespace, top_k=fetch_k, filter=filter)
+                hits = mmr_rerank(candidates, query_vector, vectors, top_k, mmr_lambda)
+            if use_cache:
+                cache.put(key, hits, generation)
+        s.set(items=len(hits))
+    return hits
+
+def retrieve_contexts(query: str, index_name: str, namespace: str, top_k=2, backend=None,
+                      filter=None, use_cache=True, mmr_lambda=None, fetch_k=None):
     """
-    Retrieve contexts from a Pinecone index.
+    Retrieve contexts from a Pinecone index, or from another search backend.
+
+    Results are cached in memory (see `utils.query_cache`) until they expire
+    or the namespace is upserted into or deleted from.
+
+    Args:
+        query (str): The query text
+        index_name (str): Name of the Pinecone index
+        namespace (str): Namespace to search
+        top_k (int): Number of chunks to return
+        backend (SearchBackend): Backend to search instead of Pinecone,
+            e.g. a `LocalIndex`
+        filter (dict): Optional Pinecone metadata filter
+        use_cache (bool): Serve repeated queries from the query cache
+        mmr_lambda (float): If set, over-fetch `fetch_k` candidates and keep a
+            diverse top_k with maximal marginal relevance; 1 is pure
+            relevance, 0 pure diversity
+        fetch_k (int): Candidates fetched for MMR, defaults to max(4 * top_k, 20)
+    Returns:
+        tuple: The chunk IDs and the metadata of each hit, with its `_score`
     """
-    index = pc.Index(index_name)
-    # xq = query_to_embedding(query)
-    search_results = index.search(
-        namespace = namespace,
-        query={
-            "top_k": top_k,
-            "inputs": {
-                'text': query
-            }
-        }
-    )
-    chunk_ids = [hit['_id'] for hit in search_results['result']['hits']]
-    metadata_list = [hit['fields'] for hit in search_results['result']['hits']]
+    backend = backend or _pinecone_backend(index_name)
+    hits = _cached_search(backend, query, index_name, namespace, top_k, filter, use_cache,
+                          mmr_lambda, fetch_k)
+    chunk_ids = [hit['_id'] for hit in hits]
+    metadata_list = [{**hit['fields'], '_score': hit['_score']} for hit in hits]
     return chunk_ids, metadata_list
 
-def retrieval_augmented_prompt(context_list: list, query: str, context_limit=10000):
+def list_namespaces(index_name: str, backend=None):
     """
-    Retrieve contexts from a Pinecone index and return a prompt with the contexts.
+    List the namespaces of a Pinecone index, or of a backend with a
+    `namespaces()` method such as `LocalIndex`.
     """
-    # chunk_ids, metadata_list = retrieve_contexts(query, index_name, namespace, top_k, context_limit)
-    # context_list = [metadata_list[i]['chunk_text'] for i in range(len(chunk_ids))]
-    
-    combined_contexts = []
-    total_length = 0
-    for context in context_list:
-        new_length = total_length + len(context)
-        if new_length >= context_limit:
-            break
-        combined_contexts.append(context)
-        total_length = new_length
-        
-    total_context = "\n\n---\n\n".join(combined_contexts)
-        
-        
-    prompt = ANSWER_WITH_CONTEXT.prompt_text.format(context=total_context, question=query)
+    if backend is not None and hasattr(backend, "namespaces"):
+        return backend.namespaces()
+    return sorted(get_index(index_name).describe_index_stats()["namespaces"].keys())
+
+def retrieve_contexts_multi(query: str, index_name: str, namespaces=None, top_k=2, backend=None,
+                            filter=None, use_cache=True, max_workers=16):
+    """
+    Search many namespaces at once and merge the hits into one global top-k.
+
+    Every namespace is searched for its own top-k concurrently (so the whole
+    call costs about one round trip), and the best `top_k` hits overall are
+    picked with a heap. Each hit's metadata gets a `namespace` key.
+
+    Args:
+        query (str): The query text
+        index_name (str): Name of the Pinecone index
+        namespaces (list[str]): Namespaces to search, defaults to all of them
+        top_k (int): Number of chunks to return in total
+        backend (SearchBackend): Backend to search instead of Pinecone
+        filter (dict): Optional Pinecone metadata filter
+        use_cache (bool): Serve repeated per-namespace searches from the query cache
+        max_workers (int): Searches in flight
+    Returns:
+        tuple: The chunk IDs and the metadata of each hit (with `_score`), best first
+    """
+    backend = backend or _pinecone_backend(index_name)
+    if namespaces is None:
+        namespaces = list_namespaces(index_name, backend)
+    if not namespaces:
+        return [], []
+
+    def search_one(namespace):
+        hits = _cached_search(backend, query, index_name, namespace, top_k, filter, use_cache)
+        return [(hit['_score'], namespace, hit) for hit in hits]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(namespaces))) as executor:
+        candidates = [hit for hits in executor.map(search_one, namespaces) for hit in hits]
+    best = heapq.nlargest(top_k, candidates, key=lambda candidate: candidate[0])
+    chunk_ids = [hit['_id'] for _, _, hit in best]
+    metadata_list = [{**hit['fields'], '_score': score, 'namespace': namespace}
+                     for score, namespace, hit in best]
+    return chunk_ids, metadata_list
+
+def retrieve_contexts_hybrid(query: str, index_name: str, namespace=None, top_k=2, backend=None,
+                             bm25_index=None, vector_weight=1.0, keyword_weight=1.0,
+                             num_candidates=None, filter=None, rrf_k=60):
+    """
+    Hybrid retrieval: vector search and BM25 keyword search fused with
+    weighted reciprocal rank fusion.
+
+    Keyword search catches exact terms such as formulas ("TeO2") and part
+    numbers that dense embeddings tend to blur.
+
+    Args:
+        query (str): The query text
+        index_name (str): Name of the Pinecone index
+        namespace (str): Namespace to search, None for all namespaces
+        top_k (int): Number of chunks to return
+        backend (SearchBackend): Vector backend to use instead of Pinecone
+        bm25_index (BM25Index): Keyword index, defaults to the shared one
+        vector_weight (float): RRF weight of the vector ranking
+        keyword_weight (float): RRF weight of the BM25 ranking
+        num_candidates (int): Hits taken from each ranking before fusion,
+            defaults to max(4 * top_k, 20)
+        filter (dict): Optional Pinecone metadata filter
+        rrf_k (int): RRF rank offset
+    Returns:
+        tuple: The chunk IDs and the metadata of each hit, with the fused `_score`
+    """
+    bm25_index = bm25_index or get_bm25_index()
+    num_candidates = num_candidates or max(4 * top_k, 20)
+    if namespace is None:
+        vector_ids, vector_metadata = retrieve_contexts_multi(
+            query, index_name, None, num_candidates, backend, filter)
+    else:
+        vector_ids, vector_metadata = retrieve_contexts(
+            query, index_name, namespace, num_candidates, backend, filter)
+    vector_hits = [{"_id": chunk_id, "fields": metadata}
+                   for chunk_id, metadata in zip(vector_ids, vector_metadata)]
+    keyword_hits = bm25_index.search(query, namespace, num_candidates, filter)
+    fused = reciprocal_rank_fusion([vector_hits, keyword_hits], [vector_weight, keyword_weight],
+                                   k=rrf_k, top_k=top_k)
+    chunk_ids = [hit['_id'] for hit in fused]
+    metadata_list = [{**hit['fields'], '_score': hit['_score']} for hit in fused]
+    return chunk_ids, metadata_list
+
+def retrieval_augmented_prompt(context_list: list, query: str, context_limit=10000,
+                               chunk_ids=None, scores=None, token_budget=None,
+                               model_name="gpt-4o-mini", return_packed=False):
+    """
+    Build the RAG prompt from retrieved contexts.
+
+    Contexts are packed by `pack_contexts`: duplicates are dropped and, when
+    they do not all fit in the token budget, contexts are chosen by score
+    per token. Each context is numbered so the answer can cite it.
+
+    Args:
+        context_list (list[str]): Retrieved chunk texts, best first
+        query (str): The question
+        context_limit (int): Character budget, used as about
+            `context_limit / 4` tokens when `token_budget` is not given
+        chunk_ids (list[str]): Chunk IDs of the contexts, kept for citations
+        scores (list[float]): Retrieval scores of the contexts
+        token_budget (int): Maximum context tokens
+        model_name (str): Model whose tokenizer counts the tokens
+        return_packed (bool): Also return the `PackedContext`
+    Returns:
+        str: The prompt, or (prompt, PackedContext) with `return_packed`
+    """
+    if token_budget is None:
+        token_budget = context_limit // CHARS_PER_TOKEN
+    with span("prompt_build") as s:
+        packed = pack_contexts(context_list, chunk_ids, scores, token_budget, model_name)
+        prompt = ANSWER_WITH_CONTEXT.prompt_text.format(context=packed.text(), question=query)
+        s.set(items=len(packed.contexts), tokens=packed.tokens, bytes=len(prompt.encode()))
+    if return_packed:
+        return prompt, packed
     return prompt
 
 def chat_response(prompt: str, model_name="gpt-4o-mini", temperature=0.1):
     """
     Send a prompt to the OpenAI API and return the response.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    system_prompt = "You are a helpful assistant that can answer questions about the context provided."
-    
-    response = client.responses.create(
+    client = get_openai_client()
+    with span("llm", model=model_name):
+        response = client.responses.create(
+            model=model_name,
+            instructions=SYSTEM_PROMPT.prompt_text,
+            input=prompt,
+            temperature=temperature
+        )
+    return response.output_text
+
+def chat_response_stream(prompt: str, model_name="gpt-4o-mini", temperature=0.1,
+                         cancel_event=None, timings=None):
+    """
+    Stream a response from the OpenAI API, yielding text as it arrives.
+
+    Args:
+        prompt (str): The prompt
+        model_name (str): The model
+        temperature (float): Sampling temperature
+        cancel_event (threading.Event): When set, the stream is closed and
+            the generator stops after the current delta
+        timings (dict): If given, filled with `ttft` (seconds to the first
+            text delta), `total` (seconds to the end of the stream) and
+            `cancelled`, which is also set when the consumer closes the
+            generator early (e.g. a Streamlit rerun)
+    Yields:
+        str: Text deltas
+    """
+    timings = {} if timings is None else timings
+    timings.update(ttft=None, total=None, cancelled=False)
+    client = get_openai_client()
+    start = time.perf_counter()
+    stream = client.responses.create(
         model=model_name,
-        instructions=system_prompt,
+        instructions=SYSTEM_PROMPT.prompt_text,
         input=prompt,
-        temperature=temperature
+        temperature=temperature,
+        stream=True
     )
-    return response.output_text
+    try:
+        for event in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                timings["cancelled"] = True
+                break
+            if event.type == "response.output_text.delta":
+                if timings["ttft"] is None:
+                    timings["ttft"] = time.perf_counter() - start
+                yield event.delta
+    except GeneratorExit:
+        timings["cancelled"] = True
+        raise
+    finally:
+        # Also runs when the consumer stops iterating, e.g. a Streamlit rerun
+        stream.close()
+        timings["total"] = time.perf_counter() - start
+        # A context-manager span cannot stay open across yields, so record it directly
+        stream_span = Span("llm_stream", model=model_name, cancelled=timings["cancelled"],
+                           ttft_ms=None if timings["ttft"] is None else round(1000 * timings["ttft"], 1))
+        stream_span.duration = timings["total"]
+        get_metrics().record(stream_span)
+
+def _answer_cache_key(query, packed, chunk_ids, model_name, temperature):
+    """
+    Answer cache key and the chunk IDs it depends on. Without chunk IDs the
+    contexts are identified by a hash of their text.
+    """
+    if chunk_ids is not None:
+        context_ids = packed.chunk_ids
+    else:
+        context_ids = ["sha1:" + hashlib.sha1(context.encode()).hexdigest()
+                       for context in packed.contexts]
+    prompt_version = f"{ANSWER_WITH_CONTEXT.version}/{SYSTEM_PROMPT.version}"
+    return make_answer_key(prompt_version, context_ids, query, model_name, temperature), context_ids
 
-def rag_response(query: str, context_list: list, model_name="gpt-4o-mini", context_limit=10000):
+def rag_response(query: str, context_list: list, model_name="gpt-4o-mini", context_limit=10000,
+                 chunk_ids=None, scores=None, temperature=0.1, use_cache=True):
     """
     Retrieve contexts from a Pinecone index and return a response using the OpenAI API.
+
+    Answers are cached on disk (see `utils.answer_cache`) by prompt version,
+    packed chunk IDs, normalized question, model and temperature, and
+    dropped when one of the chunks is re-upserted.
+    """
+    prompt, packed = retrieval_augmented_prompt(context_list, query, context_limit, chunk_ids, scores,
+                                                model_name=model_name, return_packed=True)
+    if not use_cache:
+        return chat_response(prompt=prompt, model_name=model_name, temperature=temperature)
+    cache = get_answer_cache()
+    key, context_ids = _answer_cache_key(query, packed, chunk_ids, model_name, temperature)
+    answer = cache.get(key)
+    get_metrics().record_cache("answer", answer is not None)
+    if answer is None:
+        start = time.perf_counter()
+        answer = chat_response(prompt=prompt, model_name=model_name, temperature=temperature)
+        cache.put(key, answer, context_ids, time.perf_counter() - start)
+    return answer
+
+def rag_response_stream(query: str, context_list: list, model_name="gpt-4o-mini", context_limit=10000,
+                        cancel_event=None, timings=None, chunk_ids=None, scores=None,
+                        temperature=0.1, use_cache=True):
     """
-    prompt = retrieval_augmented_prompt(context_list, query, context_limit)
-    return chat_response(prompt=prompt, model_name=model_name)
+    Streaming version of `rag_response`; see `chat_response_stream`.
+
+    A cached answer is yielded in one piece and `timings["cached"]` is set.
+    Stopped streams are not cached. `timings["packed"]` gets the
+    `PackedContext` the prompt was built from.
+    """
+    timings = {} if timings is None else timings
+    prompt, packed = retrieval_augmented_prompt(context_list, query, context_limit, chunk_ids, scores,
+                                                model_name=model_name, return_packed=True)
+    timings["packed"] = packed
+    stream = chat_response_stream(prompt=prompt, model_name=model_name, temperature=temperature,
+                                  cancel_event=cancel_event, timings=timings)
+    if not use_cache:
+        timings["cached"] = False
+        yield from stream
+        return
+    cache = get_answer_cache()
+    key, context_ids = _answer_cache_key(query, packed, chunk_ids, model_name, temperature)
+    start = time.perf_counter()
+    answer = cache.get(key)
+    get_metrics().record_cache("answer", answer is not None)
+    if answer is not None:
+        stream.close()
+        elapsed = time.perf_counter() - start
+        timings.update(ttft=elapsed, total=elapsed, cancelled=False, cached=True)
+        yield answer
+        return
+    pieces = []
+    for delta in stream:
+        pieces.append(delta)
+        yield delta
+    timings["cached"] = False
+    if not timings["cancelled"]:
+        cache.put(key, "".join(pieces), context_ids, timings["total"])
+
 
+async def retrieve_contexts_async(query: str, index_name: str, namespace: str, top_k=2,
+                                  backend=None, filter=None, use_cache=True,
+                                  mmr_lambda=None, fetch_k=None, executor=None):
+    """
+    Async version of `retrieve_contexts`.
+
+    The Pinecone client is synchronous, so the search runs in a worker
+    thread on the shared, pooled Index handle; the event loop stays free
+    to serve other requests meanwhile. Pass an `executor` to run more
+    searches at once than the loop's default executor allows
+    (min(32, cpu_count + 4) threads).
+    """
+    backend = backend or _pinecone_backend(index_name)
+    search = functools.partial(_cached_search, backend, query, index_name, namespace, top_k,
+                               filter, use_cache, mmr_lambda, fetch_k)
+    # Run in a copy of the current context, like asyncio.to_thread, so spans keep their parent
+    hits = await asyncio.get_running_loop().run_in_executor(
+        executor, contextvars.copy_context().run, search)
+    chunk_ids = [hit['_id'] for hit in hits]
+    metadata_list = [{**hit['fields'], '_score': hit['_score']} for hit in hits]
+    return chunk_ids, metadata_list
+
+async def chat_response_async(prompt: str, model_name="gpt-4o-mini", temperature=0.1):
+    """
+    Async version of `chat_response`, on the event loop's pooled AsyncOpenAI client.
+    """
+    client = get_async_openai_client()
+    with span("llm", model=model_name):
+        response = await client.responses.create(
+            model=model_name,
+            instructions=SYSTEM_PROMPT.prompt_text,
+            input=prompt,
+            temperature=temperature
+        )
+    return response.output_text
+
+async def rag_response_async(query: str, context_list: list, model_name="gpt-4o-mini", context_limit=10000,
+                             chunk_ids=None, scores=None, temperature=0.1, use_cache=True):
+    """
+    Async version of `rag_response`, sharing its answer cache.
+    """
+    prompt, packed = retrieval_augmented_prompt(context_list, query, context_limit, chunk_ids, scores,
+                                                model_name=model_name, return_packed=True)
+    if not use_cache:
+        return await chat_response_async(prompt=prompt, model_name=model_name, temperature=temperature)
+    cache = get_answer_cache()
+    key, context_ids = _answer_cache_key(query, packed, chunk_ids, model_name, temperature)
+    answer = cache.get(key)
+    get_metrics().record_cache("answer", answer is not None)
+    if answer is None:
+        start = time.perf_counter()
+        answer = await chat_response_async(prompt=prompt, model_name=model_name, temperature=temperature)
+        cache.put(key, answer, context_ids, time.perf_counter() - start)
+    return answer
 
+
+@timed("namespace_fetch", payload=lambda df: {"items": len(df)})
 def get_vector_db_as_df(index_name: str, namespace: str) -> pd.DataFrame:
     """
     Fetch all vectors from a Pinecone index and namespace and return as a DataFrame.
+
+    Pages through every ID in the namespace and fetches them in concurrent
+    batches. For large namespaces use `export_namespace_to_parquet`, which
+    streams to disk instead of building the DataFrame in memory.
     
     Args:
         index_name (str): Name of the Pinecone index
@@ -138,26 +475,19 @@ def get_vector_db_as_df(index_name: str, namespace: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame containing vector IDs, embeddings, and metadata
     """
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index(index_name)
-    
-    # Get all vector IDs in the namespace
-    ids_batch = [id for id in index.list(namespace=namespace)][0]
-    
-    # Fetch vectors and metadata
-    vectors_data = index.fetch(ids=ids_batch, namespace=namespace)
-    vectors_dict = vectors_data.vectors
+    index = get_index(index_name)
     
     # Convert to DataFrame format
     df_rows = []
-    for vector_id, vector_data in vectors_dict.items():
-        row = {
-            'id': vector_id,
-            'embedding': vector_data.values,
-            'dimensions': len(vector_data.values),
-            **vector_data.metadata
-        }
-        df_rows.append(row)
+    for vectors in iter_namespace_vectors(index, namespace):
+        for vector_data in vectors:
+            row = {
+                'id': vector_data.id,
+                'embedding': vector_data.values,
+                'dimensions': len(vector_data.values),
+                **(vector_data.metadata or {})
+            }
+            df_rows.append(row)
         
     df = pd.DataFrame(df_rows)
     
@@ -167,28 +497,65 @@ def get_vector_db_as_df(index_name: str, namespace: str) -> pd.DataFrame:
         
     return df
 
+def get_chunk_metadata(chunk_ids: list[str], namespace: str, index_name: str, store=None):
+    """
+    Get the metadata of many chunks, served from the local metadata store.
+
+    Chunks missing from the store (e.g. upserted before the store existed)
+    are fetched from Pinecone in one call and written back to the store.
+
+    Args:
+        chunk_ids (list[str]): Chunk IDs
+        namespace (str): Namespace of the chunks
+        index_name (str): Pinecone index to fetch missing chunks from
+        store (MetadataStore): Store to use, defaults to the shared one
+    Returns:
+        list[dict]: Metadata per chunk ID, in the same order
+    """
+    store = store or get_metadata_store()
+    with span("metadata_fetch", namespace=namespace, items=len(chunk_ids)) as s:
+        found = store.get_many(namespace, chunk_ids)
+        missing = [chunk_id for chunk_id in dict.fromkeys(chunk_ids) if chunk_id not in found]
+        # A hit means the local store had every chunk, no Pinecone fetch needed
+        s.set(cache_hit=not missing, fetched=len(missing))
+        if missing:
+            fetched_results = get_index(index_name).fetch(ids=missing, namespace=namespace)
+            records = [{"_id": chunk_id, **(vector.metadata or {})}
+                       for chunk_id, vector in fetched_results.vectors.items()]
+            store.put_records(namespace, records)
+            found.update(store.get_many(namespace, missing))
+    return [found[chunk_id] for chunk_id in chunk_ids]
+
 def get_box_from_chunk_ids(chunk_ids: list[str], namespace: str, index_name: str):
     """
     Get the box from a list of chunk IDs.
     """
-    index = pc.Index(index_name)
-    fetched_results = index.fetch(ids=chunk_ids, namespace=namespace)
-    box_json_list = []
-    for chunk_id in chunk_ids:
-        box_json = fetched_results.vectors[chunk_id].metadata['box']
-        box_json = json.loads(box_json)
-        box_json_list.append(box_json)
-    return box_json_list
-
-def chunk_ids_to_pdf_pages(chunk_ids: list[str], namespace: str):
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index(index_name)
-    fetched_results = index.fetch(ids=chunk_ids, namespace=namespace)
-    page_number_list = []
-    for chunk_id in chunk_ids:
-        page_number = fetched_results.vectors[chunk_id].metadata['pdf_page']
-        page_number_list.append(page_number)
-    return page_number_list
+    return [json.loads(metadata['box'])
+            for metadata in get_chunk_metadata(chunk_ids, namespace, index_name)]
+
+def chunk_ids_to_pdf_pages(chunk_ids: list[str], namespace: str, index_name: str):
+    """
+    Get the PDF page of each chunk in a list of chunk IDs.
+    """
+    return [int(metadata['pdf_page'])
+            for metadata in get_chunk_metadata(chunk_ids, namespace, index_name)]
+
+def invalidate_cached_results(namespace: str, chunk_ids=None):
+    """
+    Drop cached search results of a namespace and cached answers built from
+    the given chunks. Pass as `UpsertEngine(on_upsert=...)`.
+    """
+    get_query_cache().invalidate_namespace(namespace)
+    if chunk_ids:
+        get_answer_cache().invalidate_chunks(chunk_ids)
+
+def delete_namespace(index_name: str, namespace: str):
+    """
+    Delete every record of a namespace from Pinecone and the local stores.
+    """
+    get_index(index_name).delete(delete_all=True, namespace=namespace)
+    get_metadata_store().delete(namespace)
+    invalidate_cached_results(namespace)
 
 if __name__ == "__main__":
     questions = ["What is the experimental setup?", 
@@ -204,6 +571,7 @@ if __name__ == "__main__":
         context_list = [metadata_list[i]['chunk_text'] for i in range(len(chunk_ids))]
         print(f"Chunk IDs: {chunk_ids}")
         # print(f"Metadata List: {metadata_list}")
-        print(f"Answer: {rag_response(context_list, question)}")
+        scores = [metadata['_score'] for metadata in metadata_list]
+        print(f"Answer: {rag_response(question, context_list, chunk_ids=chunk_ids, scores=scores)}")
 
 
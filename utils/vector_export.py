@@ -0,0 +1,167 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_DIR = Path("app_storage/exports")
+FETCH_BATCH_SIZE = 200  # IDs per fetch call, keeps the request URL well under limits
+
+# Typed columns for the metadata written by `parsed_doc_to_records`.
+# Any other metadata keys are kept as JSON in the `extra_metadata` column.
+METADATA_TYPES = {
+    "chunk_text": pa.string(),
+    "chunk_type": pa.string(),
+    "pdf_filename": pa.string(),
+    "pdf_page": pa.int32(),
+    "box": pa.string(),
+}
+
+
+def iter_namespace_ids(index, namespace, batch_size=FETCH_BATCH_SIZE):
+    """
+    Page through every vector ID in a namespace.
+
+    Args:
+        index: A Pinecone `Index` handle
+        namespace (str): Namespace to list
+        batch_size (int): Number of IDs per yielded batch
+
+    Yields:
+        list[str]: A batch of IDs
+    """
+    batch = []
+    for page in index.list(namespace=namespace):
+        batch.extend(page)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+
+def iter_namespace_vectors(index, namespace, batch_size=FETCH_BATCH_SIZE, max_workers=4):
+    """
+    Fetch every vector in a namespace with several fetch calls in flight.
+
+    At most `2 * max_workers` batches are held at once, so memory use does
+    not grow with the size of the namespace. Batches are yielded in listing
+    order.
+
+    Yields:
+        list: The fetched `Vector` objects of one batch
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for ids in iter_namespace_ids(index, namespace, batch_size):
+            in_flight.append(executor.submit(index.fetch, ids=ids, namespace=namespace))
+            if len(in_flight) >= 2 * max_workers:
+                yield list(in_flight.popleft().result().vectors.values())
+        while in_flight:
+            yield list(in_flight.popleft().result().vectors.values())
+
+
+def vectors_to_record_batch(vectors, dimension):
+    """
+    Convert fetched vectors to an Arrow record batch.
+
+    Embeddings become a fixed-size list of float32, which is stored as one
+    contiguous buffer. Known metadata fields become typed columns.
+    """
+    ids = [v.id for v in vectors]
+    values = np.asarray([v.values for v in vectors], dtype=np.float32).reshape(-1, dimension)
+    embeddings = pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), dimension)
+
+    columns = {"id": pa.array(ids, pa.string()), "embedding": embeddings}
+    metadata_list = [dict(v.metadata or {}) for v in vectors]
+    for key, dtype in METADATA_TYPES.items():
+        column = [m.pop(key, None) for m in metadata_list]
+        if pa.types.is_integer(dtype):
+            column = [None if x is None else int(x) for x in column]
+        columns[key] = pa.array(column, dtype)
+    columns["extra_metadata"] = pa.array(
+        [json.dumps(m) if m else None for m in metadata_list], pa.string())
+    return pa.RecordBatch.from_pydict(columns)
+
+
+def export_namespace_to_parquet(index, namespace, out_path=None,
+                                batch_size=FETCH_BATCH_SIZE,
+                                max_workers=4,
+                                row_group_size=10_000):
+    """
+    Stream every vector in a namespace into a Parquet file.
+
+    Args:
+        index: A Pinecone `Index` handle
+        namespace (str): Namespace to export
+        out_path (str): Output file, defaults to app_storage/exports/<namespace>.parquet
+        batch_size (int): IDs per fetch call
+        max_workers (int): Fetch calls in flight
+        row_group_size (int): Rows buffered before a row group is written
+
+    Returns:
+        tuple: The output path and the number of rows written. An empty
+            namespace gives a file with the schema and no rows.
+    """
+    out_path = Path(out_path or EXPORT_DIR / f"{namespace}.parquet")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+
+    writer = None
+    pending, pending_rows, total_rows = [], 0, 0
+    try:
+        try:
+            for vectors in iter_namespace_vectors(index, namespace, batch_size, max_workers):
+                if not vectors:
+                    continue
+                if writer is None:
+                    dimension = len(vectors[0].values)
+                    first = vectors_to_record_batch(vectors, dimension)
+                    writer = pq.ParquetWriter(tmp_path, first.schema)
+                    record_batch = first
+                else:
+                    record_batch = vectors_to_record_batch(vectors, dimension)
+                pending.append(record_batch)
+                pending_rows += record_batch.num_rows
+                if pending_rows >= row_group_size:
+                    writer.write_table(pa.Table.from_batches(pending))
+                    total_rows += pending_rows
+                    pending, pending_rows = [], 0
+            if writer is None:
+                empty = vectors_to_record_batch([], index.describe_index_stats().dimension)
+                writer = pq.ParquetWriter(tmp_path, empty.schema)
+            if pending:
+                writer.write_table(pa.Table.from_batches(pending))
+                total_rows += pending_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        tmp_path.replace(out_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return out_path, total_rows
+
+
+def read_namespace_export(path, columns=None):
+    """
+    Load an export written by `export_namespace_to_parquet`.
+
+    Args:
+        path (str): Path to the Parquet file
+        columns (list[str]): Metadata columns to read, defaults to all
+
+    Returns:
+        tuple: IDs (list), embeddings as a float32 (n, d) array, and the
+            metadata as a DataFrame
+    """
+    table = pq.read_table(path, columns=None if columns is None
+                          else ["id", "embedding", *columns])
+    embedding = table.column("embedding").combine_chunks()
+    dimension = embedding.type.list_size
+    embeddings = embedding.flatten().to_numpy().reshape(-1, dimension)
+    metadata = table.drop_columns(["id", "embedding"]).to_pandas()
+    return table.column("id").to_pylist(), embeddings, metadata
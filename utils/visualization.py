@@ -1,9 +1,10 @@
 import os
+import json
+from collections import defaultdict
 from pathlib import Path
 from typing import Tuple
 
 # Corrected imports based on codebase search
-from agentic_doc.utils import viz_parsed_document
 from agentic_doc.config import VisualizationConfig
 from agentic_doc.common import ChunkType
 import cv2
@@ -13,9 +14,14 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pickle
 from utils.vector_db import get_box_from_chunk_ids
+from utils.page_render import render_page
+from utils.doc_index import get_doc_index
+from utils.viz_engine import place_mark, visualize_parsed_document
+from utils.metrics import array_bytes, timed
 # from utils.vector_db import get_vector_db_as_df
 
 
+@timed("render.pdf_to_images", payload=lambda images: {"items": len(images), "bytes": array_bytes(images)})
 def pdf_to_images(pdf_path):
     """
     Convert a PDF file to a list of images.
@@ -46,53 +52,29 @@ def _place_mark(
     color_bgr: tuple[int, int, int],
     viz_config: VisualizationConfig,
 ) -> None:
-    text_color = color_bgr
-    (text_width, text_height), baseline = cv2.getTextSize(
-        text, viz_config.font, viz_config.font_scale, viz_config.thickness
-    )
-    text_x = int((box_xyxy[0] + box_xyxy[2] - text_width) // 2)
-    text_y = int((box_xyxy[1] + box_xyxy[3] + text_height) // 2)
-
-    # Draw the text background with opacity
-    overlay = img.copy()
-    cv2.rectangle(
-        overlay,
-        (text_x - viz_config.padding, text_y - text_height - viz_config.padding),
-        (
-            text_x + text_width + viz_config.padding,
-            text_y + baseline + viz_config.padding,
-        ),
-        viz_config.text_bg_color,
-        -1,
-    )
-    cv2.addWeighted(
-        overlay, viz_config.text_bg_opacity, img, 1 - viz_config.text_bg_opacity, 0, img
-    )
-
-    # Draw the text on top
-    cv2.putText(
-        img,
-        text,
-        (text_x, text_y),
-        viz_config.font,
-        viz_config.font_scale,
-        text_color,
-        viz_config.thickness,
-        cv2.LINE_AA,
-    )
-    # Draw the bounding box
-    cv2.rectangle(img, box_xyxy[:2], box_xyxy[2:],
-                  color_bgr, viz_config.thickness)
+    # Blends the label background into its own region only, not the full page
+    place_mark(img, box_xyxy, text, color_bgr, {
+        "font": viz_config.font,
+        "font_scale": viz_config.font_scale,
+        "thickness": viz_config.thickness,
+        "padding": viz_config.padding,
+        "text_bg_color": viz_config.text_bg_color,
+        "text_bg_opacity": viz_config.text_bg_opacity,
+    })
 
 
 
+@timed("render.create_visualizations")
 def create_visualizations(parsed_documents,
                           doc_path,
                           output_dir,
                           text_color=(0, 0, 255),
                           table_color=(0, 255, 0),
                           figure_color=(255, 0, 0),
-                          marginalia_color=(0, 255, 255)):
+                          marginalia_color=(0, 255, 255),
+                          image_format="webp",
+                          quality=80,
+                          max_workers=None):
     """
     Create visualizations for parsed documents.
 
@@ -100,10 +82,13 @@ def create_visualizations(parsed_documents,
         parsed_documents: The parsed documents to visualize
         doc_path (str): Path to the original document
         output_dir (str): Directory to save visualizations
-        text_color (Tuple[int, int, int]): RGB color for text chunks
-        table_color (Tuple[int, int, int]): RGB color for table chunks
-        figure_color (Tuple[int, int, int]): RGB color for figure chunks
-        marginalia_color (Tuple[int, int, int]): RGB color for marginalia chunks
+        text_color (Tuple[int, int, int]): BGR color for text chunks
+        table_color (Tuple[int, int, int]): BGR color for table chunks
+        figure_color (Tuple[int, int, int]): BGR color for figure chunks
+        marginalia_color (Tuple[int, int, int]): BGR color for marginalia chunks
+        image_format (str): "webp", "jpeg" or "png"
+        quality (int): Encoder quality for webp/jpeg
+        max_workers (int): Worker processes for rendering pages
 
     Returns:
         str: The path to the output directory
@@ -112,26 +97,26 @@ def create_visualizations(parsed_documents,
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    viz_config = VisualizationConfig(
-        thickness=1,  # Thicker bounding boxes
-        text_bg_opacity=0.5,  # More opaque text background
-        font_scale=0.7,  # Larger text
+    style = {
+        "thickness": 1,  # Thicker bounding boxes
+        "text_bg_opacity": 0.5,  # More opaque text background
+        "font_scale": 0.7,  # Larger text
         # Custom colors for different chunk types
-        color_map={
+        "color_map": {
             ChunkType.text: text_color,
             ChunkType.table: table_color,
             ChunkType.figure: figure_color,
             ChunkType.marginalia: marginalia_color
         }
-    )
+    }
 
-    for parsed_doc in parsed_documents:
-        images = viz_parsed_document(
-            doc_path,
-            parsed_doc,
-            output_dir=output_dir,
-            viz_config=viz_config
-        )
+    visualize_parsed_document(parsed_documents,
+                              doc_path,
+                              output_dir,
+                              style=style,
+                              image_format=image_format,
+                              quality=quality,
+                              max_workers=max_workers)
 
     return output_dir
 
@@ -165,6 +150,7 @@ def viz_grounding_box(img, chunk):
     viz = cv2.cvtColor(viz, cv2.COLOR_BGR2RGB)
     return viz
 
+@timed("render.viz_chunk_in_pdf")
 def viz_chunk_in_pdf(parsed_doc, pdf_filepath, chunk_id):
     """
     Visualize a chunk in a pdf.
@@ -175,47 +161,95 @@ def viz_chunk_in_pdf(parsed_doc, pdf_filepath, chunk_id):
     Returns:
         viz: nd.array image of page with chunk highlighted
     """
-    images = pdf_to_images(pdf_filepath) # convert pdf pages to list of images
-    try:
-        chunk = next(c for c in parsed_doc[0].chunks if c.chunk_id == chunk_id) # get chunk from parsed doc
-    except StopIteration:
+    chunk = get_doc_index(parsed_doc).get(chunk_id) # O(1) lookup, index is built once per doc
+    if chunk is None:
         print(f"Chunk with id {chunk_id} not found in parsed doc")
         return None
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
     page_number = chunk.grounding[0].page # get page number from chunk
-    img = images[page_number] # get image from list of images
+    img = render_page(pdf_filepath, page_number) # render only the page we need
     viz = viz_grounding_box(img, chunk) # visualize chunk in pdf
     return viz
 
-def viz_chunk_with_box(box_json_list: list[dict], pdf_filepath: str):
+def boxes_to_pixels(boxes, width: int, height: int) -> np.ndarray:
     """
-    Visualize a chunk in a pdf.
+    Convert normalized boxes to pixel coordinates in one vectorized step.
+    Args:
+        boxes: (n, 4) array-like of normalized (l, t, r, b) coordinates
+        width: Image width in pixels
+        height: Image height in pixels
+    Returns:
+        np.ndarray: (n, 4) int32 array of (xmin, ymin, xmax, ymax), clipped to the image
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scaled = boxes * np.array([width, height, width, height], dtype=np.float32)
+    pixels = np.concatenate([np.floor(scaled[:, :2]), np.ceil(scaled[:, 2:])], axis=1)
+    return np.clip(pixels, 0, [width, height, width, height]).astype(np.int32)
+
+
+def _box_from_metadata(box):
+    if isinstance(box, str):
+        box = json.loads(box)
+    return box['l'], box['t'], box['r'], box['b']
+
+
+@timed("render.annotate_hits",
+       payload=lambda pages: {"items": len(pages), "bytes": array_bytes(pages.values())})
+def annotate_hits(pdf_filepath,
+                  hits: list[dict],
+                  color: tuple[int, int, int] = (0, 255, 0),
+                  thickness: int = 2,
+                  label: bool = True,
+                  dpi: int = 72) -> dict[int, np.ndarray]:
+    """
+    Draw the boxes of many retrieved chunks, rendering each page only once.
     Args:
-        parsed_doc: The parsed document
         pdf_filepath: The path to the pdf file
-        chunk_id: The id of the chunk to visualize
+        hits: Chunk metadata with 'pdf_page' and 'box' (dict or JSON string),
+            e.g. the metadata list returned by `retrieve_contexts`
+        color: BGR color of the boxes, as in `draw_box_on_page`
+        thickness: Line thickness of the boxes
+        label: Draw each hit's rank (1-based) next to its box
+        dpi: Render resolution
     Returns:
-        viz: nd.array image of page with chunk highlighted
+        dict: Page number -> RGB image with all boxes on that page drawn
     """
-    viz_config = VisualizationConfig(
-        thickness=2,  # Thicker bounding boxes
-        text_bg_opacity=0.1,  # More opaque text background
-        font_scale=0.7,  # Larger text
-    )
-    images = pdf_to_images(pdf_filepath)
-    for box_json in box_json_list:
-        xmin, ymin, xmax, ymax = box_json['l'], box_json['t'], box_json['r'], box_json['b']
-        box = (xmin, ymin, xmax, ymax)
-        _place_mark(
-            viz,
-            box,
-            text=" ",
-            color_bgr=viz_config.color_map[ChunkType.text],
-            viz_config=viz_config,
-        )
-    return viz
+    boxes_by_page = defaultdict(list)
+    for rank, hit in enumerate(hits, start=1):
+        if hit.get('box') is None or hit.get('pdf_page') is None:
+            continue
+        boxes_by_page[int(hit['pdf_page'])].append((rank, _box_from_metadata(hit['box'])))
+
+    color_rgb = tuple(int(c) for c in color[::-1])  # draw directly on the RGB page
+    annotated = {}
+    for page_number in sorted(boxes_by_page):
+        ranks, boxes = zip(*boxes_by_page[page_number])
+        img = render_page(pdf_filepath, page_number, dpi).copy()
+        height, width = img.shape[:2]
+        pixels = boxes_to_pixels(boxes, width, height)
+        # The last pixel row/column is width - 1 / height - 1: keep clipped edges visible
+        pixels[:, 2:] = np.minimum(pixels[:, 2:], [width - 1, height - 1])
+        for rank, (xmin, ymin, xmax, ymax) in zip(ranks, pixels):
+            cv2.rectangle(img, (int(xmin), int(ymin)), (int(xmax), int(ymax)), color_rgb, thickness)
+            if label:
+                cv2.putText(img, str(rank), (int(xmin), max(int(ymin) - 4, 12)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_rgb, 1, cv2.LINE_AA)
+        annotated[page_number] = img
+    return annotated
+
+
+def viz_chunk_with_box(box_json_list: list[dict], pdf_filepath: str, page_number: int = 0):
+    """
+    Visualize boxes on one page of a pdf.
+    Args:
+        box_json_list: Normalized boxes, as dicts with 'l', 't', 'r', 'b'
+        pdf_filepath: The path to the pdf file
+        page_number: The page the boxes are on
+    Returns:
+        viz: nd.array image of page with boxes highlighted
+    """
+    hits = [{'box': box_json, 'pdf_page': page_number} for box_json in box_json_list]
+    annotated = annotate_hits(pdf_filepath, hits, label=False)
+    return annotated.get(page_number, render_page(pdf_filepath, page_number))
 
 def draw_box_on_page(box_json: dict, 
                      img: np.ndarray, 
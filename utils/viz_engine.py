@@ -0,0 +1,206 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pymupdf
+
+DEFAULT_DPI = 96  # same resolution agentic_doc uses for its visualizations
+IMAGE_FORMATS = {
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "png": (".png", None),
+}
+
+# Plain-value defaults so the style can be sent to worker processes cheaply
+DEFAULT_STYLE = {
+    "thickness": 1,
+    "text_bg_color": (211, 211, 211),
+    "text_bg_opacity": 0.5,
+    "padding": 1,
+    "font_scale": 0.7,
+    "font": cv2.FONT_HERSHEY_SIMPLEX,
+    "color_map": {
+        "text": (0, 0, 255),
+        "table": (0, 255, 0),
+        "figure": (255, 0, 0),
+        "marginalia": (0, 255, 255),
+    },
+}
+
+
+def blend_rect(img, x0, y0, x1, y1, color, opacity):
+    """
+    Alpha-blend a filled rectangle into an image, touching only that region.
+    """
+    height, width = img.shape[:2]
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(width, x1), min(height, y1)
+    if x0 >= x1 or y0 >= y1:
+        return
+    roi = img[y0:y1, x0:x1]
+    fill = np.empty_like(roi)
+    fill[:] = color
+    cv2.addWeighted(fill, opacity, roi, 1 - opacity, 0, dst=roi)
+
+
+def place_mark(img, box_xyxy, text, color_bgr, style):
+    """
+    Draw a box with a centered label on a semi-transparent background.
+
+    Same look as agentic_doc's `_place_mark`, but the background is blended
+    into the label's region only instead of the whole page.
+
+    Args:
+        img (np.ndarray): BGR image, drawn on in place
+        box_xyxy (tuple): Pixel box (xmin, ymin, xmax, ymax)
+        text (str): Label text
+        color_bgr (tuple): Box and text color
+        style (dict): Drawing options, see DEFAULT_STYLE
+    """
+    font, font_scale, thickness = style["font"], style["font_scale"], style["thickness"]
+    padding = style["padding"]
+    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    text_x = int((box_xyxy[0] + box_xyxy[2] - text_width) // 2)
+    text_y = int((box_xyxy[1] + box_xyxy[3] + text_height) // 2)
+
+    blend_rect(img,
+               text_x - padding, text_y - text_height - padding,
+               text_x + text_width + padding + 1, text_y + baseline + padding + 1,
+               style["text_bg_color"], style["text_bg_opacity"])
+    cv2.putText(img, text, (text_x, text_y), font, font_scale, color_bgr,
+                thickness, cv2.LINE_AA)
+    cv2.rectangle(img, tuple(box_xyxy[:2]), tuple(box_xyxy[2:]), color_bgr, thickness)
+
+
+def _page_marks(parsed_doc):
+    """
+    Group every grounding box of a parsed document by page.
+
+    Returns:
+        dict: page -> list of (label, chunk type, (l, t, r, b))
+    """
+    chunks_by_page = defaultdict(list)
+    for chunk in parsed_doc.chunks:
+        chunks_by_page[chunk.grounding[0].page].append(chunk)
+
+    marks = defaultdict(list)
+    for page, chunks in chunks_by_page.items():
+        for i, chunk in enumerate(chunks):
+            chunk_type = getattr(chunk.chunk_type, "value", chunk.chunk_type)
+            show_grounding_idx = len(chunk.grounding) > 1
+            for j, g in enumerate(chunk.grounding):
+                label = f"{i}-{j} {chunk_type}" if show_grounding_idx else f"{i} {chunk_type}"
+                marks[g.page].append((label, chunk_type, (g.box.l, g.box.t, g.box.r, g.box.b)))
+    return marks
+
+
+_worker_docs = {}
+
+
+def _render_page_job(job):
+    """
+    Render, annotate and encode one page. Runs in a worker process.
+    """
+    pdf_path, page_idx, marks, style, dpi, output_path, fmt, quality = job
+    doc = _worker_docs.get(pdf_path)
+    if doc is None:
+        doc = _worker_docs[pdf_path] = pymupdf.open(pdf_path)
+    pix = doc[page_idx].get_pixmap(dpi=dpi, alpha=False)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+    height, width = img.shape[:2]
+    for label, chunk_type, (left, top, right, bottom) in marks:
+        box = (max(0, math.floor(left * width)), max(0, math.floor(top * height)),
+               min(width, math.ceil(right * width)), min(height, math.ceil(bottom * height)))
+        place_mark(img, box, label, style["color_map"][chunk_type], style)
+
+    _, flag = IMAGE_FORMATS[fmt]
+    params = [flag, int(quality)] if flag is not None else []
+    ok, encoded = cv2.imencode(IMAGE_FORMATS[fmt][0], img, params)
+    if not ok:
+        raise RuntimeError(f"Could not encode page {page_idx} as {fmt}")
+    with open(output_path, "wb") as f:
+        f.write(encoded.tobytes())
+    return {"page": page_idx, "file": Path(output_path).name,
+            "bytes": len(encoded), "num_marks": len(marks)}
+
+
+def visualize_parsed_document(parsed_documents,
+                              doc_path,
+                              output_dir,
+                              style=None,
+                              image_format="webp",
+                              quality=80,
+                              dpi=DEFAULT_DPI,
+                              max_workers=None):
+    """
+    Annotate every page of a parsed PDF and save the pages as compressed images.
+
+    Pages are rendered, annotated and encoded in a process pool. A
+    `manifest.json` listing the written pages is saved next to them.
+
+    Args:
+        parsed_documents: The parsed documents, as returned by `parse()`
+        doc_path (str): Path to the original PDF
+        output_dir (str): Directory to save the images to
+        style (dict): Drawing options overriding DEFAULT_STYLE
+        image_format (str): "webp", "jpeg" or "png"
+        quality (int): Encoder quality for webp/jpeg, 1-100
+        dpi (int): Render resolution
+        max_workers (int): Worker processes, defaults to the CPU count
+
+    Returns:
+        dict: The manifest
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"image_format must be one of {list(IMAGE_FORMATS)}")
+    style = {**DEFAULT_STYLE, **(style or {})}
+    style["color_map"] = {getattr(k, "value", k): tuple(v) for k, v in style["color_map"].items()}
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    doc_path = os.fspath(doc_path)
+    stem = Path(doc_path).stem
+    suffix = IMAGE_FORMATS[image_format][0]
+
+    jobs = []
+    for parsed_doc in parsed_documents:
+        marks = _page_marks(parsed_doc)
+        for page_idx in range(parsed_doc.start_page_idx, parsed_doc.end_page_idx + 1):
+            output_path = output_dir / f"{stem}_viz_page_{page_idx}{suffix}"
+            jobs.append((doc_path, page_idx, marks.get(page_idx, []), style, dpi,
+                         str(output_path), image_format, quality))
+
+    start = time.perf_counter()
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs)) or 1
+    if max_workers == 1:
+        try:
+            pages = [_render_page_job(job) for job in jobs]
+        finally:
+            # Inline jobs share this process's document cache; close what they opened
+            for doc in _worker_docs.values():
+                doc.close()
+            _worker_docs.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pages = list(executor.map(_render_page_job, jobs,
+                                      chunksize=max(1, len(jobs) // (4 * max_workers))))
+
+    manifest = {
+        "source": Path(doc_path).name,
+        "format": image_format,
+        "quality": quality,
+        "dpi": dpi,
+        "pages": pages,
+        "total_bytes": sum(p["bytes"] for p in pages),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(output_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest